@@ -1,4 +1,15 @@
-import random
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.shared_matrix import SharedDistanceMatrix, attach_matrix
+
+# Operator settings forwarded to the island workers
+ISLAND_SETTINGS = ('population_size', 'mutation_rate', 'crossover_rate',
+                   'elite_size', 'crossover_operator')
+
 
 class GeneticAlgorithm:
     def __init__(
@@ -9,8 +20,44 @@ class GeneticAlgorithm:
         generations=200,
         mutation_rate=0.15,
         crossover_rate=0.8,
-        elite_size=20
+        elite_size=20,
+        distance_matrix=None,
+        fitness_func=None,
+        crossover_operator='ox',
+        seed=None,
+        initial_routes=None,
+        time_limit=None,
+        deadline=None,
+        progress_callback=None,
+        islands=1,
+        migration_interval=10,
+        migration_size=2,
+        max_workers=None
     ):
+        """
+        distance_matrix: dense (n_bins + 1) matrix (index 0 = depot). When
+                         given, the whole population is scored with one
+                         gather over the matrix instead of per-individual
+                         calls to distance_func.
+        fitness_func: optional batch objective mapping a (P, n_bins) array
+                      to P costs, e.g. RouteOptimizer.split_objective() to
+                      score tours by their multi-trip (split) distance
+        crossover_operator: 'ox' (order crossover) or 'pmx'
+        initial_routes: optional seed tours (permutations of 0..n_bins - 1),
+                        e.g. the nearest-neighbour tour or yesterday's
+                        route; they replace the first random individuals
+        time_limit: optional wall-clock budget in seconds
+        deadline: optional absolute time.monotonic() cut-off; the best
+                  individual found so far is returned when it passes
+        progress_callback: called with {'generation', 'best_cost'} after
+                           every generation; returning True stops the run
+        islands: number of sub-populations (each of population_size) evolved
+                 in a process pool; needs distance_matrix, which workers
+                 read from shared memory (not combined with fitness_func)
+        migration_interval: generations between migrations; each island
+                            then sends its migration_size best individuals
+                            to the next island in a ring
+        """
         self.distance_func = distance_func
         self.n_bins = n_bins
         self.population_size = population_size
@@ -18,56 +65,195 @@ class GeneticAlgorithm:
         self.mutation_rate = mutation_rate
         self.crossover_rate = crossover_rate
         self.elite_size = elite_size
+        self.distance_matrix = distance_matrix
+        self.fitness_func = fitness_func
+        self.crossover_operator = crossover_operator
+        self.seed = seed
+        self.initial_routes = initial_routes
+        self.time_limit = time_limit
+        self.deadline = deadline
+        self.progress_callback = progress_callback
+        self.islands = islands
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+        self.max_workers = max_workers
+        self.rng = np.random.default_rng(seed)
+        self.evaluations = 0
 
     def create_individual(self):
-        individual = list(range(self.n_bins))
-        random.shuffle(individual)
-        return individual
+        return self.rng.permutation(self.n_bins).astype(np.int32)
 
     def create_population(self):
-        return [self.create_individual() for _ in range(self.population_size)]
+        """(population_size, n_bins) array, one permutation per row"""
+        population = np.argsort(
+            self.rng.random((self.population_size, self.n_bins)), axis=1
+        ).astype(np.int32)
+
+        seeds = [route for route in self.initial_routes or []
+                 if len(route) == self.n_bins
+                 and np.array_equal(np.sort(route), np.arange(self.n_bins))]
+        seeds = seeds[:self.population_size]
+        if seeds:
+            population[:len(seeds)] = seeds
+        return population
 
+    # --------------------------------------------------
+    # Fitness
+    # --------------------------------------------------
     def fitness(self, individual):
-        return self.distance_func(individual)
+        return float(self.population_fitness(np.asarray(individual)[None, :])[0])
 
-    def selection(self, population):
-        k = min(5, len(population))
-        selected = random.sample(population, k)
-        selected.sort(key=self.fitness)
-        return selected[0]
+    def population_fitness(self, population):
+        """Tour length of every row of `population` (depot -> bins -> depot)"""
+        self.evaluations += len(population)
+
+        if self.fitness_func is not None:
+            return np.asarray(self.fitness_func(population), dtype=np.float64)
+
+        if self.distance_matrix is None:
+            return np.array([
+                self.distance_func([int(g) for g in individual])
+                for individual in population
+            ], dtype=np.float64)
+
+        D = self.distance_matrix
+        nodes = population + 1
+        legs = D[nodes[:, :-1], nodes[:, 1:]].sum(axis=1, dtype=np.float64)
+        return legs + D[0, nodes[:, 0]] + D[nodes[:, -1], 0]
+
+    # --------------------------------------------------
+    # Operators
+    # --------------------------------------------------
+    def selection(self, population, fitness_values, count=1, k=5):
+        """Tournament selection of `count` parents using cached fitness"""
+        k = min(k, len(population))
+        entrants = self.rng.integers(0, len(population), (count, k))
+        winners = entrants[np.arange(count), np.argmin(fitness_values[entrants], axis=1)]
+        return population[winners]
 
     def crossover(self, parent1, parent2):
         size = len(parent1)
 
         # 🔒 HARD SAFETY
         if size < 2:
-            return parent1[:], parent2[:]
-
-        start, end = sorted(random.sample(range(size), 2))
-
-        def ox(p1, p2):
-            child = [-1] * size
-            child[start:end] = p1[start:end]
-            fill = end
-            for gene in p2:
-                if gene not in child:
-                    if fill >= size:
-                        fill = 0
-                    child[fill] = gene
-                    fill += 1
-            return child
-
-        return ox(parent1, parent2), ox(parent2, parent1)
-
-    def mutate(self, individual):
-        size = len(individual)
+            return parent1.copy(), parent2.copy()
+
+        start, end = np.sort(self.rng.choice(size, 2, replace=False))
+        operator = self._pmx if self.crossover_operator == 'pmx' else self._ox
+
+        return (operator(parent1, parent2, start, end),
+                operator(parent2, parent1, start, end))
+
+    def _ox(self, p1, p2, start, end):
+        """Order crossover in O(n): keep p1[start:end], fill the rest in p2 order"""
+        size = len(p1)
+        child = np.empty_like(p1)
+        child[start:end] = p1[start:end]
+
+        used = np.zeros(size, dtype=bool)
+        used[p1[start:end]] = True
+        order = np.roll(p2, -end)
+        child[(np.arange(size - (end - start)) + end) % size] = order[~used[order]]
+        return child
+
+    def _pmx(self, p1, p2, start, end):
+        """Partially mapped crossover in O(n)"""
+        child = p2.copy()
+        child[start:end] = p1[start:end]
+
+        in_segment = np.zeros(len(p1), dtype=bool)
+        in_segment[p1[start:end]] = True
+        position_in_p1 = np.empty_like(p1)
+        position_in_p1[p1] = np.arange(len(p1))
+
+        outside = np.ones(len(p1), dtype=bool)
+        outside[start:end] = False
+        for i in np.flatnonzero(outside & in_segment[p2]):
+            gene = p2[i]
+            while in_segment[gene]:
+                gene = p2[position_in_p1[gene]]
+            child[i] = gene
+        return child
+
+    def mutate(self, individuals):
+        """Swap two random genes in each row with probability mutation_rate"""
+        individuals = np.atleast_2d(individuals)
+        count, size = individuals.shape
         if size < 2:
-            return individual
+            return individuals
+
+        rows = np.flatnonzero(self.rng.random(count) < self.mutation_rate)
+        i = self.rng.integers(0, size, len(rows))
+        j = (i + self.rng.integers(1, size, len(rows))) % size
+        individuals[rows, i], individuals[rows, j] = individuals[rows, j], individuals[rows, i]
+        return individuals
+
+    # --------------------------------------------------
+    # Evolution
+    # --------------------------------------------------
+    def next_generation(self, population, fitness_values):
+        """
+        One generation on a sorted population: elites are kept with their
+        cached fitness and only the new children are evaluated.
+        """
+        elite_size = min(self.elite_size, self.population_size)
+        n_children = self.population_size - elite_size
+        n_pairs = (n_children + 1) // 2
 
-        if random.random() < self.mutation_rate:
-            i, j = random.sample(range(size), 2)
-            individual[i], individual[j] = individual[j], individual[i]
-        return individual
+        parents = self.selection(population, fitness_values, count=2 * n_pairs)
+        children = np.empty((2 * n_pairs, self.n_bins), dtype=population.dtype)
+        crossing = self.rng.random(n_pairs) < self.crossover_rate
+
+        for p in range(n_pairs):
+            p1, p2 = parents[2 * p], parents[2 * p + 1]
+            if crossing[p]:
+                children[2 * p], children[2 * p + 1] = self.crossover(p1, p2)
+            else:
+                children[2 * p], children[2 * p + 1] = p1, p2
+
+        children = self.mutate(children[:n_children])
+
+        population = np.concatenate([population[:elite_size], children])
+        fitness_values = np.concatenate([
+            fitness_values[:elite_size], self.population_fitness(children)
+        ])
+
+        order = np.argsort(fitness_values, kind='stable')
+        return population[order], fitness_values[order]
+
+    def _sorted_population(self):
+        population = self.create_population()
+        fitness_values = self.population_fitness(population)
+        order = np.argsort(fitness_values, kind='stable')
+        return population[order], fitness_values[order]
+
+    def _deadline(self):
+        """Earliest of the explicit deadline and the time_limit budget"""
+        deadlines = [d for d in (self.deadline,) if d is not None]
+        if self.time_limit:
+            deadlines.append(time.monotonic() + self.time_limit)
+        return min(deadlines) if deadlines else None
+
+    def _report(self, history):
+        """Forward the newest history entry; True means stop"""
+        if self.progress_callback is None:
+            return False
+        return bool(self.progress_callback({
+            'generation': len(history),
+            'best_cost': history[-1]
+        }))
+
+    def evolve(self, population, fitness_values, generations, deadline=None):
+        """Run `generations` generations (or until `deadline`), with history"""
+        history = []
+        for _ in range(generations):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            population, fitness_values = self.next_generation(population, fitness_values)
+            history.append(float(fitness_values[0]))
+            if self._report(history):
+                break
+        return population, fitness_values, history
 
     def optimize(self):
         # 🔒 ABSOLUTE EDGE CASE HANDLING
@@ -75,28 +261,97 @@ class GeneticAlgorithm:
             route = list(range(self.n_bins))
             return route, self.distance_func(route), []
 
-        population = self.create_population()
+        if self.islands > 1 and self.distance_matrix is not None and self.fitness_func is None:
+            return self._optimize_islands()
+
+        deadline = self._deadline()
+
+        population, fitness_values = self._sorted_population()
+        population, fitness_values, history = self.evolve(
+            population, fitness_values, self.generations, deadline
+        )
+
+        best = [int(g) for g in population[0]]
+        if self.fitness_func is not None:
+            return best, float(fitness_values[0]), history
+        return best, self.distance_func(best), history
+
+    # --------------------------------------------------
+    # Island model
+    # --------------------------------------------------
+    def _optimize_islands(self):
+        """
+        Evolve `islands` sub-populations in parallel epochs of
+        migration_interval generations, with ring migration between epochs.
+        Only populations travel between processes; the distance matrix
+        lives in shared memory.
+        """
+        deadline = self._deadline()
+
+        settings = {name: getattr(self, name) for name in ISLAND_SETTINGS}
+        workers = self.max_workers or min(self.islands, os.cpu_count() or 1)
+        islands = [self._sorted_population() for _ in range(self.islands)]
         history = []
+        done = 0
+
+        with SharedDistanceMatrix(self.distance_matrix) as shared, \
+                ProcessPoolExecutor(max_workers=workers) as pool:
+            while done < self.generations:
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+
+                epoch = min(self.migration_interval, self.generations - done)
+                seeds = self.rng.integers(0, 2 ** 32, self.islands)
+                futures = [
+                    pool.submit(_evolve_island, shared.handle, settings,
+                                population, fitness_values, epoch,
+                                int(seed), deadline)
+                    for (population, fitness_values), seed in zip(islands, seeds)
+                ]
+                results = [f.result() for f in futures]
+
+                islands = [(pop, fit) for pop, fit, _, _ in results]
+                self.evaluations += sum(evals for _, _, _, evals in results)
+                histories = [h for _, _, h, _ in results]
+                steps = max(len(h) for h in histories)
+                stop = False
+                for g in range(steps):
+                    history.append(min(h[min(g, len(h) - 1)] for h in histories if h))
+                    stop = self._report(history) or stop
+                done += epoch
+                if stop or steps < epoch:
+                    break
 
-        for _ in range(self.generations):
-            population.sort(key=self.fitness)
-            new_population = population[:self.elite_size]
+                islands = self._migrate(islands)
 
-            while len(new_population) < self.population_size:
-                p1 = self.selection(population)
-                p2 = self.selection(population)
+        population, fitness_values = min(islands, key=lambda island: island[1][0])
+        best = [int(g) for g in population[0]]
+        return best, self.distance_func(best), history
 
-                if random.random() < self.crossover_rate:
-                    c1, c2 = self.crossover(p1, p2)
-                else:
-                    c1, c2 = p1[:], p2[:]
+    def _migrate(self, islands):
+        """Ring migration: island i's best replace island i+1's worst"""
+        k = min(self.migration_size, self.population_size - 1)
+        if k <= 0:
+            return islands
 
-                new_population.append(self.mutate(c1))
-                if len(new_population) < self.population_size:
-                    new_population.append(self.mutate(c2))
+        migrants = [(pop[:k].copy(), fit[:k].copy()) for pop, fit in islands]
+        migrated = []
+        for i, (population, fitness_values) in enumerate(islands):
+            incoming, incoming_fitness = migrants[i - 1]
+            population = np.concatenate([population[:-k], incoming])
+            fitness_values = np.concatenate([fitness_values[:-k], incoming_fitness])
+            order = np.argsort(fitness_values, kind='stable')
+            migrated.append((population[order], fitness_values[order]))
+        return migrated
 
-            population = new_population
-            history.append(self.fitness(population[0]))
 
-        best = population[0]
-        return best, self.fitness(best), history
+def _evolve_island(handle, settings, population, fitness_values, generations,
+                   seed, deadline):
+    """Pool task: evolve one island against the shared distance matrix"""
+    ga = GeneticAlgorithm(None, population.shape[1],
+                          distance_matrix=attach_matrix(handle),
+                          seed=seed, **settings)
+    population, fitness_values, history = ga.evolve(
+        population, fitness_values, generations, deadline
+    )
+    return population, fitness_values, history, ga.evaluations
@@ -0,0 +1,59 @@
+import numpy as np
+
+from utils.knn_graph import KNNGraph
+
+
+class CheapestInsertion:
+    """
+    Complete a partial tour by cheapest insertion
+
+    The bins missing from the given route are inserted one at a time,
+    always the (bin, edge) pair that lengthens the closed tour
+    depot -> bins -> depot the least. Each round scores every missing bin
+    against every tour edge in one vectorized step, so adding a handful
+    of bins to an existing route takes milliseconds.
+
+    distance_matrix may be the dense (n_bins + 1) matrix or a KNNGraph.
+    """
+
+    def __init__(self, distance_func, n_bins, distance_matrix):
+        self.distance_func = distance_func
+        self.n_bins = n_bins
+        self.distance_matrix = distance_matrix
+        self.evaluations = 0
+
+    def _distances(self, a, b):
+        if isinstance(self.distance_matrix, KNNGraph):
+            return self.distance_matrix.distances(a, b)
+        return np.asarray(self.distance_matrix)[a, b].astype(np.float64)
+
+    def optimize(self, route=None):
+        """
+        Insert every bin of 0..n_bins - 1 that is not in `route` (bin
+        positions, duplicates and unknown bins are dropped).
+        """
+        seen = set()
+        partial = []
+        for i in route or []:
+            i = int(i)
+            if 0 <= i < self.n_bins and i not in seen:
+                seen.add(i)
+                partial.append(i)
+
+        tour = [0] + [i + 1 for i in partial]
+        missing = np.array([i + 1 for i in range(self.n_bins) if i not in seen], dtype=np.int64)
+
+        while len(missing):
+            nodes = np.asarray(tour, dtype=np.int64)
+            a, b = nodes, np.roll(nodes, -1)          # edges a -> b, closing at the depot
+            cost = (self._distances(missing[:, None], a[None, :])
+                    + self._distances(missing[:, None], b[None, :])
+                    - self._distances(a, b)[None, :])
+            self.evaluations += cost.size
+
+            x, edge = np.unravel_index(np.argmin(cost), cost.shape)
+            tour.insert(int(edge) + 1, int(missing[x]))
+            missing = np.delete(missing, x)
+
+        route = [node - 1 for node in tour[1:]]
+        return route, self.distance_func(route), []
@@ -0,0 +1,240 @@
+import time
+from collections import deque
+
+import numpy as np
+
+from algorithms.nearest_neighbor import NearestNeighbor
+from utils.distance_calculator import flat_matrix_view, symmetric_matrix
+from utils.knn_graph import KNNGraph
+
+# Moves must gain more than this (km) to be applied; stops float32 noise cycling
+EPSILON = 1e-7
+
+
+class LocalSearch:
+    """
+    Neighbour-list local search with don't-look bits
+
+    Works on the closed tour depot -> bins -> depot and applies 2-opt,
+    Or-opt (segments of 1..or_opt_max bins, either orientation) and swap
+    moves. Every move is scored in O(1) from the distances of the edges it
+    adds and removes, and only the `neighbors` nearest nodes of a bin are
+    tried as partners. A bin is re-examined only when one of its tour
+    edges changed (its "don't-look bit" was reset).
+
+    distance_matrix may be the dense (n_bins + 1) matrix or a KNNGraph.
+    """
+
+    def __init__(self, distance_func, n_bins, distance_matrix, neighbors=8,
+                 or_opt_max=3, use_swap=True, deadline=None, progress_callback=None):
+        """
+        deadline: optional absolute time.monotonic() cut-off; the tour as
+                  improved so far is returned when it passes
+        progress_callback: called with {'pass', 'best_cost'} each time a
+                           history entry is recorded; returning True stops
+        """
+        self.distance_func = distance_func
+        self.n_bins = n_bins
+        self.distance_matrix = distance_matrix
+        self.neighbors = neighbors
+        self.or_opt_max = or_opt_max
+        self.use_swap = use_swap
+        self.deadline = deadline
+        self.progress_callback = progress_callback
+        self.evaluations = 0
+
+    # --------------------------------------------------
+    # Distances and candidate lists
+    # --------------------------------------------------
+    def _distance_lookup(self, m):
+        if isinstance(self.distance_matrix, KNNGraph):
+            return self.distance_matrix.distance
+
+        # Zero-copy scalar lookups into the (possibly memory-mapped) matrix;
+        # one-way road matrices are symmetrized for the reversal moves
+        view, stride = flat_matrix_view(symmetric_matrix(self.distance_matrix))
+        return lambda a, b: view[a * stride + b]
+
+    def _candidates(self, m):
+        """k nearest other nodes per node, closest first"""
+        k = min(self.neighbors, m - 1)
+
+        if isinstance(self.distance_matrix, KNNGraph):
+            return self.distance_matrix.neighbors[:m, :k].tolist()
+
+        candidates = []
+        block = max(1, 1_000_000 // m)
+        for start in range(0, m, block):
+            rows = np.array(self.distance_matrix[start:start + block, :m], dtype=np.float64)
+            rows[np.arange(len(rows)), np.arange(start, start + len(rows))] = np.inf
+            idx = np.argpartition(rows, k - 1, axis=1)[:, :k]
+            order = np.argsort(np.take_along_axis(rows, idx, axis=1), axis=1)
+            candidates.extend(np.take_along_axis(idx, order, axis=1).tolist())
+        return candidates
+
+    # --------------------------------------------------
+    # Optimize
+    # --------------------------------------------------
+    def optimize(self, route=None):
+        """
+        Improve `route` (bin indices) until no candidate move gains.
+        Without a route the search starts from the nearest-neighbour tour.
+        """
+        if route is None:
+            route, _, _ = NearestNeighbor(
+                self.distance_func, self.n_bins, self.distance_matrix
+            ).optimize()
+
+        route = [int(i) for i in route]
+        if len(route) < 3:
+            return route, self.distance_func(route), []
+
+        tour = [0] + [i + 1 for i in route]
+        history = self._search(tour)
+
+        depot = tour.index(0)
+        improved = [node - 1 for node in tour[depot + 1:] + tour[:depot]]
+        return improved, self.distance_func(improved), history
+
+    def _search(self, tour):
+        m = len(tour)
+        d = self._distance_lookup(m)
+        cand = self._candidates(m)
+        pos = [0] * m
+        for i, node in enumerate(tour):
+            pos[node] = i
+
+        cost = sum(d(tour[i - 1], tour[i]) for i in range(m))
+        history = [cost]
+
+        def reverse(i, j):
+            """Reverse tour positions i..j (cyclic), or the shorter complement"""
+            inner = (j - i) % m + 1
+            if inner * 2 > m:
+                i, j = (j + 1) % m, (i - 1) % m
+                inner = m - inner
+            for _ in range(inner // 2):
+                a, b = tour[i], tour[j]
+                tour[i], tour[j] = b, a
+                pos[b], pos[a] = i, j
+                i = i + 1 if i + 1 < m else 0
+                j = j - 1 if j > 0 else m - 1
+
+        def two_opt(a):
+            pa = pos[a]
+            for direction in (1, -1):
+                b = tour[(pa + direction) % m]
+                d_ab = d(a, b)
+                for c in cand[a]:
+                    g1 = d_ab - d(a, c)
+                    if g1 <= EPSILON:
+                        break
+                    e = tour[(pos[c] + direction) % m]
+                    if c == b or e == a:
+                        continue
+                    self.evaluations += 1
+                    delta = d(b, e) - d(c, e) - g1
+                    if delta < -EPSILON:
+                        if direction == 1:
+                            reverse(pos[b], pos[c])
+                        else:
+                            reverse(pos[a], pos[e])
+                        return delta, (a, b, c, e)
+            return None
+
+        def or_opt(a):
+            pa = pos[a]
+            for length in range(1, min(self.or_opt_max, m - 3) + 1):
+                s1, s2 = a, tour[(pa + length - 1) % m]
+                prev, nxt = tour[(pa - 1) % m], tour[(pa + length) % m]
+                removal = d(prev, s1) + d(s2, nxt) - d(prev, nxt)
+                if removal <= EPSILON:
+                    continue
+
+                for c in cand[s1]:
+                    if d(s1, c) >= removal:
+                        break
+                    if (pos[c] - pa) % m < length:
+                        continue
+                    for x, y in ((c, tour[(pos[c] + 1) % m]), (tour[(pos[c] - 1) % m], c)):
+                        if (pos[x] - pa) % m < length or (pos[y] - pa) % m < length:
+                            continue
+                        self.evaluations += 1
+                        d_xy = d(x, y)
+                        forward = d(x, s1) + d(s2, y) - d_xy
+                        backward = d(x, s2) + d(s1, y) - d_xy
+                        delta = min(forward, backward) - removal
+                        if delta < -EPSILON:
+                            move_segment(pa, length, x, backward < forward)
+                            return delta, (prev, nxt, s1, s2, x, y)
+            return None
+
+        def move_segment(start, length, x, flip):
+            segment = [tour[(start + t) % m] for t in range(length)]
+            if flip:
+                segment.reverse()
+            rest = [tour[(start + length + t) % m] for t in range(m - length)]
+            ix = rest.index(x) + 1
+            tour[:] = rest[:ix] + segment + rest[ix:]
+            for i, node in enumerate(tour):
+                pos[node] = i
+
+        def swap(a):
+            if m < 5:
+                return None
+            pa = pos[a]
+            pred_a, succ_a = tour[pa - 1], tour[(pa + 1) % m]
+            for c in cand[a]:
+                pc = pos[c]
+                pred_c, succ_c = tour[pc - 1], tour[(pc + 1) % m]
+                self.evaluations += 1
+                if succ_a == c:
+                    delta = (d(pred_a, c) + d(a, succ_c)
+                             - d(pred_a, a) - d(c, succ_c))
+                elif succ_c == a:
+                    delta = (d(pred_c, a) + d(c, succ_a)
+                             - d(pred_c, c) - d(a, succ_a))
+                else:
+                    delta = (d(pred_a, c) + d(c, succ_a) + d(pred_c, a) + d(a, succ_c)
+                             - d(pred_a, a) - d(a, succ_a) - d(pred_c, c) - d(c, succ_c))
+                if delta < -EPSILON:
+                    tour[pa], tour[pc] = c, a
+                    pos[a], pos[c] = pc, pa
+                    return delta, (pred_a, succ_a, pred_c, succ_c, c)
+            return None
+
+        moves = [two_opt, or_opt] + ([swap] if self.use_swap else [])
+
+        # Don't-look bits: a node is examined only while it is queued
+        queue = deque(tour)
+        queued = [True] * m
+        processed = 0
+
+        while queue:
+            a = queue.popleft()
+            queued[a] = False
+
+            for move in moves:
+                result = move(a)
+                if result is None:
+                    continue
+                delta, touched = result
+                cost += delta
+                for node in (a,) + touched:
+                    if not queued[node]:
+                        queued[node] = True
+                        queue.append(node)
+                break
+
+            processed += 1
+            if processed % m == 0:
+                history.append(cost)
+                if self.progress_callback and self.progress_callback(
+                        {'pass': len(history) - 1, 'best_cost': cost}):
+                    break
+            if self.deadline is not None and processed % 64 == 0 \
+                    and time.monotonic() >= self.deadline:
+                break
+
+        history.append(cost)
+        return history
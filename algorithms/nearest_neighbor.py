@@ -1,23 +1,150 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.knn_graph import KNNGraph, UnvisitedIndex
+from utils.shared_matrix import SharedDistanceMatrix, attach_matrix, route_distance_func
+
+
 class NearestNeighbor:
-    def __init__(self, distance_func, n_bins, distance_matrix):
+    def __init__(self, distance_func, n_bins, distance_matrix, start=None):
+        """
+        distance_matrix: dense (n_bins + 1) square matrix, or a KNNGraph
+                         for sparse (city-scale) mode
+        start: optional bin to visit first instead of the one nearest
+               the depot (used by the multi-start variant)
+        """
         self.distance_func = distance_func
         self.n_bins = n_bins
         self.distance_matrix = distance_matrix
-        
+        self.start = start
+        self.evaluations = 0
+
     def optimize(self):
         """Greedy nearest neighbor algorithm"""
-        unvisited = set(range(self.n_bins))
+        if isinstance(self.distance_matrix, KNNGraph):
+            return self._optimize_sparse()
+
+        n = self.n_bins
         route = []
+        if n == 0:
+            return route, self.distance_func(route), []
+
+        # Visited bins are masked with +inf so each step is one argmin
+        # over the current row (ties go to the lowest bin index)
+        D = np.asarray(self.distance_matrix)
+        mask = np.zeros(n, dtype=np.float64)
         current = 0  # Start at depot (index 0)
-        
-        while unvisited:
+
+        if self.start is not None:
+            route.append(int(self.start))
+            mask[self.start] = np.inf
+            current = int(self.start) + 1
+
+        while len(route) < n:
             # Find nearest unvisited bin
-            nearest = min(unvisited, 
-                         key=lambda x: self.distance_matrix[current][x + 1])
+            self.evaluations += n - len(route)
+            nearest = int(np.argmin(D[current, 1:n + 1] + mask))
             route.append(nearest)
-            unvisited.remove(nearest)
+            mask[nearest] = np.inf
             current = nearest + 1  # +1 for depot offset
-        
+
         distance = self.distance_func(route)
-        
-        return route, distance, []
\ No newline at end of file
+
+        return route, distance, []
+
+    def _optimize_sparse(self):
+        """Same greedy walk, answered from the kNN graph / ball tree"""
+        index = UnvisitedIndex(self.distance_matrix, range(1, self.n_bins + 1))
+        route = []
+        current = 0
+
+        if self.start is not None:
+            index.visit(int(self.start) + 1)
+            route.append(int(self.start))
+            current = int(self.start) + 1
+
+        while True:
+            nearest = index.nearest(current)
+            if nearest is None:
+                break
+            index.visit(nearest)
+            self.evaluations += 1
+            route.append(nearest - 1)
+            current = nearest
+
+        distance = self.distance_func(route)
+
+        return route, distance, []
+
+
+class MultiStartNearestNeighbor:
+    """
+    Nearest neighbour from several first bins, best closed tour wins
+
+    The plain depot-nearest tour is always one of the candidates, so the
+    result is never worse than NearestNeighbor. With a dense matrix the
+    starts run in a process pool reading the matrix from shared memory;
+    a KNNGraph is walked in-process.
+    """
+
+    def __init__(self, distance_func, n_bins, distance_matrix, starts=8,
+                 seed=None, max_workers=None):
+        self.distance_func = distance_func
+        self.n_bins = n_bins
+        self.distance_matrix = distance_matrix
+        self.starts = starts
+        self.seed = seed
+        self.max_workers = max_workers
+        self.evaluations = 0
+
+    def start_bins(self):
+        """None (depot-nearest) followed by distinct random first bins"""
+        rng = np.random.default_rng(self.seed)
+        count = min(max(self.starts - 1, 0), self.n_bins)
+        return [None] + [int(b) for b in rng.choice(self.n_bins, count, replace=False)]
+
+    def optimize(self):
+        """
+        Returns (route, distance, history) where history lists
+        {'start', 'distance'} for every start
+        """
+        starts = self.start_bins()
+        if self.n_bins < 2:
+            return NearestNeighbor(self.distance_func, self.n_bins,
+                                   self.distance_matrix).optimize()
+
+        workers = self.max_workers or min(len(starts), os.cpu_count() or 1)
+        if isinstance(self.distance_matrix, KNNGraph) or workers <= 1:
+            results = []
+            for start in starts:
+                nn = NearestNeighbor(self.distance_func, self.n_bins,
+                                     self.distance_matrix, start=start)
+                route, distance, _ = nn.optimize()
+                results.append((route, distance, nn.evaluations))
+        else:
+            with SharedDistanceMatrix(self.distance_matrix) as shared, \
+                    ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_run_start, shared.handle, self.n_bins, start)
+                           for start in starts]
+                results = [future.result() for future in futures]
+
+        history = []
+        for start, (_, distance, evaluations) in zip(starts, results):
+            self.evaluations += evaluations
+            history.append({'start': start, 'distance': float(distance)})
+
+        best = min(range(len(results)), key=lambda k: results[k][1])
+        route = results[best][0]
+        return route, self.distance_func(route), history
+
+
+def _run_start(handle, n_bins, start):
+    """Pool task: one nearest-neighbour tour against the shared matrix"""
+    matrix = attach_matrix(handle)
+    distance_func = route_distance_func(matrix)
+
+    nn = NearestNeighbor(distance_func, n_bins, matrix, start=start)
+    route, distance, _ = nn.optimize()
+    return route, distance, nn.evaluations
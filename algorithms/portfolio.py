@@ -0,0 +1,260 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import resource_tracker
+
+import numpy as np
+
+from algorithms.solvers import run_solver
+from models.route_optimizer import split_fitness
+from utils.shared_matrix import (SharedDistanceMatrix, SharedFlag, attach_matrix,
+                                 route_distance_func)
+
+# Seconds between progress heartbeats while solvers are still running
+HEARTBEAT = 0.25
+
+# Queue for forwarding solver progress to the parent (set per pool worker)
+_WORKER_PROGRESS = None
+
+# Result name -> solver key, in the order results are reported
+SOLVERS = {
+    'Nearest Neighbor': 'nearest_neighbor',
+    'Genetic Algorithm': 'genetic',
+    'Simulated Annealing': 'annealing',
+    'Local Search': 'local_search',
+}
+
+
+class SolverPool:
+    """
+    Long-lived worker processes for SolverPortfolio runs
+
+    Create it once at startup, before the process starts other threads:
+    every worker is forked up front, so no fork happens later from a
+    multithreaded server. Solver progress of all runs comes back over one
+    queue, and a router thread hands each entry to the run it belongs to.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._progress = multiprocessing.Queue()
+        self._runs = {}                     # run id -> queue.Queue
+        self._lock = threading.Lock()
+        # Workers must share this process's tracker of shared-memory
+        # segments, or each starts its own and reports ours as leaked
+        resource_tracker.ensure_running()
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                            initializer=_init_worker,
+                                            initargs=(self._progress,))
+        # The first task starts all workers (fork start method)
+        self.executor.submit(int).result()
+        self._router = threading.Thread(target=self._route, daemon=True,
+                                        name='solver-progress')
+        self._router.start()
+
+    def subscribe(self):
+        """New run id and the queue its (name, entry) progress arrives on"""
+        run_id = uuid.uuid4().hex
+        with self._lock:
+            self._runs[run_id] = queue.Queue()
+            return run_id, self._runs[run_id]
+
+    def unsubscribe(self, run_id):
+        with self._lock:
+            self._runs.pop(run_id, None)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self._progress.put((None, None, None))
+        self._router.join()
+        self._progress.close()
+        self._progress.join_thread()
+
+    def _route(self):
+        while True:
+            run_id, name, entry = self._progress.get()
+            if run_id is None:
+                return
+            with self._lock:
+                target = self._runs.get(run_id)
+            if target is not None:
+                target.put((name, entry))
+
+
+class SolverPortfolio:
+    """
+    Run several routing solvers concurrently on one subproblem
+
+    Every solver is a separate task in a process pool and reads the same
+    distance matrix from shared memory, so the wall time of a comparison
+    is the slowest solver rather than the sum. 'Local Search' is the
+    2-opt / Or-opt post-pass applied to the nearest-neighbour tour.
+    Pass a long-lived SolverPool to reuse its workers; without one, each
+    run starts (and stops) its own pool.
+    """
+
+    def __init__(self, distance_matrix, n_bins, solvers=SOLVERS, params=None,
+                 loads=None, truck_capacity=None, deadline=None, max_workers=None,
+                 seed_route=None, solver_progress=False, pool=None):
+        """
+        distance_matrix: dense (n_bins + 1) subproblem matrix (index 0 = depot)
+        solvers: {result name: 'nearest_neighbor' | 'genetic' | 'annealing'
+                 | 'local_search'}
+        params: {solver key: constructor keyword arguments}
+        loads, truck_capacity: per-position loads; when given the GA scores
+                               tours by their optimal-split (multi-trip)
+                               distance, as in the sequential endpoints
+        deadline: absolute time.monotonic() cut-off shared by all solvers
+        seed_route: optional starting tour (positions) for the GA, SA and
+                    local search
+        solver_progress: also forward every solver history entry (GA
+                         generation, SA / local-search step) to run()'s
+                         progress_callback as {'solver': name, **entry}
+        pool: SolverPool to run on (max_workers is then ignored)
+        """
+        self.distance_matrix = distance_matrix
+        self.n_bins = n_bins
+        self.solvers = dict(solvers)
+        self.params = params or {}
+        self.loads = None if loads is None else np.asarray(loads, dtype=np.float64)
+        self.truck_capacity = truck_capacity
+        self.deadline = deadline
+        self.max_workers = max_workers
+        self.seed_route = None if seed_route is None else [int(i) for i in seed_route]
+        self.solver_progress = solver_progress
+        self.pool = pool
+
+    def run(self, progress_callback=None):
+        """
+        Returns {name: {'route', 'distance', 'wall_time', 'evaluations'}}
+        where route holds positions 0..n_bins - 1 and distance is the
+        closed-tour length.
+
+        progress_callback gets {'solver', 'distance', 'wall_time'} as each
+        solver finishes and {'running': [names], 'wall_time'} every
+        HEARTBEAT seconds in between. Returning True cancels the run:
+        queued solvers never start, running ones stop at their next
+        progress report (a shared cancel flag), and only the solvers
+        finished so far are returned.
+        """
+        split = None
+        if self.loads is not None and self.truck_capacity is not None:
+            split = (self.loads, self.truck_capacity)
+
+        pool = self.pool
+        if pool is None:
+            pool = SolverPool(self.max_workers or min(len(self.solvers), os.cpu_count() or 1))
+        run_id, progress = pool.subscribe() if self.solver_progress else (None, None)
+
+        results = {}
+        start = time.perf_counter()
+
+        def report(entry):
+            if progress_callback and progress_callback(entry):
+                cancel.set()
+
+        try:
+            with SharedDistanceMatrix(self.distance_matrix) as shared, \
+                    SharedFlag() as cancel:
+                pending = {
+                    pool.executor.submit(_run_solver, shared.handle, solver, self.n_bins,
+                                         self.params.get(solver, {}), split, self.deadline,
+                                         cancel.name, self.seed_route, run_id, name): name
+                    for name, solver in self.solvers.items()
+                }
+                try:
+                    while pending and not cancel.is_set():
+                        if progress is None:
+                            done, _ = wait(pending, timeout=HEARTBEAT,
+                                           return_when=FIRST_COMPLETED)
+                            forwarded = False
+                        else:
+                            forwarded = _forward(progress, report, HEARTBEAT)
+                            done = [future for future in pending if future.done()]
+
+                        for future in done:
+                            name = pending.pop(future)
+                            results[name] = future.result()
+                            report({
+                                'solver': name,
+                                'distance': results[name]['distance'],
+                                'wall_time': results[name]['wall_time']
+                            })
+                        if not done and not forwarded:
+                            report({
+                                'running': [pending[f] for f in pending],
+                                'wall_time': time.perf_counter() - start
+                            })
+                finally:
+                    # Queued solvers are dropped; running ones see the flag
+                    # and return before the shared segments go away
+                    cancel.set()
+                    for future in pending:
+                        future.cancel()
+                    wait(pending)
+
+                # Solvers stopped by a cancel still return their best tour so far
+                for future, name in pending.items():
+                    if not future.cancelled() and future.exception() is None \
+                            and future.result() is not None:
+                        results[name] = future.result()
+        finally:
+            if run_id is not None:
+                pool.unsubscribe(run_id)
+            if pool is not self.pool:
+                pool.shutdown()
+
+        return {name: results[name] for name in self.solvers if name in results}
+
+
+def _forward(progress, report, timeout):
+    """Pass queued solver progress to report(); False if none arrived in time"""
+    try:
+        name, entry = progress.get(timeout=timeout)
+    except queue.Empty:
+        return False
+    while True:
+        report(dict(entry, solver=name))
+        try:
+            name, entry = progress.get_nowait()
+        except queue.Empty:
+            return True
+
+
+def _init_worker(progress):
+    global _WORKER_PROGRESS
+    _WORKER_PROGRESS = progress
+
+
+def _run_solver(handle, solver, n_bins, params, split, deadline, cancel_name,
+                seed_route=None, run_id=None, name=None):
+    """Pool task: one solver against the shared distance matrix"""
+    matrix = attach_matrix(handle)
+    distance_func = route_distance_func(matrix)
+
+    with SharedFlag(cancel_name) as cancel:
+        if cancel.is_set():
+            return None
+
+        def stop(entry):
+            if run_id is not None:
+                _WORKER_PROGRESS.put((run_id, name, entry))
+            return cancel.is_set()
+
+        start = time.perf_counter()
+        fitness_func = split_fitness(matrix, *split) if split and solver == 'genetic' else None
+        route, algo = run_solver(solver, distance_func, n_bins, matrix,
+                                 seed_route=seed_route, fitness_func=fitness_func,
+                                 deadline=deadline, progress_callback=stop, **params)
+        wall_time = time.perf_counter() - start
+
+    return {
+        'route': route,
+        'distance': float(distance_func(route)),
+        'wall_time': wall_time,
+        'evaluations': algo.evaluations
+    }
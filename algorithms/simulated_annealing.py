@@ -1,72 +1,387 @@
 import numpy as np
 import random
 import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config import Config
+from utils.distance_calculator import flat_matrix_view, symmetric_matrix
+from utils.shared_matrix import SharedDistanceMatrix, attach_matrix, route_distance_func
+
+# Random numbers are drawn in batches of this size instead of per move
+RANDOM_BATCH = 4096
+
+MOVES = ('swap', '2opt', 'insert')
+
 
 class SimulatedAnnealing:
-    def __init__(self, distance_func, n_bins, initial_temp=10000, 
-                 cooling_rate=0.995, min_temp=1):
+    def __init__(self, distance_func, n_bins, initial_temp=10000,
+                 cooling_rate=0.995, min_temp=1, distance_matrix=None,
+                 max_iterations=None, time_limit=None, moves=MOVES,
+                 history_interval=100, seed=None, patience=None,
+                 deadline=None, progress_callback=None, initial_route=None):
+        """
+        distance_matrix: dense (n_bins + 1) matrix (index 0 = depot). When
+                         given, moves are scored by delta cost in O(1)
+                         instead of recomputing the whole tour.
+        max_iterations: iteration budget; the temperature then decays from
+                        initial_temp to min_temp over exactly that many moves
+        time_limit: wall-clock budget in seconds (cooling follows elapsed
+                    time when no iteration budget is set)
+        Without either budget the classic schedule is used: multiply by
+        cooling_rate until min_temp is reached.
+        patience: stop once no move has been accepted for this many
+                  iterations (the chain has frozen / converged)
+        deadline: optional absolute time.monotonic() cut-off; the best tour
+                  found so far is returned when it passes
+        progress_callback: called with every history entry as it is
+                           recorded; returning True stops the run
+        initial_route: optional starting tour (permutation of 0..n_bins - 1)
+                       instead of a random one; pair it with a lower
+                       initial_temp so the seed is refined, not scrambled
+        """
         self.distance_func = distance_func
         self.n_bins = n_bins
         self.initial_temp = initial_temp
         self.cooling_rate = cooling_rate
         self.min_temp = min_temp
-        
+        self.distance_matrix = distance_matrix
+        self.max_iterations = max_iterations
+        self.time_limit = time_limit
+        self.moves = tuple(moves)
+        self.history_interval = history_interval
+        self.seed = seed
+        self.patience = patience
+        self.deadline = deadline
+        self.progress_callback = progress_callback
+        self.initial_route = initial_route
+        self.evaluations = 0
+
     def create_initial_solution(self):
-        """Create random initial solution"""
-        return list(np.random.permutation(self.n_bins))
-    
+        """The seed tour when one was given, otherwise a random permutation"""
+        if self.initial_route is not None and sorted(self.initial_route) == list(range(self.n_bins)):
+            return [int(i) for i in self.initial_route]
+        return [int(i) for i in np.random.permutation(self.n_bins)]
+
     def get_neighbor(self, solution):
         """Generate neighbor by swapping two random positions"""
         neighbor = solution.copy()
         idx1, idx2 = random.sample(range(len(neighbor)), 2)
         neighbor[idx1], neighbor[idx2] = neighbor[idx2], neighbor[idx1]
         return neighbor
-    
+
     def acceptance_probability(self, current_cost, new_cost, temperature):
         """Calculate acceptance probability"""
         if new_cost < current_cost:
             return 1.0
         return math.exp((current_cost - new_cost) / temperature)
-    
+
     def optimize(self):
         """Run simulated annealing"""
+        if self.n_bins < 3:
+            route = list(range(self.n_bins))
+            return route, self.distance_func(route), []
+
+        if self.distance_matrix is not None:
+            return self._optimize_delta()
+
         # Initialize
         current_solution = self.create_initial_solution()
         current_cost = self.distance_func(current_solution)
-        
+
         best_solution = current_solution.copy()
         best_cost = current_cost
-        
+
         temperature = self.initial_temp
         history = []
         iteration = 0
-        
+
         while temperature > self.min_temp:
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                break
+
             # Generate neighbor
             new_solution = self.get_neighbor(current_solution)
             new_cost = self.distance_func(new_solution)
-            
+            self.evaluations += 1
+
             # Decide whether to accept
             if self.acceptance_probability(current_cost, new_cost, temperature) > random.random():
                 current_solution = new_solution
                 current_cost = new_cost
-                
+
                 # Update best
                 if current_cost < best_cost:
                     best_solution = current_solution.copy()
                     best_cost = current_cost
-            
+
             # Record history every 100 iterations
-            if iteration % 100 == 0:
+            if iteration % self.history_interval == 0:
                 history.append({
                     'iteration': iteration,
                     'temperature': temperature,
                     'current_cost': current_cost,
                     'best_cost': best_cost
                 })
-            
+                if self.progress_callback and self.progress_callback(history[-1]):
+                    break
+
             # Cool down
             temperature *= self.cooling_rate
             iteration += 1
-        
-        return best_solution, best_cost, history
\ No newline at end of file
+
+        return best_solution, best_cost, history
+
+    # --------------------------------------------------
+    # Delta-cost annealing on an array-backed tour
+    # --------------------------------------------------
+    def _optimize_delta(self):
+        """
+        Same annealing loop, but the tour is kept as one list of matrix
+        indices (depot fixed at slot 0) that moves modify in place, and
+        each move is scored from the handful of edges it changes.
+        """
+        rng = np.random.default_rng(self.seed)
+        # Inversion deltas assume d(a, b) == d(b, a): symmetrize one-way roads
+        D, stride = flat_matrix_view(symmetric_matrix(self.distance_matrix))
+        n = self.n_bins
+        size = n + 1
+
+        if self.initial_route is not None and sorted(self.initial_route) == list(range(n)):
+            start_route = self.initial_route
+        else:
+            start_route = rng.permutation(n)
+        tour = [0] + [int(i) + 1 for i in start_route]
+        current_cost = sum(D[tour[k - 1] * stride + tour[k]] for k in range(size))
+        best_tour = tour[:]
+        best_cost = current_cost
+        last_accepted = 0
+
+        max_iterations = self.max_iterations
+        time_limit = self.time_limit
+        temperature = self.initial_temp
+        if max_iterations:
+            cooling = (self.min_temp / self.initial_temp) ** (1.0 / max_iterations)
+        elif time_limit:
+            cooling = 1.0
+        else:
+            cooling = self.cooling_rate
+        log_ratio = math.log(self.min_temp / self.initial_temp)
+
+        move_ids = [MOVES.index(m) for m in self.moves]
+        history = []
+        iteration = 0
+        batch = RANDOM_BATCH
+        start = time.perf_counter()
+        exp = math.exp
+
+        while True:
+            if batch == RANDOM_BATCH:
+                first = rng.integers(1, size, RANDOM_BATCH).tolist()
+                second = rng.integers(1, size - 1, RANDOM_BATCH).tolist()
+                kinds = rng.choice(move_ids, RANDOM_BATCH).tolist()
+                uniforms = rng.random(RANDOM_BATCH).tolist()
+                batch = 0
+
+                if self.patience and iteration - last_accepted >= self.patience:
+                    break
+                if self.deadline is not None and time.monotonic() >= self.deadline:
+                    break
+
+                if time_limit:
+                    elapsed = time.perf_counter() - start
+                    if elapsed >= time_limit:
+                        break
+                    if not max_iterations:
+                        temperature = self.initial_temp * exp(log_ratio * elapsed / time_limit)
+
+            if max_iterations:
+                if iteration >= max_iterations:
+                    break
+            elif not time_limit and temperature <= self.min_temp:
+                break
+
+            i = first[batch]
+            j = second[batch]
+            if j >= i:
+                j += 1  # distinct positions in 1..n
+            kind = kinds[batch]
+            r = uniforms[batch]
+            batch += 1
+
+            if kind == 2:
+                # Insertion: move the bin at slot i to slot j
+                a, x, b = tour[i - 1], tour[i], tour[i + 1 if i < n else 0]
+                if i < j:
+                    c, e = tour[j], tour[j + 1 if j < n else 0]
+                else:
+                    c, e = tour[j - 1], tour[j]
+                delta = (D[a * stride + b] - D[a * stride + x] - D[x * stride + b]
+                         + D[c * stride + x] + D[x * stride + e] - D[c * stride + e])
+            else:
+                if i > j:
+                    i, j = j, i
+                a, b = tour[i - 1], tour[i]
+                c, e = tour[j], tour[j + 1 if j < n else 0]
+                if kind == 1 or j == i + 1:
+                    # 2-opt (reversing i..j); for adjacent slots this is the swap
+                    delta = (D[a * stride + c] + D[b * stride + e]
+                             - D[a * stride + b] - D[c * stride + e])
+                else:
+                    nb, pc = tour[i + 1], tour[j - 1]
+                    delta = (D[a * stride + c] + D[c * stride + nb] + D[pc * stride + b] + D[b * stride + e]
+                             - D[a * stride + b] - D[b * stride + nb] - D[pc * stride + c] - D[c * stride + e])
+
+            if delta <= 0 or r < exp(-delta / temperature):
+                if kind == 2:
+                    tour.insert(j, tour.pop(i))
+                elif kind == 1:
+                    tour[i:j + 1] = tour[j:i - 1:-1]
+                else:
+                    tour[i], tour[j] = tour[j], tour[i]
+                current_cost += delta
+                last_accepted = iteration
+
+                if current_cost < best_cost - 1e-9:
+                    best_cost = current_cost
+                    best_tour = tour[:]
+
+            if iteration % self.history_interval == 0:
+                history.append({
+                    'iteration': iteration,
+                    'temperature': temperature,
+                    'current_cost': current_cost,
+                    'best_cost': best_cost
+                })
+                if self.progress_callback and self.progress_callback(history[-1]):
+                    iteration += 1
+                    break
+
+            temperature *= cooling
+            iteration += 1
+
+        self.evaluations += iteration
+        best_solution = [node - 1 for node in best_tour[1:]]
+        return best_solution, self.distance_func(best_solution), history
+
+
+class MultiStartSimulatedAnnealing:
+    """
+    Portfolio of independent annealing chains run in a process pool
+
+    Each chain gets its own seed and a different starting temperature
+    (initial_temp scaled by `temp_factors`, cycled), reads the distance
+    matrix from shared memory, and stops on its own once it has frozen
+    (no accepted move for `patience` iterations) or spent its budget. The best tour over all chains wins.
+    """
+
+    def __init__(self, distance_func, n_bins, distance_matrix, chains=None,
+                 temp_factors=None, seed=None, max_workers=None, deadline=None,
+                 progress_callback=None, initial_route=None, **params):
+        """
+        chains / temp_factors: default to Config.SA_PORTFOLIO
+        max_workers: 1 runs the chains one after another in this process
+                     (no pool), e.g. inside a pool worker or on a request thread
+        progress_callback: only honoured in-process; gets each chain's
+                           history entries tagged with 'chain'
+        params: SimulatedAnnealing settings shared by every chain
+        """
+        self.distance_func = distance_func
+        self.n_bins = n_bins
+        self.distance_matrix = distance_matrix
+        self.chains = Config.SA_PORTFOLIO['chains'] if chains is None else chains
+        self.temp_factors = Config.SA_PORTFOLIO['temp_factors'] if temp_factors is None else temp_factors
+        self.seed = seed
+        self.max_workers = max_workers
+        self.params = dict(params, deadline=deadline, initial_route=initial_route)
+        self.progress_callback = progress_callback
+        self.evaluations = 0
+
+    def chain_settings(self):
+        """Per-chain SimulatedAnnealing keyword arguments"""
+        base_temp = self.params.get('initial_temp', 10000)
+        min_temp = self.params.get('min_temp', 1)
+        seeds = np.random.SeedSequence(self.seed).generate_state(self.chains)
+
+        settings = []
+        for chain in range(self.chains):
+            factor = self.temp_factors[chain % len(self.temp_factors)]
+            settings.append(dict(
+                self.params,
+                initial_temp=max(base_temp * factor, min_temp * 1.01),
+                seed=int(seeds[chain])
+            ))
+        return settings
+
+    def optimize(self):
+        """
+        Returns (best_route, best_distance, chains) where `chains` lists
+        each chain's settings, result and own annealing history.
+        """
+        if self.n_bins < 3:
+            route = list(range(self.n_bins))
+            return route, self.distance_func(route), []
+
+        settings = self.chain_settings()
+        workers = self.max_workers or min(self.chains, os.cpu_count() or 1)
+
+        # Symmetrize once here rather than in every chain
+        matrix = symmetric_matrix(self.distance_matrix)
+        if workers == 1:
+            results = self._run_inline(matrix, settings)
+        else:
+            with SharedDistanceMatrix(matrix) as shared, \
+                    ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_run_chain, shared.handle, self.n_bins, chain_params)
+                    for chain_params in settings
+                ]
+                results = [future.result() for future in futures]
+
+        chains = []
+        for chain, (chain_params, (route, cost, history, evaluations)) in enumerate(zip(settings, results)):
+            self.evaluations += evaluations
+            chains.append({
+                'chain': chain,
+                'seed': chain_params['seed'],
+                'initial_temp': chain_params['initial_temp'],
+                'best_cost': cost,
+                'iterations': evaluations,
+                'route': route,
+                'history': history
+            })
+
+        best = min(chains, key=lambda c: c['best_cost'])
+        return best['route'], self.distance_func(best['route']), chains
+
+    def _run_inline(self, matrix, settings):
+        """Chains in sequence in this process; a callback stop skips the rest"""
+        distance_func = route_distance_func(matrix)
+        stopped = False
+        results = []
+        for chain, chain_params in enumerate(settings):
+            def report(entry, chain=chain):
+                nonlocal stopped
+                stopped = bool(self.progress_callback(dict(entry, chain=chain)))
+                return stopped
+
+            sa = SimulatedAnnealing(distance_func, self.n_bins, distance_matrix=matrix,
+                                    progress_callback=report if self.progress_callback else None,
+                                    **chain_params)
+            route, cost, history = sa.optimize()
+            results.append((route, cost, history, sa.evaluations))
+            if stopped:
+                break
+        return results
+
+
+def _run_chain(handle, n_bins, params):
+    """Pool task: one annealing chain against the shared distance matrix"""
+    matrix = attach_matrix(handle)
+    distance_func = route_distance_func(matrix)
+
+    sa = SimulatedAnnealing(distance_func, n_bins, distance_matrix=matrix, **params)
+    route, cost, history = sa.optimize()
+    return route, cost, history, sa.evaluations
+
@@ -0,0 +1,65 @@
+from algorithms.genetic_algorithm import GeneticAlgorithm
+from algorithms.local_search import LocalSearch
+from algorithms.nearest_neighbor import MultiStartNearestNeighbor, NearestNeighbor
+from algorithms.simulated_annealing import MultiStartSimulatedAnnealing, SimulatedAnnealing
+
+SOLVER_KEYS = ('nearest_neighbor', 'nearest_neighbor_multi', 'genetic', 'annealing', 'annealing_multi', 'local_search')
+
+
+def build_solver(solver, distance_func, n_bins, distance_matrix, fitness_func=None,
+                 seed_route=None, deadline=None, progress_callback=None, **params):
+    """
+    Construct one routing solver by key
+
+    The single place that maps 'nearest_neighbor' | 'nearest_neighbor_multi'
+    | 'genetic' | 'annealing' | 'annealing_multi' | 'local_search' to a
+    solver; the portfolio workers, the per-request solve and the
+    per-cluster solve all go through it. Those callers already run in a
+    pool worker or on a request thread, so the multi-start solvers run
+    their starts in-process unless params set max_workers.
+
+    fitness_func: GA population scorer (e.g. RouteOptimizer.split_objective)
+    seed_route: optional starting tour (positions) for the GA, SA and
+                local search
+    params: constructor keyword arguments of that solver
+    """
+    if solver == 'nearest_neighbor':
+        return NearestNeighbor(distance_func, n_bins, distance_matrix)
+    if solver == 'nearest_neighbor_multi':
+        params.setdefault('max_workers', 1)
+        return MultiStartNearestNeighbor(distance_func, n_bins, distance_matrix, **params)
+    if solver == 'genetic':
+        return GeneticAlgorithm(distance_func, n_bins, distance_matrix=distance_matrix,
+                                fitness_func=fitness_func, deadline=deadline,
+                                progress_callback=progress_callback,
+                                initial_routes=None if seed_route is None else [seed_route],
+                                **params)
+    if solver == 'annealing':
+        return SimulatedAnnealing(distance_func, n_bins, distance_matrix=distance_matrix,
+                                  deadline=deadline, progress_callback=progress_callback,
+                                  initial_route=seed_route, **params)
+    if solver == 'annealing_multi':
+        params.setdefault('max_workers', 1)
+        return MultiStartSimulatedAnnealing(distance_func, n_bins, distance_matrix,
+                                            deadline=deadline,
+                                            progress_callback=progress_callback,
+                                            initial_route=seed_route, **params)
+    if solver == 'local_search':
+        return LocalSearch(distance_func, n_bins, distance_matrix, deadline=deadline,
+                           progress_callback=progress_callback, **params)
+    raise ValueError(f'Unknown solver: {solver}')
+
+
+def run_solver(solver, distance_func, n_bins, distance_matrix, seed_route=None, **options):
+    """
+    Solve with the solver of that key (see build_solver).
+    Returns (route, algo): the visiting order in positions 0..n_bins - 1
+    and the solver instance (for its evaluation count).
+    """
+    algo = build_solver(solver, distance_func, n_bins, distance_matrix,
+                        seed_route=seed_route, **options)
+    if solver == 'local_search':
+        route, _, _ = algo.optimize(seed_route)
+    else:
+        route, _, _ = algo.optimize()
+    return [int(i) for i in route], algo
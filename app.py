@@ -1,15 +1,27 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timedelta
+import json
 import logging
+import math
+import queue
+import threading
+import time
 
 from models.waste_predictor import WastePredictor
+from models.artifact_store import ModelArtifactStore
+from models.feature_store import FeatureStore
 from models.route_optimizer import RouteOptimizer
-from algorithms.genetic_algorithm import GeneticAlgorithm
-from algorithms.simulated_annealing import SimulatedAnnealing
 from algorithms.nearest_neighbor import NearestNeighbor
+from algorithms.portfolio import SolverPool, SolverPortfolio
+from algorithms.solvers import run_solver
 from config import Config
 from models.database import db, Bin, BinReading, Collection
+from models.dynamic_dispatch import DynamicDispatcher
+from utils.distance_cache import DistanceMatrixCache
+from utils.road_network import RoadNetwork
+from utils.job_queue import JobQueue, QueueFull, FINISHED
+from utils.route_cache import RouteCache
 from geopy.distance import geodesic
 import requests
 
@@ -25,13 +37,35 @@ app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 # ✅ INIT DB
 db.init_app(app)
 
+# Worker processes for background solves and comparisons, started once
+# here while the process has no other threads yet (they are forked)
+SOLVER_POOL = SolverPool(**Config.SOLVER_POOL)
+
 # --------------------------------------------------
 # Initialize ML Predictor
 # --------------------------------------------------
+# The fitted model is loaded from the artifact store; training only
+# happens (in the background) when no current artifact exists.
 predictor = WastePredictor()
-print("Training waste prediction model...")
-training_results = predictor.train()
-print(f"Model trained - R² Score: {training_results['test_r2']:.4f}")
+MODEL_STORE = ModelArtifactStore(Config.MODEL_DIR, **Config.MODEL_ARTIFACTS)
+_predictor_lock = threading.Lock()
+
+
+def load_predictor():
+    """Load (or, if missing / stale, train and store) the waste model once"""
+    with _predictor_lock:
+        if not predictor.is_trained:
+            metadata, retrained = MODEL_STORE.load_or_train(predictor)
+            print(f"Model {'trained' if retrained else 'loaded'} "
+                  f"({metadata['version']}) - R² Score: {metadata['test_r2']:.4f}")
+    return predictor
+
+
+if MODEL_STORE.needs_training(predictor):
+    print("No current waste prediction model - training in the background...")
+    threading.Thread(target=load_predictor, daemon=True).start()
+else:
+    load_predictor()
 
 # --------------------------------------------------
 # Bhubaneswar Areas (with TYPE ✅)
@@ -59,6 +93,7 @@ def generate_bins():
     for i, area in enumerate(BHUBANESWAR_AREAS):
         bins.append({
             "id": i,
+            "bin_id": f"BIN_{i + 1:03d}",      # matches the IoT / DB bin ids
             "location": (
                 area["lat"] + np.random.uniform(-0.0005, 0.0005),
                 area["lon"] + np.random.uniform(-0.0005, 0.0005)
@@ -75,6 +110,113 @@ def generate_bins():
 BINS = generate_bins()
 DEPOT = {"lat": 20.2961, "lon": 85.8245, "name": "BMC Central Depot"}
 
+# Driving distances from a local road graph when one is configured
+ROAD_NETWORK = None
+if Config.ROAD_GRAPH_PATH:
+    ROAD_NETWORK = RoadNetwork.from_edge_list(Config.ROAD_GRAPH_PATH)
+    print(f"Road network loaded: {ROAD_NETWORK.n_nodes} nodes")
+
+# Depot+bin distance matrices, memory-mapped and shared across workers
+DISTANCE_CACHE = DistanceMatrixCache(Config.DISTANCE_CACHE_DIR, metric=ROAD_NETWORK)
+
+# Background optimization jobs (bounded worker pool, SQLite status mirror)
+JOBS = JobQueue(db_path=Config.JOB_DB_PATH, **Config.JOB_QUEUE)
+
+# Solved routes, reused while bins, loads and solver settings are unchanged
+ROUTE_CACHE = RouteCache(**Config.ROUTE_CACHE)
+
+# Per-bin lag / rolling features, updated by every weight reading
+FEATURE_STORE = FeatureStore(capacity=len(BINS))
+_feature_store_loaded = False
+_feature_store_lock = threading.Lock()
+
+
+def feature_store():
+    """FEATURE_STORE, warmed up from recent BinReading rows on first use"""
+    global _feature_store_loaded
+    with _feature_store_lock:
+        if _feature_store_loaded:
+            return FEATURE_STORE
+        _feature_store_loaded = True
+        since = datetime.utcnow() - timedelta(days=FeatureStore.HISTORY + 1)
+        try:
+            readings = (BinReading.query
+                        .filter(BinReading.timestamp >= since,
+                                BinReading.weight_kg.isnot(None))
+                        .order_by(BinReading.timestamp)
+                        .all())
+        except Exception as e:
+            logger.warning("Feature store warm-up skipped: %s", e)
+            readings = []
+        for reading in readings:
+            FEATURE_STORE.add_reading(reading.bin_id, reading.timestamp, reading.weight_kg)
+    return FEATURE_STORE
+
+
+def route_locations():
+    """Coordinates in RouteOptimizer order: index 0 = depot, 1+ = BINS"""
+    return [(DEPOT["lat"], DEPOT["lon"])] + [tuple(b["location"]) for b in BINS]
+
+
+def find_route_bin(bin_id):
+    """Index of an IoT bin id inside BINS, or None"""
+    for i, b in enumerate(BINS):
+        if b.get("bin_id") == bin_id:
+            return i
+    return None
+
+
+def move_route_bin(bin_id, lat, lon):
+    """
+    Apply a GPS move to BINS and patch the cached distance matrix
+    (only the moved bin's row and column are recomputed)
+    """
+    idx = find_route_bin(bin_id)
+    if idx is None:
+        return False
+
+    new_location = (float(lat), float(lon))
+    if tuple(BINS[idx]["location"]) == new_location:
+        return False
+
+    _, matrix = DISTANCE_CACHE.move_point(route_locations(), idx + 1, new_location)
+    BINS[idx]["location"] = new_location
+    if DISPATCH is not None:
+        DISPATCH.update_matrix(matrix)
+    return True
+
+
+# Live truck routes; created on first use (needs predictions for loads)
+DISPATCH = None
+
+
+def dispatcher():
+    global DISPATCH
+    if DISPATCH is None:
+        ensure_predictions()
+        DISPATCH = DynamicDispatcher(
+            DISTANCE_CACHE.get(route_locations()),
+            [b["predicted_waste"] for b in BINS],
+            Config.TRUCK_CAPACITY,
+            **Config.DISPATCH
+        )
+    return DISPATCH
+
+
+def refresh_dispatch_load(route_bin, load):
+    """An IoT reading replaces a bin's expected load in the live routes"""
+    if route_bin is not None and DISPATCH is not None:
+        DISPATCH.update_loads([load], bins=[route_bin])
+
+
+def dispatch_payload(result):
+    """Dispatcher result with bin ids instead of BINS indices"""
+    if result is None:
+        return None
+    result = dict(result)
+    result["route"] = [BINS[i]["bin_id"] for i in result["route"]]
+    return result
+
 # --------------------------------------------------
 # Pages
 # --------------------------------------------------
@@ -90,13 +232,17 @@ def predict():
         target_date = datetime.fromisoformat(date_str)
 
         bins_info = {b["id"]: b for b in BINS}
-        predictions = predictor.predict_for_bins(bins_info, target_date)
+        predictions = load_predictor().predict_for_bins(
+            bins_info, target_date, feature_store=feature_store())
 
+        ROUTE_CACHE.invalidate()
         high_priority = 0
         for b in BINS:
             b["predicted_waste"] = predictions[b["id"]]
             if b["predicted_waste"] > b["capacity"] * 0.7:
                 high_priority += 1
+        if DISPATCH is not None:
+            DISPATCH.update_loads([b["predicted_waste"] for b in BINS])
 
         total = sum(predictions.values())
 
@@ -115,63 +261,336 @@ def predict():
 
     return render_template("prediction.html", bins=BINS)
 
-@app.route("/optimize", methods=["GET", "POST"])
-def optimize():
-    if request.method == "GET":
-        return render_template("optimization.html", bins=BINS, depot=DEPOT)
+# --------------------------------------------------
+# Route solving (shared by /optimize and the progress stream)
+# --------------------------------------------------
+SOLVERS = ("genetic", "annealing", "annealing_multi", "nearest_neighbor",
+           "nearest_neighbor_multi", "local_search")
+
+# Constructor settings per solver key (plain nearest neighbour has none)
+SOLVER_PARAMS = {
+    "genetic": Config.GENETIC_ALGORITHM,
+    "annealing": Config.SIMULATED_ANNEALING,
+    "annealing_multi": Config.SA_PORTFOLIO,
+    "nearest_neighbor_multi": Config.NN_MULTI_START,
+    "local_search": Config.LOCAL_SEARCH,
+}
+
+
+def ensure_predictions():
+    """Fill BINS[*]['predicted_waste'] for today if /predict was not run"""
+    if "predicted_waste" not in BINS[0]:
+        bins_info = {b["id"]: b for b in BINS}
+        preds = load_predictor().predict_for_bins(
+            bins_info, datetime.now(), feature_store=feature_store())
+        for b in BINS:
+            b["predicted_waste"] = preds.get(b["id"], 0)
+
+
+def solve_params_error(algorithm=None, deadline_ms=None, mode=None):
+    """Message describing an invalid algorithm / deadline_ms / mode, or None"""
+    if algorithm is not None and algorithm not in SOLVERS:
+        return f"Unknown algorithm: {algorithm} (expected one of {', '.join(SOLVERS)})"
+    if deadline_ms not in (None, ""):
+        try:
+            if isinstance(deadline_ms, bool):
+                raise ValueError
+            value = float(deadline_ms)
+        except (TypeError, ValueError):
+            return f"deadline_ms must be a number of milliseconds, got {deadline_ms!r}"
+        if not math.isfinite(value) or value < 0:
+            return f"deadline_ms must be a non-negative number, got {deadline_ms!r}"
+    if mode is not None and mode not in ("full", "incremental", "cluster"):
+        return f"Unknown mode: {mode} (expected 'full', 'incremental' or 'cluster')"
+    return None
+
+
+def deadline_from_ms(deadline_ms):
+    """Absolute time.monotonic() deadline for a request budget, or None"""
+    if deadline_ms in (None, ""):
+        return None
+    return time.monotonic() + float(deadline_ms) / 1000.0
+
+
+def route_cache_key(kind, bins_to_collect, **params):
+    """Fingerprint of a solve: bins, coordinates, loads, capacity, settings"""
+    return ROUTE_CACHE.key(
+        kind=kind,
+        bins=[BINS[i]["bin_id"] for i in bins_to_collect],
+        locations=[BINS[i]["location"] for i in bins_to_collect],
+        loads=[float(BINS[i]["predicted_waste"]) for i in bins_to_collect],
+        depot=(DEPOT["lat"], DEPOT["lon"]),
+        capacity=Config.TRUCK_CAPACITY,
+        settings=SOLVER_PARAMS,
+        **params
+    )
 
-    # POST logic (already fixed earlier)
-    try:
-        data = request.get_json()
-        algorithm = data.get("algorithm", "genetic")
 
-        if "predicted_waste" not in BINS[0]:
-            bins_info = {b["id"]: b for b in BINS}
-            preds = predictor.predict_for_bins(bins_info, datetime.now())
-            for b in BINS:
-                b["predicted_waste"] = preds.get(b["id"], 0)
+def cached_solve(key, solve, progress_callback=None):
+    """
+    Return the cached payload for `key` or run solve(progress_callback)
+    and cache it. Runs stopped early by their caller are not cached.
+    """
+    cached = ROUTE_CACHE.get(key)
+    if cached is not None:
+        cached["cached"] = True
+        return cached
+
+    stopped = []
+
+    def report(entry):
+        stop = bool(progress_callback(entry)) if progress_callback else False
+        if stop:
+            stopped.append(entry)
+        return stop
+
+    result = solve(report)
+    if not stopped:
+        ROUTE_CACHE.put(key, result)
+    result["cached"] = False
+    return result
+
+
+def stored_route(route_id):
+    """
+    BINS indices of the most recent run of Collection.route_id, in
+    route_order. Bins unknown to BINS are skipped.
+    """
+    latest = Collection.query.filter_by(route_id=route_id) \
+        .order_by(Collection.collection_time.desc()).first()
+    if latest is None:
+        return []
+
+    day = latest.collection_time.date()
+    rows = Collection.query.filter_by(route_id=route_id) \
+        .order_by(Collection.route_order, Collection.collection_time).all()
+    return bin_ids_to_route([
+        r.bin_id for r in rows
+        if r.collection_time and r.collection_time.date() == day
+    ])
 
+
+def bin_ids_to_route(bin_ids):
+    """BINS indices for IoT bin ids (unknown ids and repeats dropped)"""
+    route = []
+    for bin_id in bin_ids:
+        idx = find_route_bin(bin_id)
+        if idx is not None and idx not in route:
+            route.append(idx)
+    return route
+
+
+def solve_route(algorithm, optimizer, bins_to_collect, deadline=None,
+                progress_callback=None, seed=None, pool=None):
+    """
+    Order bins_to_collect (BINS indices) with the chosen solver.
+    Without a pool the solve runs inline on the calling thread (the
+    interactive path); background jobs pass SOLVER_POOL so heavy solves
+    run in a worker process. It stops at `deadline` with its best tour
+    so far and forwards each history entry to progress_callback;
+    returning True cancels it. `seed` is an optional starting tour
+    (positions within bins_to_collect).
+    """
+    if algorithm not in SOLVERS:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+
+    if pool is None:
+        distance_func, sub_matrix = optimizer.subproblem(bins_to_collect)
+        fitness_func = None
+        if algorithm == "genetic":
+            fitness_func = optimizer.split_objective(bins_to_collect)
+        route, _ = run_solver(algorithm, distance_func, len(bins_to_collect), sub_matrix,
+                              seed_route=seed, fitness_func=fitness_func,
+                              deadline=deadline, progress_callback=progress_callback,
+                              **SOLVER_PARAMS.get(algorithm, {}))
+        return [bins_to_collect[i] for i in route]
+
+    def forward(entry):
+        # Solver history only; skip the portfolio's heartbeats and summary
+        if progress_callback is None or 'best_cost' not in entry:
+            return False
+        entry = {k: v for k, v in entry.items() if k != 'solver'}
+        return progress_callback(entry)
+
+    _, sub_matrix = optimizer.subproblem(bins_to_collect)
+    portfolio = SolverPortfolio(
+        sub_matrix,
+        len(bins_to_collect),
+        solvers={algorithm: algorithm},
+        params=SOLVER_PARAMS,
+        loads=optimizer._bin_loads()[bins_to_collect],
+        truck_capacity=optimizer.truck_capacity,
+        deadline=deadline,
+        seed_route=seed,
+        solver_progress=True,
+        pool=pool
+    )
+    result = portfolio.run(forward).get(algorithm)
+    if result is None:
+        # Cancelled before the solver started
+        return list(bins_to_collect)
+    return [bins_to_collect[i] for i in result['route']]
+
+
+def run_optimization(algorithm="genetic", deadline_ms=None, progress_callback=None,
+                     route_id=None, previous_route=None, mode="full", warm_start=False,
+                     pool=None):
+    """
+    Optimized vs fixed routes for the five fullest bins (the /optimize payload)
+
+    route_id / previous_route: earlier plan (stored Collection.route_id, or
+        a list of bin ids) used to warm-start the solver: bins already
+        collected drop out and new ones are cheapest-inserted
+    mode: "incremental" skips the full solve and only repairs that plan
+        with local search (milliseconds); "cluster" solves per k-means
+        cluster and stitches the tours (RouteOptimizer.optimize_clustered_route,
+        no deadline or progress)
+    warm_start: seed the solver with the nearest-neighbour tour when no
+        earlier plan is given
+    pool: SolverPool to solve on (background jobs); inline when None
+    """
+    ensure_predictions()
+
+    bins_to_collect = sorted(
+        range(len(BINS)),
+        key=lambda i: BINS[i]["predicted_waste"],
+        reverse=True
+    )[:5]
+
+    if route_id:
+        previous = stored_route(route_id)
+    else:
+        previous = bin_ids_to_route(previous_route or [])
+    incremental = mode == "incremental" and bool(previous)
+    clustered = mode == "cluster"
+
+    def solve(report):
+        deadline = deadline_from_ms(deadline_ms)
         optimizer = RouteOptimizer(
             BINS,
             (DEPOT["lat"], DEPOT["lon"]),
-            Config.TRUCK_CAPACITY
+            Config.TRUCK_CAPACITY,
+            distance_cache=DISTANCE_CACHE
         )
 
-        bins_to_collect = sorted(
-            range(len(BINS)),
-            key=lambda i: BINS[i]["predicted_waste"],
-            reverse=True
-        )[:5]
-
-        algo = GeneticAlgorithm(
-            optimizer.calculate_route_distance,
-            len(bins_to_collect),
-            **Config.GENETIC_ALGORITHM
-        )
-
-        subset, _, _ = algo.optimize()
-        best_route = [bins_to_collect[i] for i in subset]
+        clusters = None
+        if incremental:
+            best_route = optimizer.reoptimize_route(previous, bins_to_collect,
+                                                    **Config.LOCAL_SEARCH)
+            routes = optimizer.create_routes(best_route)
+        elif clustered:
+            # Clusters are solved on this thread: the payload's few bins
+            # form one cluster, so a process pool would only add a fork
+            result = optimizer.optimize_clustered_route(bin_indices=bins_to_collect,
+                                                        solver=algorithm, max_workers=1)
+            routes, clusters = result["routes"], result["clusters"]
+        else:
+            seed = None
+            if previous:
+                seed = optimizer.seed_sequence(previous, bins_to_collect)
+            elif warm_start:
+                distance_func, sub_matrix = optimizer.subproblem(bins_to_collect)
+                seed, _, _ = NearestNeighbor(distance_func, len(bins_to_collect),
+                                             sub_matrix).optimize()
+            best_route = solve_route(algorithm, optimizer, bins_to_collect,
+                                     deadline, report, seed, pool)
+            routes = optimizer.create_routes(best_route)
 
-        routes = optimizer.create_routes(best_route)
         optimized = optimizer._aggregate_route_metrics(routes)
         optimized["num_routes"] = len(routes)
 
-        fixed_routes = optimizer.create_routes(bins_to_collect)
+        fixed_routes = optimizer.create_routes_greedy(bins_to_collect)
         fixed = optimizer._aggregate_route_metrics(fixed_routes)
         fixed["num_routes"] = len(fixed_routes)
 
-        return jsonify({
+        payload = {
             "success": True,
+            "algorithm": algorithm,
+            "mode": "incremental" if incremental else "cluster" if clustered else "full",
             "optimized": optimized,
             "fixed": fixed,
             "routes": [[BINS[i] for i in r] for r in routes],
             "depot": DEPOT
-        })
+        }
+        if clusters is not None:
+            payload["clusters"] = clusters
+        return payload
+
+    key = route_cache_key("optimize", bins_to_collect,
+                          algorithm=algorithm, deadline_ms=deadline_ms,
+                          previous=previous, incremental=incremental,
+                          clustered=clustered, warm_start=bool(warm_start))
+    return cached_solve(key, solve, progress_callback)
+
+
+@app.route("/optimize", methods=["GET", "POST"])
+def optimize():
+    if request.method == "GET":
+        return render_template("optimization.html", bins=BINS, depot=DEPOT)
+
+    data = request.get_json(silent=True) or {}
+    algorithm = data.get("algorithm", "genetic")
+    error = solve_params_error(algorithm, data.get("deadline_ms"), data.get("mode", "full"))
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+
+    try:
+        return jsonify(run_optimization(
+            algorithm,
+            data.get("deadline_ms"),
+            route_id=data.get("route_id"),
+            previous_route=data.get("previous_route"),
+            mode=data.get("mode", "full"),
+            warm_start=bool(data.get("warm_start", False))
+        ))
 
     except Exception as e:
         print("❌ Optimize error:", e)
         return jsonify({"success": False, "error": str(e)}), 500
 
+
+@app.route("/api/optimize/stream")
+def optimize_stream():
+    """
+    Server-Sent Events: one `progress` event per solver history entry
+    (generation / iteration best cost), then a `result` event with the
+    /optimize payload. Query args: algorithm, deadline_ms.
+    """
+    algorithm = request.args.get("algorithm", "genetic")
+    deadline_ms = request.args.get("deadline_ms")
+    error = solve_params_error(algorithm, deadline_ms)
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+
+    events = queue.Queue()
+    cancelled = threading.Event()
+
+    def on_progress(entry):
+        events.put(("progress", entry))
+        return cancelled.is_set()
+
+    def worker():
+        try:
+            with app.app_context():
+                events.put(("result", run_optimization(algorithm, deadline_ms, on_progress)))
+        except Exception as e:
+            events.put(("error", {"success": False, "error": str(e)}))
+
+    def stream():
+        threading.Thread(target=worker, daemon=True).start()
+        try:
+            while True:
+                event, payload = events.get()
+                yield f"event: {event}\ndata: {json.dumps(payload, default=float)}\n\n"
+                if event != "progress":
+                    break
+        finally:
+            # Client went away (or we are done): stop the solver early
+            cancelled.set()
+
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # --------------------------------------------------
 # Comparison Page
 # --------------------------------------------------
@@ -179,75 +598,277 @@ def optimize():
 def comparison():
     return render_template("comparison.html")
 
-@app.route('/api/compare_algorithms', methods=['POST'])
-def compare_algorithms():
-    try:
-        # Ensure predictions exist
-        if 'predicted_waste' not in BINS[0]:
-            bins_info = {b['id']: b for b in BINS}
-            predictions = predictor.predict_for_bins(bins_info, datetime.now())
-            for b in BINS:
-                b['predicted_waste'] = predictions.get(b['id'], 0)
-
-        # Demo-safe bin selection
-        bins_to_collect = [
-            i for i, b in enumerate(BINS)
-            if b['predicted_waste'] > b['capacity'] * 0.4
-        ]
-        if not bins_to_collect:
-            bins_to_collect = sorted(
-                range(len(BINS)),
-                key=lambda i: BINS[i]['predicted_waste'],
-                reverse=True
-            )[:5]
+def run_comparison(deadline_ms=None, progress_callback=None, pool=SOLVER_POOL):
+    """Fixed route vs every solver in the portfolio, on the bins due today"""
+    # Ensure predictions exist
+    ensure_predictions()
+
+    # Demo-safe bin selection
+    bins_to_collect = [
+        i for i, b in enumerate(BINS)
+        if b['predicted_waste'] > b['capacity'] * 0.4
+    ]
+    if not bins_to_collect:
+        bins_to_collect = sorted(
+            range(len(BINS)),
+            key=lambda i: BINS[i]['predicted_waste'],
+            reverse=True
+        )[:5]
+
+    def solve(report):
+        deadline = deadline_from_ms(deadline_ms)
 
         optimizer = RouteOptimizer(
             BINS,
             (DEPOT['lat'], DEPOT['lon']),
-            truck_capacity=Config.TRUCK_CAPACITY
+            truck_capacity=Config.TRUCK_CAPACITY,
+            distance_cache=DISTANCE_CACHE
         )
 
         results = {}
 
         # ---------------- FIXED ROUTE (BASELINE) ----------------
-        fixed_routes = optimizer.create_routes(bins_to_collect)
+        fixed_routes = optimizer.create_routes_greedy(bins_to_collect)
         fixed_metrics = optimizer._aggregate_route_metrics(fixed_routes)
         fixed_metrics['num_routes'] = len(fixed_routes)
         results['Fixed Route'] = fixed_metrics
 
-        # ---------------- NEAREST NEIGHBOR ----------------
-        nn = NearestNeighbor(
-            optimizer.calculate_route_distance,
-            len(bins_to_collect),
-            optimizer.distance_matrix
-        )
-        nn_idx, _, _ = nn.optimize()
-        nn_route = [bins_to_collect[i] for i in nn_idx]
-        nn_routes = optimizer.create_routes(nn_route)
-        nn_metrics = optimizer._aggregate_route_metrics(nn_routes)
-        nn_metrics['num_routes'] = len(nn_routes)
-        results['Nearest Neighbor'] = nn_metrics
-
-        # ---------------- GENETIC ALGORITHM ----------------
-        ga = GeneticAlgorithm(
-            optimizer.calculate_route_distance,
+        # Solvers work on positions within bins_to_collect, all at once in
+        # a process pool sharing one distance matrix
+        _, sub_matrix = optimizer.subproblem(bins_to_collect)
+        portfolio = SolverPortfolio(
+            sub_matrix,
             len(bins_to_collect),
-            **Config.GENETIC_ALGORITHM
+            params=SOLVER_PARAMS,
+            loads=optimizer._bin_loads()[bins_to_collect],
+            truck_capacity=optimizer.truck_capacity,
+            deadline=deadline,
+            pool=pool
         )
-        ga_idx, _, _ = ga.optimize()
-        ga_route = [bins_to_collect[i] for i in ga_idx]
-        ga_routes = optimizer.create_routes(ga_route)
-        ga_metrics = optimizer._aggregate_route_metrics(ga_routes)
-        ga_metrics['num_routes'] = len(ga_routes)
-        results['Genetic Algorithm'] = ga_metrics
 
-        return jsonify({'success': True, 'results': results})
+        for name, run in portfolio.run(report).items():
+            route = [bins_to_collect[i] for i in run['route']]
+            routes = optimizer.create_routes(route)
+            metrics = optimizer._aggregate_route_metrics(routes)
+            metrics['num_routes'] = len(routes)
+            metrics['wall_time_ms'] = round(run['wall_time'] * 1000, 1)
+            metrics['evaluations'] = int(run['evaluations'])
+            results[name] = metrics
+
+        return {'success': True, 'results': results}
+
+    key = route_cache_key('compare', bins_to_collect, deadline_ms=deadline_ms)
+    return cached_solve(key, solve, progress_callback)
+
+
+@app.route('/api/compare_algorithms', methods=['POST'])
+def compare_algorithms():
+    data = request.get_json(silent=True) or {}
+    error = solve_params_error(deadline_ms=data.get('deadline_ms'))
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+
+    try:
+        return jsonify(run_comparison(data.get('deadline_ms')))
 
     except Exception as e:
         print("Comparison error:", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/routes/score', methods=['POST'])
+def score_route_plans():
+    """
+    What-if scoring of many candidate plans in one vectorized pass.
+    Body: {"plans": [[["BIN_001", "BIN_004"], ["BIN_002"]], ...]}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        plans = [[bin_ids_to_route(route) for route in plan]
+                 for plan in data.get('plans', [])]
+        if not plans:
+            return jsonify({'success': False, 'error': 'No plans given'}), 400
+
+        ensure_predictions()
+        optimizer = RouteOptimizer(
+            BINS,
+            (DEPOT['lat'], DEPOT['lon']),
+            truck_capacity=Config.TRUCK_CAPACITY,
+            distance_cache=DISTANCE_CACHE
+        )
+        totals = optimizer.score_plans(plans)
+        counts = ('bins_visited', 'num_routes')
+        scores = [
+            {key: int(values[p]) if key in counts else round(float(values[p]), 2)
+             for key, values in totals.items()}
+            for p in range(len(plans))
+        ]
+        return jsonify({'success': True, 'plans': scores})
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/route_cache/stats', methods=['GET'])
+def route_cache_stats():
+    """Hit / miss counters of the optimization result cache"""
+    return jsonify({'success': True, 'stats': ROUTE_CACHE.stats()})
+
+
+# --------------------------------------------------
+# Live dispatch
+# --------------------------------------------------
+@app.route('/api/dispatch/routes', methods=['GET'])
+def get_dispatch_routes():
+    routes = dispatcher().routes()
+    for route in routes.values():
+        route['stops'] = [BINS[i]['bin_id'] for i in route['stops']]
+    return jsonify({'success': True, 'trucks': routes})
+
+
+@app.route('/api/dispatch/routes', methods=['POST'])
+def set_dispatch_routes():
+    """
+    Load the trucks' live routes.
+    Body: {"routes": {"<truck_id>": {"stops": [bin ids], "at": bin id | null,
+                                     "load_kg": float}}}
+    Without "routes" the current /optimize plan is dispatched, one truck
+    per trip.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        live = dispatcher()
+        routes = data.get('routes')
+        if routes is None:
+            plan = run_optimization()
+            routes = {
+                f"BMC-TRUCK-{k + 1:02d}": {'stops': [b['bin_id'] for b in trip]}
+                for k, trip in enumerate(plan['routes'])
+            }
+
+        for truck_id in list(live.trucks):
+            live.remove_truck(truck_id)
+        for truck_id, route in routes.items():
+            at = find_route_bin(route['at']) if route.get('at') else None
+            live.set_route(truck_id, bin_ids_to_route(route.get('stops', [])),
+                           position=at, load_on_board=float(route.get('load_kg', 0)))
+
+        return get_dispatch_routes()
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/dispatch/visit', methods=['POST'])
+def dispatch_visit():
+    """A truck served a bin. Body: {"truck_id", "bin_id", "collected_kg"}"""
+    data = request.get_json(silent=True) or {}
+    live = dispatcher()
+    idx = find_route_bin(data.get('bin_id'))
+    if data.get('truck_id') not in live.trucks or idx is None:
+        return jsonify({'success': False, 'error': 'Unknown truck or bin'}), 404
+
+    collected = data.get('collected_kg')
+    visited = live.visit(data['truck_id'], idx,
+                         None if collected is None else float(collected))
+    return jsonify({'success': visited})
+
+
+# --------------------------------------------------
+# Background jobs
+# --------------------------------------------------
+JOB_TYPES = {
+    'optimize': run_optimization,
+    'compare': run_comparison,
+}
+
+
+def _job_task(task):
+    """Run a job function inside an application context, on SOLVER_POOL"""
+    def run(progress_callback, **params):
+        with app.app_context():
+            return task(progress_callback=progress_callback, pool=SOLVER_POOL, **params)
+    return run
+
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue an optimization and return its job id at once.
+    Body: {"type": "optimize" | "compare", "algorithm": ..., "deadline_ms": ...}
+    """
+    data = request.get_json(silent=True) or {}
+    kind = data.get('type', 'optimize')
+    if kind not in JOB_TYPES:
+        return jsonify({'success': False, 'error': f'Unknown job type: {kind}'}), 400
+
+    params = {'deadline_ms': data.get('deadline_ms')}
+    if kind == 'optimize':
+        algorithm = data.get('algorithm', 'genetic')
+        error = solve_params_error(algorithm, params['deadline_ms'], data.get('mode', 'full'))
+    else:
+        error = solve_params_error(deadline_ms=params['deadline_ms'])
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+
+    if kind == 'optimize':
+        params['algorithm'] = algorithm
+        params['route_id'] = data.get('route_id')
+        params['previous_route'] = data.get('previous_route')
+        params['mode'] = data.get('mode', 'full')
+        params['warm_start'] = bool(data.get('warm_start', False))
+
+    try:
+        job = JOBS.submit(kind, _job_task(JOB_TYPES[kind]), **params)
+    except QueueFull as e:
+        return jsonify({'success': False, 'error': str(e)}), 429
+
+    return jsonify({'success': True, 'job_id': job.id, 'status': job.status}), 202
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    state = JOBS.get(job_id)
+    if state is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': state})
+
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    if not JOBS.cancel(job_id):
+        state = JOBS.get(job_id)
+        if state is None:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+        return jsonify({'success': False, 'error': f"Job already {state['status']}"}), 409
+    return jsonify({'success': True, 'job_id': job_id})
+
+
+@app.route('/api/jobs/<job_id>/stream')
+def stream_job(job_id):
+    """Server-Sent Events with the job state on every change until it finishes"""
+    if JOBS.get(job_id) is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+
+    def stream():
+        version = -1
+        while True:
+            update = JOBS.wait(job_id, version)
+            if update is None:
+                break
+            new_version, state = update
+            if new_version != version:
+                version = new_version
+                yield f"event: {state['status']}\ndata: {json.dumps(state, default=float)}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+            if state['status'] in FINISHED:
+                break
+
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 def generate_sample_bins():
     """Generate sample waste bin locations in Bhubaneswar areas (demo-optimized)"""
     np.random.seed(42)
@@ -336,15 +957,31 @@ def receive_iot_data():
         if 'gps_lat' in data and 'gps_lon' in data:
             bin_obj.latitude = data['gps_lat']
             bin_obj.longitude = data['gps_lon']
+            move_route_bin(bin_id, data['gps_lat'], data['gps_lon'])
         
+        # Fill levels changed: cached routes are stale
+        ROUTE_CACHE.invalidate()
+
+        # Live routes plan with the measured load; critical bins go
+        # straight into a truck route
+        dispatch = None
+        route_bin = find_route_bin(bin_id)
+        if route_bin is not None:
+            load = BINS[route_bin]['capacity'] * float(data['fill_level']) / 100
+            refresh_dispatch_load(route_bin, load)
+            if data['fill_level'] >= 90 and DISPATCH is not None and DISPATCH.trucks:
+                dispatch = dispatch_payload(DISPATCH.insert(route_bin, load=load))
+
         # Create reading record
         reading = BinReading(
             bin_id=bin_id,
             fill_level=data['fill_level'],
+            weight_kg=float(data['weight_kg']),
             temperature=data.get('temperature'),
             timestamp=datetime.utcnow()
         )
         db.session.add(reading)
+        feature_store().add_reading(bin_id, reading.timestamp, reading.weight_kg)
         
         # Check for alerts
         alerts = []
@@ -387,7 +1024,8 @@ def receive_iot_data():
             'message': 'Data received successfully',
             'bin_status': bin_obj.get_status(),
             'alerts': alerts,
-            'should_collect': bin_obj.current_fill_level >= 70
+            'should_collect': bin_obj.current_fill_level >= 70,
+            'dispatch': dispatch
         }), 200
         
     except Exception as e:
@@ -447,6 +1085,7 @@ def simulate_bin_fill():
         increase = data.get('increase', 10)
         
         bins = Bin.query.filter_by(is_active=True).all()
+        ROUTE_CACHE.invalidate()
         
         for bin_obj in bins:
             new_level = min(100, bin_obj.current_fill_level + increase)
@@ -532,11 +1171,15 @@ def smart_bin_update():
         bin_id=bin_id,
         fill_level=fill_level,
         weight_kg=weight,
-        temperature=temperature
+        temperature=temperature,
+        timestamp=datetime.utcnow()
     )
 
     db.session.add(reading)
+    feature_store().add_reading(bin_id, reading.timestamp, weight)
     db.session.commit()
+    ROUTE_CACHE.invalidate()
+    refresh_dispatch_load(find_route_bin(bin_id), weight)
 
     # Alerts (for demo & jury)
     alert = "OK"
@@ -0,0 +1,61 @@
+"""
+Island-model GA scaling benchmark
+
+Solves one random Bhubaneswar-sized instance with a fixed wall-clock
+budget and 1, 2, 4, ... islands (one process each), and reports the best
+tour found. Run from the project root:
+
+    python -m benchmarks.ga_islands --bins 500 --seconds 10
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from algorithms.genetic_algorithm import GeneticAlgorithm
+from config import Config
+from models.route_optimizer import RouteOptimizer
+
+
+def random_bins(n_bins, seed=0):
+    rng = np.random.default_rng(seed)
+    lat = 20.25 + rng.random(n_bins) * 0.12
+    lon = 85.78 + rng.random(n_bins) * 0.10
+    return [{"location": (a, b), "predicted_waste": 100.0} for a, b in zip(lat, lon)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bins", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--max-islands", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    optimizer = RouteOptimizer(random_bins(args.bins), (20.2961, 85.8245))
+    settings = dict(Config.GENETIC_ALGORITHM, generations=10 ** 9, seed=42,
+                    time_limit=args.seconds)
+
+    counts = [1]
+    while counts[-1] * 2 <= args.max_islands:
+        counts.append(counts[-1] * 2)
+
+    print(f"{args.bins} bins, {args.seconds:.0f}s budget, {os.cpu_count()} CPUs")
+    if counts[-1] > (os.cpu_count() or 1):
+        print("note: more islands than CPUs - they share cores, so this "
+              "measures time-slicing, not parallel speedup")
+    print(f"{'islands':>8} {'best km':>10} {'generations':>12} {'evaluations':>12} {'wall s':>8}")
+    for islands in counts:
+        ga = GeneticAlgorithm(
+            optimizer.calculate_route_distance, args.bins,
+            distance_matrix=optimizer.distance_matrix,
+            **dict(settings, islands=islands)
+        )
+        start = time.monotonic()
+        _, distance, history = ga.optimize()
+        print(f"{islands:>8} {distance:>10.2f} {len(history):>12} "
+              f"{ga.evaluations:>12} {time.monotonic() - start:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Waste predictor backend benchmark
+
+Trains every regressor backend on synthetic data sets of increasing size
+(bins x days from SyntheticWasteGenerator) and reports training time,
+test R² and batched inference throughput. Run from the project root:
+
+    python -m benchmarks.waste_predictor --sizes 50x365 500x365 2000x730
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from models.data_generator import SyntheticWasteGenerator
+from models.waste_predictor import MODEL_BACKENDS, WastePredictor
+
+
+def parse_size(text):
+    bins, days = text.lower().split("x")
+    return int(bins), int(days)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", nargs="+", type=parse_size,
+                        default=[(50, 365), (500, 365), (2000, 730)])
+    parser.add_argument("--backends", nargs="+", choices=sorted(MODEL_BACKENDS),
+                        default=sorted(MODEL_BACKENDS))
+    parser.add_argument("--predict-bins", type=int, default=100000,
+                        help="bins scored per predict_batch call")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    bins_info = {
+        i: {"type": t}
+        for i, t in enumerate(rng.choice(["residential", "commercial", "industrial"],
+                                         args.predict_bins))
+    }
+
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'rows':>10} {'backend':>24} {'train s':>9} {'test R2':>8} "
+          f"{'predict s':>10} {'rows/s':>12}")
+    for n_bins, days in args.sizes:
+        df = SyntheticWasteGenerator(n_bins=n_bins, days=days, seed=42).frame()
+        for backend in args.backends:
+            predictor = WastePredictor(backend=backend)
+            start = time.monotonic()
+            results = predictor.train(df)
+            train_s = time.monotonic() - start
+
+            start = time.monotonic()
+            predictor.predict_batch(bins_info, [df["date"].max()])
+            predict_s = time.monotonic() - start
+
+            print(f"{len(df):>10} {backend:>24} {train_s:>9.2f} "
+                  f"{results['test_r2']:>8.4f} {predict_s:>10.3f} "
+                  f"{len(bins_info) / predict_s:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import os
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'smart-waste-collection-key'
     
@@ -9,21 +11,106 @@ class Config:
         'generations': 200,
         'mutation_rate': 0.15,
         'crossover_rate': 0.8,
-        'elite_size': 20
+        'elite_size': 20,
+        # >1 evolves sub-populations in a process pool; never more than
+        # the host has CPUs (see benchmarks/ga_islands.py)
+        'islands': min(int(os.environ.get('GA_ISLANDS', 1)), os.cpu_count() or 1),
+        'migration_interval': 10,  # generations between migrations
+        'migration_size': 2        # best individuals sent to the next island
     }
     
     SIMULATED_ANNEALING = {
         'initial_temp': 10000,
         'cooling_rate': 0.995,
-        'min_temp': 1
+        'min_temp': 1,
+        'max_iterations': None,   # iteration budget (replaces the cooling schedule)
+        'time_limit': None        # seconds
+    }
+
+    # Multi-start SA: independent chains in a process pool, best tour wins
+    SA_PORTFOLIO = {
+        'chains': 4,
+        'temp_factors': (1.0, 0.1, 0.01, 10.0),
+        'max_iterations': 200000,
+        'patience': 20000         # stop a chain after this many rejected moves in a row
+    }
+
+    # Multi-start nearest neighbour: best tour over several first bins
+    NN_MULTI_START = {
+        'starts': 8,              # including the plain depot-nearest start
+        'seed': 0
+    }
+
+    LOCAL_SEARCH = {
+        'neighbors': 8,
+        'or_opt_max': 3,
+        'use_swap': True
     }
     
-    # Truck specifications
+    # Truck specifications (Bhubaneswar assumptions)
     TRUCK_CAPACITY = 10000  # kg
-    TRUCK_SPEED = 40  # km/h
-    FUEL_CONSUMPTION = 0.35  # liters per km
-    CO2_PER_LITER = 2.63  # kg CO2 per liter
+    TRUCK_SPEED = 25  # km/h
+    SERVICE_MINUTES_PER_BIN = 8
+    FUEL_CONSUMPTION = 0.40  # liters per km
+    CO2_PER_LITER = 2.68  # kg CO2 per liter
     
     # Cost parameters
-    FUEL_COST_PER_LITER = 1.5  # USD
-    DRIVER_COST_PER_HOUR = 25  # USD
\ No newline at end of file
+    FUEL_COST_PER_LITER = 95  # INR
+    DRIVER_COST_PER_HOUR = 200  # INR
+
+    # Route metric constants (RouteOptimizer.score_routes), derived from
+    # the truck and cost settings above so there is one source of truth
+    ROUTE_METRICS = {
+        'speed_kmh': TRUCK_SPEED,
+        'service_minutes_per_bin': SERVICE_MINUTES_PER_BIN,
+        'fuel_liters_per_km': FUEL_CONSUMPTION,
+        'fuel_cost_per_liter': FUEL_COST_PER_LITER,
+        'driver_cost_per_hour': DRIVER_COST_PER_HOUR,
+        'co2_kg_per_liter': CO2_PER_LITER
+    }
+
+    # Distance matrix cache (memory-mapped .npy files shared by workers)
+    DISTANCE_CACHE_DIR = os.environ.get('DISTANCE_CACHE_DIR') or \
+        os.path.join(BASE_DIR, 'instance', 'distance_cache')
+
+    # Waste prediction regressor: 'gradient_boosting' (single-threaded) or
+    # 'hist_gradient_boosting' (multi-core, for millions of training rows)
+    WASTE_MODEL = {
+        'backend': os.environ.get('WASTE_MODEL_BACKEND') or 'gradient_boosting',
+        'params': None     # overrides of the backend defaults
+    }
+
+    # Fitted waste-prediction model artifacts (retrained when missing or stale)
+    MODEL_DIR = os.environ.get('MODEL_DIR') or \
+        os.path.join(BASE_DIR, 'instance', 'models')
+    MODEL_ARTIFACTS = {
+        'keep': 5,             # versions kept on disk
+        'max_age_days': 30     # retrain older artifacts (None = never)
+    }
+
+    # Optional road graph (CSV edge list) for driving distances; haversine if unset
+    ROAD_GRAPH_PATH = os.environ.get('ROAD_GRAPH_PATH')
+
+    # Solver worker processes shared by background jobs and comparisons
+    SOLVER_POOL = {
+        'max_workers': None  # None = one per CPU
+    }
+
+    # Background optimization jobs
+    JOB_QUEUE = {
+        'max_workers': 2,    # concurrent solves
+        'max_pending': 32    # queued jobs beyond this are rejected (HTTP 429)
+    }
+    JOB_DB_PATH = os.environ.get('JOB_DB_PATH') or \
+        os.path.join(BASE_DIR, 'instance', 'jobs.db')
+
+    # Optimization result cache (LRU + TTL)
+    ROUTE_CACHE = {
+        'max_entries': 128,
+        'ttl': 300           # seconds
+    }
+
+    # Live dispatch of critical bins into running routes
+    DISPATCH = {
+        'max_route_km': None     # optional cap on a truck's remaining route
+    }
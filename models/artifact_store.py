@@ -0,0 +1,166 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+import joblib
+
+
+class ModelArtifactStore:
+    """
+    Versioned on-disk store for the fitted WastePredictor
+
+    Every save writes a new version directory holding `model.joblib`
+    (estimator + StandardScaler) and `metadata.json` (training spec,
+    feature columns, training data hash, R² scores, timestamp), then
+    points the `CURRENT` file at it. Both steps are atomic renames, so a
+    reader never sees a half-written artifact. The newest `keep`
+    versions are retained.
+
+    An artifact is stale when the predictor's training_spec() changed
+    (estimator, hyperparameters, feature columns, scikit-learn version),
+    when it is older than `max_age_days`, or when the caller passes
+    training data whose hash differs from the one it was fitted on.
+    """
+
+    CURRENT = "CURRENT"
+
+    def __init__(self, root, keep=5, max_age_days=None):
+        self.root = root
+        self.keep = keep
+        self.max_age_days = max_age_days
+        os.makedirs(root, exist_ok=True)
+
+    # --------------------------------------------------
+    # Versions
+    # --------------------------------------------------
+    def versions(self):
+        """Stored version names, oldest first"""
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.isfile(os.path.join(self.root, name, "metadata.json"))
+        )
+
+    def current(self):
+        """Name of the active version, or None"""
+        try:
+            with open(os.path.join(self.root, self.CURRENT)) as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        if not os.path.isfile(os.path.join(self.root, name, "model.joblib")):
+            return None
+        return name
+
+    def metadata(self, version=None):
+        version = version or self.current()
+        if version is None:
+            return None
+        with open(os.path.join(self.root, version, "metadata.json")) as f:
+            return json.load(f)
+
+    # --------------------------------------------------
+    # Save / load
+    # --------------------------------------------------
+    def save(self, predictor):
+        """Store a trained predictor as a new version; returns its metadata"""
+        if not predictor.is_trained:
+            raise ValueError("predictor is not trained")
+
+        spec = predictor.training_spec()
+        created = time.time()
+        version = "v{}-{}".format(
+            datetime.fromtimestamp(created).strftime("%Y%m%dT%H%M%S%f"),
+            spec['fingerprint'][:8]
+        )
+        metadata = {
+            'version': version,
+            'created_at': created,
+            'spec': spec,
+            'feature_columns': spec['feature_columns'],
+            **predictor.training_info
+        }
+
+        tmp = tempfile.mkdtemp(dir=self.root, prefix=".tmp-")
+        try:
+            joblib.dump({'model': predictor.model, 'scaler': predictor.scaler},
+                        os.path.join(tmp, "model.joblib"))
+            with open(os.path.join(tmp, "metadata.json"), "w") as f:
+                json.dump(metadata, f, indent=2, sort_keys=True)
+            os.replace(tmp, os.path.join(self.root, version))
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        self._set_current(version)
+        self._prune()
+        return metadata
+
+    def load(self, predictor, version=None):
+        """Restore `version` (default: current) into predictor; returns its metadata"""
+        version = version or self.current()
+        if version is None:
+            return None
+
+        state = joblib.load(os.path.join(self.root, version, "model.joblib"))
+        metadata = self.metadata(version)
+        predictor.model = state['model']
+        predictor.scaler = state['scaler']
+        predictor.is_trained = True
+        predictor.training_info = {
+            key: metadata.get(key)
+            for key in ('data_hash', 'rows', 'train_r2', 'test_r2')
+        }
+        return metadata
+
+    def is_stale(self, predictor, metadata, df=None):
+        if metadata is None:
+            return True
+        if metadata.get('spec', {}).get('fingerprint') != predictor.training_spec()['fingerprint']:
+            return True
+        if self.max_age_days is not None and \
+                time.time() - metadata['created_at'] > self.max_age_days * 86400:
+            return True
+        if df is not None and metadata.get('data_hash') != predictor.data_hash(df):
+            return True
+        return False
+
+    def needs_training(self, predictor, df=None):
+        """True when the current artifact is missing, unreadable or stale"""
+        try:
+            metadata = self.metadata()
+        except (OSError, ValueError):
+            return True
+        return self.is_stale(predictor, metadata, df)
+
+    def load_or_train(self, predictor, df=None):
+        """
+        Load the current artifact into predictor, retraining (and saving
+        a new version) only when it is missing or stale.
+        Returns (metadata, retrained).
+        """
+        if not self.needs_training(predictor, df):
+            try:
+                return self.load(predictor), False
+            except Exception:
+                pass  # unreadable artifact (e.g. pickled by another version): retrain
+
+        predictor.train(df)
+        return self.save(predictor), True
+
+    # --------------------------------------------------
+    # Housekeeping
+    # --------------------------------------------------
+    def _set_current(self, version):
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        with os.fdopen(fd, "w") as f:
+            f.write(version)
+        os.replace(tmp, os.path.join(self.root, self.CURRENT))
+
+    def _prune(self):
+        current = self.current()
+        old = [v for v in self.versions() if v != current]
+        for version in old[:max(len(old) - (self.keep - 1), 0)]:
+            shutil.rmtree(os.path.join(self.root, version), ignore_errors=True)
@@ -0,0 +1,174 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+BIN_TYPES = ['residential', 'commercial', 'industrial']
+
+TYPE_MULTIPLIER = {
+    'residential': 1.0,
+    'commercial': 1.5,
+    'industrial': 2.0
+}
+
+# Bump when the generated values change for the same settings
+GENERATOR_VERSION = 2
+
+
+class SyntheticWasteGenerator:
+    """
+    Daily waste per bin for training and capacity testing
+
+    Same model as the original per-row loop in WastePredictor:
+
+        waste = base * type_multiplier * seasonal(month) * weekly * noise
+
+    with base ~ U(50, 200), weekend factor ~ U(1.1, 1.4), a uniformly
+    drawn bin type, seasonal = 1 + 0.3 sin(2 pi month / 12) and
+    noise ~ N(1, 0.15), clipped at 0. Rows are computed on a (bin, day)
+    grid with NumPy broadcasting and yielded as DataFrame chunks of
+    `chunk_bins` bins, so 100k bins x several years never has to be held
+    in memory at once.
+
+    Output is reproducible for a seed and independent of the chunk size:
+    per-bin parameters come from one stream, and the noise of every block
+    of BLOCK_BINS bins from its own child of the seed.
+    """
+
+    BLOCK_BINS = 256
+
+    def __init__(self, n_bins=50, days=365, seed=42, start_date=None,
+                 chunk_bins=1024):
+        """
+        start_date: first day (default: `days` days before today, midnight)
+        chunk_bins: bins per yielded chunk (rounded up to BLOCK_BINS)
+        """
+        self.n_bins = int(n_bins)
+        self.days = int(days)
+        self.seed = seed
+        if start_date is None:
+            start_date = pd.Timestamp.now().normalize() - pd.Timedelta(days=self.days)
+        self.start_date = pd.Timestamp(start_date)
+        blocks = max(1, -(-int(chunk_bins) // self.BLOCK_BINS))
+        self.chunk_bins = blocks * self.BLOCK_BINS
+
+        self.dates = pd.date_range(self.start_date, periods=self.days, freq='D')
+        self.day_of_week = self.dates.dayofweek.to_numpy().astype(np.int8)
+        self.is_weekend = (self.day_of_week >= 5).astype(np.int8)
+        self.month = self.dates.month.to_numpy().astype(np.int8)
+        self.seasonal = 1 + 0.3 * np.sin(2 * np.pi * self.month / 12)
+
+        self._bin_params()
+
+    def _bin_params(self):
+        rng = np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(0,)))
+        self.base_waste = rng.uniform(50, 200, self.n_bins)
+        self.weekend_factor = rng.uniform(1.1, 1.4, self.n_bins)
+        self.type_index = rng.integers(0, len(BIN_TYPES), self.n_bins)
+        multipliers = np.array([TYPE_MULTIPLIER[t] for t in BIN_TYPES])
+        self.type_multiplier = multipliers[self.type_index]
+
+    def __len__(self):
+        return self.n_bins * self.days
+
+    # --------------------------------------------------
+    # Generation
+    # --------------------------------------------------
+    def _noise(self, first_bin, last_bin):
+        """N(1, 0.15) noise for bins [first_bin, last_bin), one stream per block"""
+        parts = []
+        for block in range(first_bin // self.BLOCK_BINS,
+                           -(-last_bin // self.BLOCK_BINS)):
+            lo = block * self.BLOCK_BINS
+            hi = min(lo + self.BLOCK_BINS, self.n_bins)
+            rng = np.random.default_rng(
+                np.random.SeedSequence(self.seed, spawn_key=(1, block)))
+            parts.append(rng.normal(1, 0.15, (hi - lo, self.days)))
+        if not parts:
+            return np.empty((0, self.days))
+        return np.concatenate(parts)[first_bin % self.BLOCK_BINS:][:last_bin - first_bin]
+
+    def chunk(self, first_bin, last_bin):
+        """DataFrame of every day for bins [first_bin, last_bin), bin-major"""
+        bins = np.arange(first_bin, last_bin)
+        n = len(bins)
+
+        weekly = np.where(self.is_weekend[None, :] == 1,
+                          self.weekend_factor[bins, None], 1.0)
+        waste = (self.base_waste[bins, None] * self.type_multiplier[bins, None]
+                 * self.seasonal[None, :] * weekly
+                 * self._noise(first_bin, last_bin))
+        np.maximum(waste, 0, out=waste)
+
+        return pd.DataFrame({
+            'bin_id': np.repeat(bins.astype(np.int32), self.days),
+            'date': np.tile(self.dates.to_numpy(), n),
+            'day_of_week': np.tile(self.day_of_week, n),
+            'is_weekend': np.tile(self.is_weekend, n),
+            'month': np.tile(self.month, n),
+            'bin_type': pd.Categorical.from_codes(
+                np.repeat(self.type_index[bins], self.days), categories=BIN_TYPES),
+            'waste_kg': waste.ravel()
+        })
+
+    def chunks(self):
+        """Yield DataFrame chunks of `chunk_bins` bins"""
+        for first in range(0, self.n_bins, self.chunk_bins):
+            yield self.chunk(first, min(first + self.chunk_bins, self.n_bins))
+
+    def frame(self):
+        """The whole dataset as one DataFrame"""
+        if self.n_bins == 0:
+            return self.chunk(0, 0)
+        return pd.concat(self.chunks(), ignore_index=True)
+
+    # --------------------------------------------------
+    # Output
+    # --------------------------------------------------
+    def to_file(self, path, format=None):
+        """
+        Stream the dataset to `path` chunk by chunk. Parquet (needs
+        pyarrow) or CSV, chosen by `format` or the file extension.
+        Returns the number of rows written.
+        """
+        format = format or os.path.splitext(path)[1].lstrip('.').lower() or 'parquet'
+        if format not in ('parquet', 'csv'):
+            raise ValueError(f"unsupported format: {format}")
+
+        tmp = f"{path}.tmp"
+        rows = 0
+        try:
+            if format == 'parquet':
+                rows = self._write_parquet(tmp)
+            else:
+                for i, chunk in enumerate(self.chunks()):
+                    chunk.to_csv(tmp, mode='w' if i == 0 else 'a',
+                                 header=(i == 0), index=False)
+                    rows += len(chunk)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return rows
+
+    def _write_parquet(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("writing parquet requires pyarrow "
+                              "(pip install pyarrow) - or use a .csv path") from e
+
+        rows = 0
+        writer = None
+        try:
+            for chunk in self.chunks():
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows
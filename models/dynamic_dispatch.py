@@ -0,0 +1,299 @@
+import threading
+from typing import Dict, List
+
+import numpy as np
+
+from utils.knn_graph import KNNGraph
+
+
+class DynamicDispatcher:
+    """
+    Live truck routes with real-time insertion of urgent bins
+
+    Every truck keeps its remaining stops (bin indices, depot = matrix
+    index 0), the node it is at, the load already on board and, per
+    route, the precomputed edge lengths plus prefix sums of distance and
+    load. insert() scores the new bin against every remaining edge of
+    every truck in one vectorized pass,
+
+        added_km = d(from, bin) + d(bin, to) - d(from, to)
+
+    masks out trucks whose on-board + planned load (or route length, when
+    max_route_km is set) would exceed their limits, and splices the bin
+    into the cheapest feasible edge. The flat edge arrays keep per-truck
+    offsets; after a change only that truck's slice is spliced in, so an
+    insertion across hundreds of trucks stays well within a few
+    milliseconds.
+    """
+
+    # Per-edge arrays of the flat index (truck row, slot, end nodes, length)
+    EDGE_KEYS = ('truck', 'slot', 'from', 'to', 'edge_km')
+
+    def __init__(self, distance_matrix, loads, truck_capacity: float,
+                 max_route_km: float = None):
+        """
+        distance_matrix: dense (n_bins + 1) matrix or KNNGraph, index 0 = depot
+        loads: expected load (kg) per bin index, used for planned stops
+        truck_capacity: default capacity of a truck (kg)
+        max_route_km: optional limit on a truck's remaining route length
+        """
+        self.distance_matrix = distance_matrix
+        self.loads = np.array(loads, dtype=np.float64)
+        self.truck_capacity = truck_capacity
+        self.max_route_km = max_route_km
+        self.trucks: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._flat = None
+
+    # --------------------------------------------------
+    # Distances
+    # --------------------------------------------------
+    def _distances(self, a, b) -> np.ndarray:
+        if isinstance(self.distance_matrix, KNNGraph):
+            return self.distance_matrix.distances(a, b)
+        return np.asarray(self.distance_matrix)[a, b].astype(np.float64)
+
+    def update_matrix(self, distance_matrix):
+        """Swap in a new matrix (e.g. after a bin moved) and re-index"""
+        with self._lock:
+            self.distance_matrix = distance_matrix
+            for truck in self.trucks.values():
+                self._prepare(truck)
+            self._flat = None
+
+    def update_loads(self, loads, bins=None):
+        """
+        New expected loads (e.g. fresh predictions or an IoT reading):
+        for every bin index, or only for `bins` when given. Planned stops
+        of those bins take the new load, so capacity checks see it.
+        """
+        with self._lock:
+            if bins is None:
+                self.loads = np.array(loads, dtype=np.float64)
+                changed = None
+            else:
+                self.loads[np.asarray(bins, dtype=np.int64)] = loads
+                changed = {int(b) for b in np.atleast_1d(bins)}
+
+            for truck in self.trucks.values():
+                if changed is not None and changed.isdisjoint(truck['stops']):
+                    continue
+                truck['stop_loads'] = [float(self.loads[s]) for s in truck['stops']]
+                self._prepare(truck)
+            if self._flat is not None:
+                self._flat['spare'] = self._spare([self.trucks[t] for t in self._flat['ids']])
+
+    # --------------------------------------------------
+    # Route state
+    # --------------------------------------------------
+    def set_route(self, truck_id: str, stops: List[int], position: int = None,
+                  load_on_board: float = 0.0, capacity: float = None):
+        """
+        (Re)load a truck: remaining `stops` (bin indices) in order, the bin
+        it is standing at (None = depot) and what it already carries.
+        """
+        truck = {
+            'stops': [int(s) for s in stops],
+            'position': 0 if position is None else int(position) + 1,
+            'load_on_board': float(load_on_board),
+            'capacity': float(self.truck_capacity if capacity is None else capacity),
+            'stop_loads': [float(self.loads[s]) for s in stops],
+        }
+        with self._lock:
+            self._prepare(truck)
+            self.trucks[truck_id] = truck
+            self._splice(truck_id)
+
+    def remove_truck(self, truck_id: str):
+        with self._lock:
+            if self.trucks.pop(truck_id, None) is not None:
+                self._splice(truck_id)
+
+    def visit(self, truck_id: str, bin_index: int, collected: float = None):
+        """Truck served `bin_index`: it leaves the plan and its load is on board"""
+        with self._lock:
+            truck = self.trucks[truck_id]
+            if bin_index not in truck['stops']:
+                return False
+            k = truck['stops'].index(bin_index)
+            load = truck['stop_loads'].pop(k)
+            truck['stops'].pop(k)
+            truck['position'] = int(bin_index) + 1
+            truck['load_on_board'] += load if collected is None else float(collected)
+            self._prepare(truck)
+            self._splice(truck_id)
+            return True
+
+    def routes(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                truck_id: {
+                    'stops': list(truck['stops']),
+                    'at_depot': truck['position'] == 0,
+                    'load_kg': round(truck['load_on_board'] + truck['planned_load'], 2),
+                    'capacity_kg': truck['capacity'],
+                    'remaining_km': round(truck['km'], 3)
+                }
+                for truck_id, truck in self.trucks.items()
+            }
+
+    def find(self, bin_index: int):
+        """Truck already planned to visit `bin_index`, or None"""
+        for truck_id, truck in self.trucks.items():
+            if bin_index in truck['stops']:
+                return truck_id
+        return None
+
+    def _prepare(self, truck):
+        """Edge lengths and prefix sums of one truck's remaining route"""
+        nodes = np.array([truck['position']] + [s + 1 for s in truck['stops']] + [0],
+                         dtype=np.int64)
+        edges = self._distances(nodes[:-1], nodes[1:])
+        truck['nodes'] = nodes
+        truck['edge_km'] = edges
+        truck['prefix_km'] = np.concatenate([[0.0], np.cumsum(edges)])
+        truck['prefix_load'] = np.concatenate([[0.0], np.cumsum(truck['stop_loads'])])
+        truck['planned_load'] = float(truck['prefix_load'][-1])
+        truck['km'] = float(truck['prefix_km'][-1])
+
+    @staticmethod
+    def _edges(row, truck):
+        """One truck's slice of the flat edge arrays"""
+        count = len(truck['edge_km'])
+        return {
+            'truck': np.full(count, row, dtype=np.int64),
+            'slot': np.arange(count),
+            'from': truck['nodes'][:-1],
+            'to': truck['nodes'][1:],
+            'edge_km': truck['edge_km'],
+        }
+
+    @staticmethod
+    def _spare(trucks):
+        return np.array([t['capacity'] - t['load_on_board'] - t['planned_load']
+                         for t in trucks], dtype=np.float64)
+
+    def _index(self):
+        """Flat edge arrays over all trucks (built once, then spliced)"""
+        if self._flat is None:
+            ids = list(self.trucks)
+            trucks = [self.trucks[t] for t in ids]
+            slices = [self._edges(row, t) for row, t in enumerate(trucks)]
+            counts = [len(t['edge_km']) for t in trucks]
+            self._flat = {
+                'ids': ids,
+                'row': {truck_id: row for row, truck_id in enumerate(ids)},
+                'offsets': np.concatenate([[0], np.cumsum(counts, dtype=np.int64)]),
+                'spare': self._spare(trucks),
+                'km': np.array([t['km'] for t in trucks], dtype=np.float64),
+            }
+            for key in self.EDGE_KEYS:
+                self._flat[key] = (np.concatenate([e[key] for e in slices]) if slices
+                                   else np.empty(0, np.float64 if key == 'edge_km' else np.int64))
+        return self._flat
+
+    def _splice(self, truck_id):
+        """
+        Bring the flat arrays in line with one added, changed or removed
+        truck by replacing only its slice (caller holds the lock)
+        """
+        flat = self._flat
+        if flat is None:
+            return
+        truck = self.trucks.get(truck_id)
+        row = flat['row'].get(truck_id)
+        if row is None and truck is None:
+            return
+
+        offsets = flat['offsets']
+        if row is None:                                 # new truck: append
+            row = len(flat['ids'])
+            flat['ids'].append(truck_id)
+            flat['row'][truck_id] = row
+            offsets = np.append(offsets, offsets[-1])
+            flat['spare'] = np.append(flat['spare'], 0.0)
+            flat['km'] = np.append(flat['km'], 0.0)
+        lo, hi = int(offsets[row]), int(offsets[row + 1])
+
+        if truck is None:                               # removed truck
+            edges = {key: flat[key][:0] for key in self.EDGE_KEYS}
+        else:
+            edges = self._edges(row, truck)
+            flat['spare'][row] = self._spare([truck])[0]
+            flat['km'][row] = truck['km']
+
+        for key in self.EDGE_KEYS:
+            flat[key] = np.concatenate([flat[key][:lo], edges[key], flat[key][hi:]])
+        offsets[row + 1:] += len(edges['edge_km']) - (hi - lo)
+
+        if truck is None:
+            # Later trucks move up one row
+            flat['truck'][lo:] -= 1
+            offsets = np.delete(offsets, row + 1)
+            flat['spare'] = np.delete(flat['spare'], row)
+            flat['km'] = np.delete(flat['km'], row)
+            del flat['ids'][row]
+            flat['row'] = {t: r for r, t in enumerate(flat['ids'])}
+        flat['offsets'] = offsets
+
+    # --------------------------------------------------
+    # Insertion
+    # --------------------------------------------------
+    def insert(self, bin_index: int, load: float = None) -> Dict:
+        """
+        Add an urgent bin to the cheapest feasible position of any truck.
+
+        Returns {'truck_id', 'position', 'added_km', 'eta_km', 'route'}
+        ('already_planned' when a truck already visits the bin), or None
+        when no truck has room for it.
+        """
+        bin_index = int(bin_index)
+        load = float(self.loads[bin_index] if load is None else load)
+
+        with self._lock:
+            planned = self.find(bin_index)
+            if planned is not None:
+                truck = self.trucks[planned]
+                return {
+                    'truck_id': planned,
+                    'position': truck['stops'].index(bin_index),
+                    'added_km': 0.0,
+                    'already_planned': True,
+                    'route': list(truck['stops'])
+                }
+
+            flat = self._index()
+            if len(flat['edge_km']) == 0:
+                return None
+
+            node = bin_index + 1
+            added = (self._distances(flat['from'], node)
+                     + self._distances(node, flat['to'])
+                     - flat['edge_km'])
+
+            feasible = flat['spare'][flat['truck']] >= load
+            if self.max_route_km is not None:
+                feasible &= flat['km'][flat['truck']] + added <= self.max_route_km
+            if not feasible.any():
+                return None
+
+            best = int(np.argmin(np.where(feasible, added, np.inf)))
+            truck_id = flat['ids'][flat['truck'][best]]
+            slot = int(flat['slot'][best])
+            truck = self.trucks[truck_id]
+
+            eta_km = float(truck['prefix_km'][slot]
+                           + self._distances(flat['from'][best], node))
+            truck['stops'].insert(slot, bin_index)
+            truck['stop_loads'].insert(slot, load)
+            self._prepare(truck)
+            self._splice(truck_id)
+
+            return {
+                'truck_id': truck_id,
+                'position': slot,
+                'added_km': float(added[best]),
+                'eta_km': eta_km,
+                'already_planned': False,
+                'route': list(truck['stops'])
+            }
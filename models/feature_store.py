@@ -0,0 +1,232 @@
+import threading
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+LAGS = (1, 7, 14)
+WINDOWS = (7, 30)
+
+HISTORY_COLUMNS = (
+    [f'waste_lag_{lag}' for lag in LAGS]
+    + [f'waste_rolling_{window}' for window in WINDOWS]
+)
+
+# Bump when the definition of the history features changes
+FEATURE_VERSION = 2
+
+
+class FeatureStore:
+    """
+    Online lag / rolling features per bin
+
+    Each bin owns a row of fixed-size arrays: a ring buffer of its last
+    HISTORY daily totals, the number of days seen, and running sums over
+    the last 7 and 30 days. Closing a day writes one slot and adjusts the
+    sums, so updates are O(1) and the feature vector for the next day is
+    served straight from the arrays.
+
+    Definitions (shared with `materialize`, which training uses):
+        waste_lag_k       total k days before the target day, 0 if unknown
+        waste_rolling_w   mean of the last min(w, days seen) totals, 0 if none
+
+    The current day is never part of its own features.
+    """
+
+    HISTORY = max(max(LAGS), max(WINDOWS))
+
+    def __init__(self, capacity=64):
+        self._rows = {}                       # bin_id -> row
+        self._lock = threading.Lock()
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self._ring = np.zeros((capacity, self.HISTORY))
+        self._head = np.zeros(capacity, dtype=np.int64)    # next slot to write
+        self._count = np.zeros(capacity, dtype=np.int64)   # days seen
+        self._sums = np.zeros((capacity, len(WINDOWS)))
+        self._last_day = np.full(capacity, -1, dtype=np.int64)
+        self._open_day = np.full(capacity, -1, dtype=np.int64)
+        self._open_total = np.zeros(capacity)
+        self._last_weight = np.full(capacity, np.nan)
+
+    def _grow(self):
+        old = (self._ring, self._head, self._count, self._sums, self._last_day,
+               self._open_day, self._open_total, self._last_weight)
+        self._allocate(2 * len(self._head))
+        new = (self._ring, self._head, self._count, self._sums, self._last_day,
+               self._open_day, self._open_total, self._last_weight)
+        for src, dst in zip(old, new):
+            dst[:len(src)] = src
+
+    def _row(self, bin_id):
+        row = self._rows.get(bin_id)
+        if row is None:
+            row = len(self._rows)
+            if row == len(self._head):
+                self._grow()
+            self._rows[bin_id] = row
+        return row
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, bin_id):
+        return bin_id in self._rows
+
+    # --------------------------------------------------
+    # Updates
+    # --------------------------------------------------
+    def add_daily_total(self, bin_id, day, waste_kg):
+        """
+        Record a finished day's total for a bin. Days must arrive in
+        order; skipped days count as 0 kg.
+        """
+        with self._lock:
+            self._push_day(self._row(bin_id), _day_number(day), float(waste_kg))
+
+    def add_reading(self, bin_id, timestamp, weight_kg):
+        """
+        Feed a BinReading-style weight sample. Weight gained since the
+        previous sample is added to that day's total (a drop is a
+        collection); the first reading of a new day closes the last one.
+        """
+        day = _day_number(timestamp)
+        weight = float(weight_kg)
+        with self._lock:
+            row = self._row(bin_id)
+            if self._open_day[row] != -1 and day > self._open_day[row]:
+                self._push_day(row, self._open_day[row], self._open_total[row])
+                self._open_total[row] = 0.0
+            if self._open_day[row] == -1 or day > self._open_day[row]:
+                self._open_day[row] = day
+
+            previous = self._last_weight[row]
+            if not np.isnan(previous) and weight > previous:
+                self._open_total[row] += weight - previous
+            self._last_weight[row] = weight
+
+    def close_day(self, bin_id):
+        """Close a bin's open day now instead of waiting for the next reading"""
+        with self._lock:
+            row = self._rows.get(bin_id)
+            if row is not None and self._open_day[row] != -1:
+                self._push_day(row, self._open_day[row], self._open_total[row])
+                self._open_day[row] = -1
+                self._open_total[row] = 0.0
+
+    def _push_day(self, row, day, total):
+        last = self._last_day[row]
+        if last != -1:
+            if day <= last:
+                return                      # already recorded
+            for _ in range(min(day - last - 1, self.HISTORY)):
+                self._write(row, 0.0)       # days without any data
+        self._write(row, total)
+        self._last_day[row] = day
+
+    def _write(self, row, value):
+        """Append one daily total to the ring and update the running sums"""
+        head, count = self._head[row], self._count[row]
+        for k, window in enumerate(WINDOWS):
+            if count >= window:
+                self._sums[row, k] -= self._ring[row, (head - window) % self.HISTORY]
+            self._sums[row, k] += value
+        self._ring[row, head] = value
+        self._head[row] = (head + 1) % self.HISTORY
+        self._count[row] = count + 1
+
+    # --------------------------------------------------
+    # Serving
+    # --------------------------------------------------
+    def features(self, bin_ids):
+        """
+        (len(bin_ids), 5) array of HISTORY_COLUMNS for the day after each
+        bin's last closed day; unknown bins get zeros.
+        """
+        with self._lock:
+            rows = np.array([self._rows.get(b, -1) for b in bin_ids], dtype=np.int64)
+            known = rows >= 0
+            out = np.zeros((len(rows), len(HISTORY_COLUMNS)))
+            r = rows[known]
+            head, count = self._head[r], self._count[r]
+
+            for k, lag in enumerate(LAGS):
+                value = self._ring[r, (head - lag) % self.HISTORY]
+                out[known, k] = np.where(count >= lag, value, 0.0)
+            for k, window in enumerate(WINDOWS):
+                seen = np.minimum(count, window)
+                out[known, len(LAGS) + k] = np.where(
+                    seen > 0, self._sums[r, k] / np.maximum(seen, 1), 0.0)
+            return out
+
+    def frame(self, bin_ids):
+        return pd.DataFrame(self.features(bin_ids), columns=HISTORY_COLUMNS)
+
+    # --------------------------------------------------
+    # Bulk paths
+    # --------------------------------------------------
+    @staticmethod
+    def materialize(df):
+        """
+        History features for every row of a (bin_id, date, waste_kg)
+        frame, one row per bin and day, with the same definitions as the
+        online store. Returns a DataFrame aligned with df's index.
+        """
+        ordered = df.sort_values(['bin_id', 'date'])
+        waste = ordered.groupby('bin_id', sort=False, observed=True)['waste_kg']
+        features = pd.DataFrame(index=ordered.index)
+
+        for lag in LAGS:
+            features[f'waste_lag_{lag}'] = waste.shift(lag)
+
+        previous = waste.shift(1)
+        grouped = previous.groupby(ordered['bin_id'], sort=False, observed=True)
+        for window in WINDOWS:
+            features[f'waste_rolling_{window}'] = (
+                grouped.rolling(window, min_periods=1).mean()
+                .reset_index(level=0, drop=True)
+            )
+
+        return features.fillna(0.0).loc[df.index, HISTORY_COLUMNS]
+
+    @classmethod
+    def from_history(cls, df):
+        """
+        Store warmed up with the daily totals of a (bin_id, date, waste_kg)
+        frame, one row per bin and day (as `materialize` reads them)
+        """
+        ordered = df.sort_values(['bin_id', 'date'])
+        groups = ordered.groupby('bin_id', sort=False, observed=True)
+        seen = groups.cumcount().to_numpy()
+        sizes = groups['waste_kg'].transform('size').to_numpy()
+        bin_ids = ordered['bin_id'].to_numpy()
+        waste = ordered['waste_kg'].to_numpy(dtype=np.float64)
+
+        ids, first = np.unique(bin_ids, return_index=True)
+        ids = ids[np.argsort(first)]
+        store = cls(capacity=max(len(ids), 1))
+        store._rows = {bin_id: row for row, bin_id in enumerate(ids.tolist())}
+        rows = np.repeat(np.arange(len(ids)), groups.size().to_numpy())
+
+        keep = seen >= sizes - cls.HISTORY       # last HISTORY days per bin
+        store._ring[rows[keep], seen[keep] % cls.HISTORY] = waste[keep]
+        counts = groups.size().to_numpy()
+        store._count[:len(ids)] = counts
+        store._head[:len(ids)] = counts % cls.HISTORY
+        for k, window in enumerate(WINDOWS):
+            tail = seen >= sizes - window
+            store._sums[:len(ids), k] = np.bincount(rows[tail], weights=waste[tail],
+                                                    minlength=len(ids))
+        last_dates = groups['date'].last()
+        store._last_day[:len(ids)] = [_day_number(d) for d in last_dates]
+        return store
+
+
+def _day_number(value):
+    """Ordinal day of a date / datetime / timestamp string"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, (datetime, date)):
+        return value.toordinal()
+    return pd.Timestamp(value).toordinal()
@@ -1,20 +1,104 @@
+import heapq
+import math
 import numpy as np
+from collections import deque, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict
 import sys
 import os
 
 # Ensure root directory is in path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sklearn.cluster import KMeans, MiniBatchKMeans
+
+from config import Config
 from utils.distance_calculator import DistanceCalculator
+from utils.knn_graph import KNNGraph
+from algorithms.insertion import CheapestInsertion
+from algorithms.local_search import LocalSearch
+from algorithms.solvers import run_solver
+
+# Road network of a cluster worker process (set once by the pool initializer)
+_WORKER_ROAD_NETWORK = None
+
+
+def split_dp(d0, legs, loads, capacity):
+    """
+    Prins split DP on precomputed arrays, vectorized over P giant tours
+
+    d0: (P, n) depot -> bin distances in tour order
+    legs: (P, n - 1) distances between consecutive bins
+    loads: (P, n) bin loads in tour order
+    Returns (V, pred) as described in RouteOptimizer._split_dp.
+    """
+    d0 = np.asarray(d0, dtype=np.float64)
+    legs = np.asarray(legs, dtype=np.float64)
+    P, n = d0.shape
+
+    path = np.zeros((P, n))
+    np.cumsum(legs, axis=1, out=path[:, 1:])
+    cum_load = np.zeros((P, n + 1))
+    np.cumsum(loads, axis=1, out=cum_load[:, 1:])
+
+    smallest = np.cumsum(np.sort(loads[0]))
+    k = max(1, int(np.searchsorted(smallest, capacity, side="right")))
+
+    V = np.full((P, n + 1), np.inf)
+    V[:, 0] = 0.0
+    pred = np.zeros((P, n + 1), dtype=np.int64)
+    rows = np.arange(P)
+
+    for j in range(1, n + 1):
+        starts = np.arange(j - 1, max(j - k, 0) - 1, -1)   # trip = starts..j-1
+        cost = (V[:, starts] + d0[:, starts]
+                + (path[:, j - 1:j] - path[:, starts]) + d0[:, j - 1:j])
+        overload = (cum_load[:, j:j + 1] - cum_load[:, starts]) > capacity
+        overload[:, 0] = False  # a single bin always forms a trip
+        cost[overload] = np.inf
+
+        best = np.argmin(cost, axis=1)
+        V[:, j] = cost[rows, best]
+        pred[:, j] = starts[best]
+
+    return V, pred
+
+
+def split_fitness(matrix, loads, capacity):
+    """
+    Batch optimal-split distance over a dense subproblem matrix
+    (index 0 = depot, 1+ = positions), for use without a RouteOptimizer,
+    e.g. in pool workers. loads[i] is the load of position i.
+    """
+    loads = np.asarray(loads, dtype=np.float64)
+
+    def fitness(population):
+        population = np.atleast_2d(np.asarray(population))
+        nodes = population + 1
+        V, _ = split_dp(matrix[0, nodes], matrix[nodes[:, :-1], nodes[:, 1:]],
+                        loads[population], capacity)
+        return V[:, -1]
+
+    return fitness
 
 
 class RouteOptimizer:
-    def __init__(self, bins: List[Dict], depot: Dict, truck_capacity: int = 4000):
+    def __init__(self, bins: List[Dict], depot: Dict, truck_capacity: int = 4000,
+                 matrix_dtype=np.float32, distance_cache=None,
+                 sparse: bool = False, k_neighbors: int = 16,
+                 road_network=None):
         """
         bins: List of dicts with keys:
               - location: (lat, lon)
               - predicted_waste: float (kg)
         depot: dict or tuple -> {'lat': x, 'lon': y} OR (lat, lon)
+        matrix_dtype: storage type of the distance matrix (float32 halves memory)
+        distance_cache: optional DistanceMatrixCache; the matrix is then a
+                        read-only memory map shared between processes
+        sparse: keep only a k-nearest-neighbour graph (self.graph) instead
+                of the dense matrix; distance_matrix is then None
+        road_network: optional RoadNetwork; the dense matrix then holds
+                      driving distances instead of haversine (a given
+                      distance_cache should be built with metric=road_network)
         """
         self.bins = bins
 
@@ -24,27 +108,62 @@ class RouteOptimizer:
             self.depot_coords = depot
 
         self.truck_capacity = truck_capacity
+        self.matrix_dtype = matrix_dtype
+        self.distance_cache = distance_cache
+        self.road_network = road_network
         self.distance_calc = DistanceCalculator()
-        self.distance_matrix = self._create_distance_matrix()
+        self.sparse = sparse
+
+        if sparse:
+            self.graph = KNNGraph(self._locations(), k=k_neighbors)
+            self.distance_matrix = None
+        else:
+            self.graph = None
+            self.distance_matrix = self._create_distance_matrix()
 
     # --------------------------------------------------
     # Distance Matrix
     # --------------------------------------------------
+    def _locations(self) -> np.ndarray:
+        """(n + 1, 2) array of (lat, lon): index 0 = Depot, Index 1+ = Bins"""
+        locations = np.empty((len(self.bins) + 1, 2), dtype=np.float64)
+        locations[0] = self.depot_coords
+        for i, b in enumerate(self.bins, start=1):
+            locations[i] = b["location"]
+        return locations
+
     def _create_distance_matrix(self):
         """Index 0 = Depot, Index 1+ = Bins"""
-        locations = [self.depot_coords] + [b["location"] for b in self.bins]
-        n = len(locations)
-        matrix = np.zeros((n, n))
+        if self.distance_cache is not None:
+            return self.distance_cache.get(self._locations())
 
-        for i in range(n):
-            for j in range(i + 1, n):
-                dist = self.distance_calc.haversine(
-                    locations[i][0], locations[i][1],
-                    locations[j][0], locations[j][1]
-                )
-                matrix[i][j] = matrix[j][i] = dist
+        if self.road_network is not None:
+            return self.road_network.matrix(self._locations(), dtype=self.matrix_dtype)
 
-        return matrix
+        return self.distance_calc.haversine_matrix(
+            self._locations(), dtype=self.matrix_dtype
+        )
+
+    def subproblem(self, bin_indices: List[int]):
+        """
+        Distance function and matrix for solving over a subset of bins
+
+        Solvers then work with positions 0..len(bin_indices) - 1; map their
+        output back with `[bin_indices[i] for i in route]`. In sparse mode a
+        KNNGraph over the subset is returned instead of a dense matrix.
+        """
+        bin_indices = list(bin_indices)
+
+        def distance_func(route):
+            return self.calculate_route_distance([bin_indices[i] for i in route])
+
+        nodes = np.asarray([0] + [i + 1 for i in bin_indices], dtype=np.int64)
+        if self.distance_matrix is None:
+            matrix = KNNGraph(self.graph.coords[nodes], k=self.graph.k)
+        else:
+            matrix = np.asarray(self.distance_matrix)[np.ix_(nodes, nodes)]
+
+        return distance_func, matrix
 
     # --------------------------------------------------
     # Distance Calculation
@@ -54,51 +173,110 @@ class RouteOptimizer:
         if not route_indices:
             return 0.0
 
-        total_distance = 0.0
-        current_idx = 0  # Depot
+        # Depot -> bins -> depot
+        nodes = np.empty(len(route_indices) + 2, dtype=np.int64)
+        nodes[0] = nodes[-1] = 0
+        nodes[1:-1] = np.asarray(route_indices) + 1
 
-        for idx in route_indices:
-            matrix_idx = idx + 1
-            total_distance += self.distance_matrix[current_idx][matrix_idx]
-            current_idx = matrix_idx
+        if self.distance_matrix is None:
+            return self.graph.path_length(nodes)
 
-        # Return to depot
-        total_distance += self.distance_matrix[current_idx][0]
-        return total_distance
+        # Summed in float64 even when the matrix is stored as float32
+        legs = np.asarray(self.distance_matrix)[nodes[:-1], nodes[1:]]
+        return float(legs.sum(dtype=np.float64))
 
     # --------------------------------------------------
     # Route Metrics
     # --------------------------------------------------
     def calculate_route_metrics(self, route: List[int]) -> Dict:
-        distance = self.calculate_route_distance(route)
-        total_waste = sum(self.bins[i].get("predicted_waste", 0) for i in route)
+        scores = self.score_routes(self.pad_routes([route]))
+        return self._rounded_metrics(scores, 0)
 
-        # Bhubaneswar assumptions
-        travel_time = distance / 25              # km/h
-        service_time = len(route) * (8 / 60)      # 8 minutes per bin
-        total_time = travel_time + service_time
+    @staticmethod
+    def pad_routes(routes, length: int = None) -> np.ndarray:
+        """
+        Routes as a padded index array for score_routes: a list of routes
+        gives (R, L), a list of route sets (candidate plans) gives
+        (P, R, L); unused slots are -1.
+        """
+        if any(len(r) and np.ndim(r[0]) for r in routes):
+            trucks = max(len(plan) for plan in routes)
+            length = length or max((len(r) for plan in routes for r in plan), default=0)
+            padded = np.full((len(routes), trucks, length), -1, dtype=np.int64)
+            for p, plan in enumerate(routes):
+                for t, route in enumerate(plan):
+                    padded[p, t, :len(route)] = route
+            return padded
+
+        length = length or max((len(r) for r in routes), default=0)
+        padded = np.full((len(routes), length), -1, dtype=np.int64)
+        for t, route in enumerate(routes):
+            padded[t, :len(route)] = route
+        return padded
+
+    def score_routes(self, routes) -> Dict[str, np.ndarray]:
+        """
+        Vectorized route metrics for many routes / candidate plans at once
+
+        routes: int array (..., L) of bin indices, left-aligned and padded
+                with -1 (see pad_routes), e.g. (plans, trucks, stops)
+        Returns float arrays of shape routes.shape[:-1] (one value per
+        route, unrounded) with the same formulas and Config.ROUTE_METRICS
+        constants as calculate_route_metrics. Sum over the last axis for
+        plan totals.
+        """
+        routes = np.asarray(routes, dtype=np.int64)
+        valid = routes >= 0
+        nodes = np.where(valid, routes + 1, 0)
+
+        # depot -> stops -> depot; padding maps to the depot (0 -> 0 = 0 km)
+        depot = np.zeros(routes.shape[:-1] + (1,), dtype=np.int64)
+        path = np.concatenate([depot, nodes, depot], axis=-1)
+        if self.distance_matrix is None:
+            legs = self.graph.distances(path[..., :-1], path[..., 1:])
+        else:
+            legs = np.asarray(self.distance_matrix)[path[..., :-1], path[..., 1:]]
+        distance = legs.sum(axis=-1, dtype=np.float64)
+
+        bins_visited = valid.sum(axis=-1)
+        waste = np.where(valid, self._bin_loads()[np.where(valid, routes, 0)], 0.0).sum(axis=-1)
 
-        fuel_liters = distance * 0.40
-        fuel_cost = fuel_liters * 95              # INR
-        driver_cost = total_time * 200
-        total_cost = fuel_cost + driver_cost
+        m = Config.ROUTE_METRICS
+        travel_time = distance / m["speed_kmh"]
+        service_time = bins_visited * (m["service_minutes_per_bin"] / 60)
+        total_time = travel_time + service_time
 
-        co2_kg = fuel_liters * 2.68
+        fuel_liters = distance * m["fuel_liters_per_km"]
+        fuel_cost = fuel_liters * m["fuel_cost_per_liter"]
+        driver_cost = total_time * m["driver_cost_per_hour"]
 
         return {
-            "distance_km": round(distance, 2),
-            "time_hours": round(total_time, 2),
-            "waste_kg": round(total_waste, 2),
-            "fuel_liters": round(fuel_liters, 2),
-            "total_cost": round(total_cost, 2),
-            "co2_kg": round(co2_kg, 2),
-            "bins_visited": len(route)
+            "distance_km": distance,
+            "time_hours": total_time,
+            "waste_kg": waste,
+            "fuel_liters": fuel_liters,
+            "total_cost": fuel_cost + driver_cost,
+            "co2_kg": fuel_liters * m["co2_kg_per_liter"],
+            "bins_visited": bins_visited
         }
 
+    @staticmethod
+    def _rounded_metrics(scores: Dict[str, np.ndarray], index) -> Dict:
+        """One route's metrics dict from score_routes output"""
+        metrics = {key: round(float(values[index]), 2) for key, values in scores.items()}
+        metrics["bins_visited"] = int(scores["bins_visited"][index])
+        return metrics
+
     # --------------------------------------------------
     # Capacity-Based Route Splitting
     # --------------------------------------------------
     def create_routes(self, sequence: List[int]) -> List[List[int]]:
+        """Cut an ordered sequence into trips with the optimal split"""
+        routes, _ = self.split_routes(sequence)
+        return routes
+
+    def create_routes_greedy(self, sequence: List[int]) -> List[List[int]]:
+        """Start a new trip whenever the next bin would overflow the truck"""
         routes = []
         current_route = []
         current_load = 0
@@ -120,6 +298,76 @@ class RouteOptimizer:
 
         return routes
 
+    def _bin_loads(self) -> np.ndarray:
+        return np.array([b.get("predicted_waste", 0) for b in self.bins], dtype=np.float64)
+
+    def _split_dp(self, bins: np.ndarray, loads: np.ndarray):
+        """
+        Prins split: shortest path over the giant tour(s) in `bins`
+
+        bins is (P, n): P giant tours of bin indices. Trip (i..j-1) costs
+        depot->bin_i + path(i..j-1) + bin_{j-1}->depot, computed from prefix
+        sums of leg distances and loads. Only trips of at most k bins are
+        considered, where k is the most bins any truckload can hold, so the
+        DP is O(n·k) with every step vectorized over the P tours.
+        Returns (V, pred): V[:, j] is the best cost of serving the first j
+        bins and pred[:, j] where the last trip starts.
+        """
+        nodes = bins + 1
+        depot = np.zeros_like(nodes)
+
+        if self.distance_matrix is None:
+            d0 = self.graph.distances(depot, nodes)
+            legs = self.graph.distances(nodes[:, :-1], nodes[:, 1:])
+        else:
+            D = np.asarray(self.distance_matrix)
+            d0 = D[depot, nodes]
+            legs = D[nodes[:, :-1], nodes[:, 1:]]
+
+        return split_dp(d0, legs, loads[bins], self.truck_capacity)
+
+    def split_routes(self, sequence: List[int]):
+        """
+        Optimal capacity split of a giant tour, returns (routes, total_km)
+        Never worse than greedy cutting of the same order.
+        """
+        sequence = [int(i) for i in sequence]
+        if not sequence:
+            return [], 0.0
+
+        V, pred = self._split_dp(np.array([sequence]), self._bin_loads())
+
+        routes = []
+        j = len(sequence)
+        while j > 0:
+            i = int(pred[0, j])
+            routes.append(sequence[i:j])
+            j = i
+        routes.reverse()
+
+        return routes, float(V[0, -1])
+
+    def split_distance(self, sequence: List[int]) -> float:
+        """Total multi-trip distance of `sequence` after the optimal split"""
+        return self.split_routes(sequence)[1]
+
+    def split_objective(self, bin_indices: List[int]):
+        """
+        Batch fitness over a bin subset: maps a (P, n) array of positions
+        within bin_indices to the optimal-split distance of every row.
+        Pass it as GeneticAlgorithm(fitness_func=...) so the GA optimizes
+        the real multi-trip cost rather than a single closed tour.
+        """
+        bin_indices = np.asarray(list(bin_indices), dtype=np.int64)
+        loads = self._bin_loads()
+
+        def fitness(population):
+            population = np.atleast_2d(np.asarray(population))
+            V, _ = self._split_dp(bin_indices[population], loads)
+            return V[:, -1]
+
+        return fitness
+
     # --------------------------------------------------
     # Aggregate Metrics
     # --------------------------------------------------
@@ -135,13 +383,30 @@ class RouteOptimizer:
             "num_routes": len(routes)
         }
 
-        for r in routes:
-            metrics = self.calculate_route_metrics(r)
-            for key in metrics:
-                summary[key] += metrics[key]
+        if routes:
+            scores = self.score_routes(self.pad_routes(routes))
+            for key, values in scores.items():
+                if key == "bins_visited":
+                    summary[key] = int(values.sum())
+                else:
+                    # Per-route values are rounded first, as in calculate_route_metrics
+                    summary[key] = float(np.round(values, 2).sum())
 
         return {k: round(v, 2) for k, v in summary.items()}
 
+    def score_plans(self, plans) -> Dict[str, np.ndarray]:
+        """
+        Totals per candidate plan (a list of route sets, or a padded
+        (P, R, L) array): one array of length P per metric
+        """
+        padded = plans if isinstance(plans, np.ndarray) else self.pad_routes(plans)
+        if padded.ndim == 2:
+            padded = padded[None]
+        scores = self.score_routes(padded)
+        totals = {key: values.sum(axis=-1) for key, values in scores.items()}
+        totals["num_routes"] = (padded >= 0).any(axis=-1).sum(axis=-1)
+        return totals
+
     # --------------------------------------------------
     # FIXED / TRADITIONAL ROUTE (Baseline)
     # --------------------------------------------------
@@ -150,7 +415,7 @@ class RouteOptimizer:
         Traditional waste collection (no AI optimization)
         """
         fixed_sequence = list(range(len(self.bins)))
-        routes = self.create_routes(fixed_sequence)
+        routes = self.create_routes_greedy(fixed_sequence)
         summary = self._aggregate_route_metrics(routes)
 
         return {
@@ -181,3 +446,290 @@ class RouteOptimizer:
             "routes": routes,
             "metrics": summary
         }
+
+    # --------------------------------------------------
+    # CLARKE-WRIGHT SAVINGS (Capacitated VRP)
+    # --------------------------------------------------
+    def _savings_candidates(self, bin_indices: List[int], candidates: int):
+        """
+        Savings s(i, j) = d(0, i) + d(0, j) - d(i, j) between each bin and its
+        `candidates` nearest bins, as heap-ready (-saving, i, j) tuples over
+        positions in bin_indices (i < j), largest saving first
+        """
+        _, matrix = self.subproblem(bin_indices)
+        n = len(bin_indices)
+
+        if isinstance(matrix, KNNGraph):
+            d0 = matrix.distances(np.zeros(n, dtype=np.int64), np.arange(1, n + 1))
+            nbrs = matrix.neighbors[1:]
+            valid = nbrs > 0  # drop the depot from candidate partners
+            rows = np.repeat(np.arange(n), nbrs.shape[1])[valid.ravel()]
+            cols = nbrs[valid] - 1
+            savings = d0[rows] + d0[cols] - matrix.neighbor_dist[1:][valid]
+        else:
+            k = min(candidates, n - 1)
+            d0 = np.asarray(matrix[0, 1:], dtype=np.float64)
+            row_blocks, col_blocks, saving_blocks = [], [], []
+            block = max(1, 2_000_000 // n)
+            for start in range(0, n, block):
+                end = min(start + block, n)
+                dist = np.array(matrix[start + 1:end + 1, 1:], dtype=np.float64)
+                dist[np.arange(end - start), np.arange(start, end)] = np.inf
+                nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+                row_blocks.append(np.repeat(np.arange(start, end), k))
+                col_blocks.append(nearest.ravel())
+                saving_blocks.append((d0[start:end, None] + d0[nearest]
+                                      - np.take_along_axis(dist, nearest, axis=1)).ravel())
+            rows = np.concatenate(row_blocks)
+            cols = np.concatenate(col_blocks)
+            savings = np.concatenate(saving_blocks)
+
+        keep = savings > 0
+        i = np.minimum(rows, cols)[keep]
+        j = np.maximum(rows, cols)[keep]
+        pairs = np.unique(np.stack([i, j], axis=1), axis=0, return_index=True)[1]
+        order = pairs[np.argsort(-savings[keep][pairs], kind="stable")]
+
+        return list(zip((-savings[keep][order]).tolist(), i[order].tolist(), j[order].tolist()))
+
+    def clarke_wright_routes(self, bin_indices: List[int] = None,
+                             candidates: int = 40) -> List[List[int]]:
+        """
+        Clarke-Wright parallel savings construction
+
+        Starts with one depot->bin->depot trip per bin and repeatedly merges
+        the two trips joined by the largest remaining saving, as long as the
+        bins are trip endpoints and the merged load fits truck_capacity.
+        Savings are computed vectorized for each bin's `candidates` nearest
+        neighbours (a granular savings list) and consumed from a heap.
+        """
+        if bin_indices is None:
+            bin_indices = list(range(len(self.bins)))
+        bin_indices = [int(b) for b in bin_indices]
+        n = len(bin_indices)
+        if n < 2:
+            return [bin_indices] if bin_indices else []
+
+        loads = self._bin_loads()[bin_indices]
+        routes = {r: deque([r]) for r in range(n)}
+        route_load = {r: float(loads[r]) for r in range(n)}
+        route_of = list(range(n))
+
+        heap = self._savings_candidates(bin_indices, candidates)
+        heapq.heapify(heap)
+
+        while heap:
+            _, i, j = heapq.heappop(heap)
+            a, b = route_of[i], route_of[j]
+            if a == b or route_load[a] + route_load[b] > self.truck_capacity:
+                continue
+
+            A, B = routes[a], routes[b]
+            if i not in (A[0], A[-1]) or j not in (B[0], B[-1]):
+                continue
+
+            # Merge the shorter trip into the longer one
+            if len(A) < len(B):
+                a, b, A, B, i, j = b, a, B, A, j, i
+
+            if i == A[-1]:
+                A.extend(B if j == B[0] else reversed(B))
+            else:
+                A.extendleft(reversed(B) if j == B[-1] else B)
+
+            for node in B:
+                route_of[node] = a
+            route_load[a] += route_load.pop(b)
+            del routes[b]
+
+        return [[bin_indices[p] for p in route] for route in routes.values()]
+
+    def savings_sequence(self, bin_indices: List[int] = None) -> List[int]:
+        """Clarke-Wright trips concatenated into one giant tour (a solver seed)"""
+        return [b for route in self.clarke_wright_routes(bin_indices) for b in route]
+
+    def optimize_savings_route(self) -> Dict:
+        """
+        Capacitated VRP construction with the Clarke-Wright savings heuristic
+        """
+        routes = self.clarke_wright_routes()
+        summary = self._aggregate_route_metrics(routes)
+
+        return {
+            "strategy": "Clarke-Wright Savings",
+            "routes": routes,
+            "metrics": summary
+        }
+
+    # --------------------------------------------------
+    # INCREMENTAL RE-PLANNING
+    # --------------------------------------------------
+    def seed_sequence(self, previous_route: List[int], bin_indices: List[int]) -> List[int]:
+        """
+        A previous visiting order adapted to a new bin set: bins no longer
+        in bin_indices (collected) are dropped and new ones are placed by
+        cheapest insertion. Returns positions within bin_indices, ready as
+        a solver seed tour.
+        """
+        bin_indices = [int(b) for b in bin_indices]
+        position = {b: i for i, b in enumerate(bin_indices)}
+        partial = [position[b] for b in previous_route if b in position]
+
+        distance_func, matrix = self.subproblem(bin_indices)
+        route, _, _ = CheapestInsertion(distance_func, len(bin_indices), matrix).optimize(partial)
+        return route
+
+    def reoptimize_route(self, previous_route: List[int], bin_indices: List[int],
+                         **local_search) -> List[int]:
+        """
+        Incremental re-plan without a full solve: seed_sequence() followed
+        by a LocalSearch repair. Returns bin indices in visiting order.
+        """
+        bin_indices = [int(b) for b in bin_indices]
+        seed = self.seed_sequence(previous_route, bin_indices)
+
+        distance_func, matrix = self.subproblem(bin_indices)
+        route, _, _ = LocalSearch(distance_func, len(bin_indices), matrix,
+                                  **local_search).optimize(seed)
+        return [bin_indices[i] for i in route]
+
+    # --------------------------------------------------
+    # HIERARCHICAL (CLUSTER-FIRST, ROUTE-SECOND)
+    # --------------------------------------------------
+    def cluster_bins(self, bin_indices: List[int] = None, by: str = "kmeans",
+                     max_cluster_bins: int = 200,
+                     trucks_per_cluster: int = 4) -> List[List[int]]:
+        """
+        Partition bins into clusters of at most max_cluster_bins bins and
+        trucks_per_cluster truckloads of predicted waste.
+
+        by="ward" starts from the bins' ward_name groups, by="kmeans" from
+        k-means on the coordinates; any group over either limit is split
+        again with k-means until every cluster fits.
+        """
+        if bin_indices is None:
+            bin_indices = list(range(len(self.bins)))
+        bin_indices = [int(b) for b in bin_indices]
+        if not bin_indices:
+            return []
+
+        coords = self._locations()[1:]
+        loads = self._bin_loads()
+        max_load = trucks_per_cluster * self.truck_capacity if trucks_per_cluster else np.inf
+
+        if by == "ward":
+            groups = defaultdict(list)
+            for b in bin_indices:
+                groups[self.bins[b].get("ward_name") or self.bins[b].get("ward")].append(b)
+            pending = list(groups.values())
+        else:
+            pending = [bin_indices]
+
+        clusters = []
+        while pending:
+            group = pending.pop()
+            load = float(loads[group].sum())
+            if len(group) <= max_cluster_bins and load <= max_load:
+                clusters.append(group)
+                continue
+
+            k = max(2, math.ceil(len(group) / max_cluster_bins), math.ceil(load / max_load))
+            labels = _kmeans_labels(coords[group], k)
+            parts = [[group[i] for i in np.flatnonzero(labels == c)] for c in range(k)]
+            parts = [part for part in parts if part]
+            if len(parts) == 1:
+                # Identical coordinates: split by position instead
+                parts = [group[i::k] for i in range(k)]
+            pending.extend(parts)
+
+        # Sweep order around the depot so consecutive clusters are neighbours
+        depot_lat, depot_lon = self.depot_coords
+        centers = [coords[c].mean(axis=0) for c in clusters]
+        angles = [math.atan2(lat - depot_lat, lon - depot_lon) for lat, lon in centers]
+        return [clusters[i] for i in np.argsort(angles, kind="stable")]
+
+    def clustered_routes(self, bin_indices: List[int] = None, by: str = "kmeans",
+                         solver: str = "local_search", max_cluster_bins: int = 200,
+                         trucks_per_cluster: int = 4, max_workers: int = None):
+        """
+        Cluster-first, route-second: solve every cluster's VRP in a worker
+        process (each builds only its own small distance matrix, so the
+        work is O(n · cluster size) rather than O(n²)), then stitch the
+        cluster tours in sweep order into one giant tour and re-split it
+        optimally, which lets partly filled trucks continue into the next
+        cluster. Returns (routes, clusters).
+
+        solver: "local_search" (nearest neighbour + 2-opt / Or-opt),
+                "savings" (Clarke-Wright + local search), "genetic"
+                (seeded with the nearest-neighbour tour) or any other
+                key of algorithms.solvers
+        """
+        clusters = self.cluster_bins(bin_indices, by, max_cluster_bins, trucks_per_cluster)
+        tasks = [([self.bins[b] for b in cluster], self.depot_coords,
+                  self.truck_capacity, solver) for cluster in clusters]
+
+        workers = max_workers or min(len(tasks), os.cpu_count() or 1)
+        if workers <= 1 or len(tasks) <= 1:
+            orders = [_solve_cluster(*task, road_network=self.road_network) for task in tasks]
+        else:
+            # The road network goes to each worker once, not with every task
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_cluster_worker,
+                                     initargs=(self.road_network,)) as pool:
+                orders = list(pool.map(_solve_cluster, *zip(*tasks)))
+
+        sequence = [cluster[i] for cluster, order in zip(clusters, orders) for i in order]
+        return self.create_routes(sequence), clusters
+
+    def optimize_clustered_route(self, by: str = "kmeans", **options) -> Dict:
+        """
+        Hierarchical strategy for city-scale instances (see clustered_routes)
+        """
+        routes, clusters = self.clustered_routes(by=by, **options)
+        summary = self._aggregate_route_metrics(routes)
+
+        return {
+            "strategy": "Cluster-First Route-Second",
+            "routes": routes,
+            "metrics": summary,
+            "clusters": len(clusters)
+        }
+
+
+def _kmeans_labels(coords: np.ndarray, k: int) -> np.ndarray:
+    """k-means cluster label per (lat, lon) row"""
+    if len(coords) > 10000:
+        model = MiniBatchKMeans(n_clusters=k, n_init=3, random_state=0,
+                                batch_size=4096)
+    else:
+        model = KMeans(n_clusters=k, n_init=3, random_state=0)
+    return model.fit_predict(coords)
+
+
+def _init_cluster_worker(road_network):
+    global _WORKER_ROAD_NETWORK
+    if road_network is not None:
+        # The clusters already use every worker: no nested Dijkstra pools
+        road_network.max_workers = 1
+    _WORKER_ROAD_NETWORK = road_network
+
+
+def _solve_cluster(bins: List[Dict], depot, truck_capacity: float,
+                   solver: str, road_network=None) -> List[int]:
+    """Pool task: visiting order (positions in `bins`) of one cluster"""
+    road_network = road_network or _WORKER_ROAD_NETWORK
+    optimizer = RouteOptimizer(bins, depot, truck_capacity, road_network=road_network)
+    bin_indices = list(range(len(bins)))
+    distance_func, matrix = optimizer.subproblem(bin_indices)
+
+    seed = None
+    options = {}
+    if solver == "savings":
+        # Clarke-Wright tour, then the local-search post-pass
+        seed, solver = optimizer.savings_sequence(bin_indices), "local_search"
+    elif solver == "genetic":
+        seed, _ = run_solver("nearest_neighbor", distance_func, len(bins), matrix)
+        options["fitness_func"] = optimizer.split_objective(bin_indices)
+
+    order, _ = run_solver(solver, distance_func, len(bins), matrix,
+                          seed_route=seed, **options)
+    return order
@@ -1,64 +1,70 @@
+import hashlib
+import json
+
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import GradientBoostingRegressor
+import sklearn
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from config import Config
+
+from models.data_generator import GENERATOR_VERSION, SyntheticWasteGenerator
+from models.feature_store import FEATURE_VERSION, HISTORY_COLUMNS, FeatureStore
+
+FEATURE_COLUMNS = [
+    'day_of_week', 'is_weekend', 'month',
+    'bin_type_residential', 'bin_type_commercial', 'bin_type_industrial',
+    'waste_lag_1', 'waste_lag_7', 'waste_lag_14',
+    'waste_rolling_7', 'waste_rolling_30'
+]
+
+# Regressor backends: name -> (estimator class, default parameters)
+MODEL_BACKENDS = {
+    # Exact split search, single-threaded: fine for the demo-sized data set
+    'gradient_boosting': (GradientBoostingRegressor, {
+        'n_estimators': 200,
+        'learning_rate': 0.1,
+        'max_depth': 5,
+        'random_state': 42
+    }),
+    # Binned features, multi-core (OpenMP): for millions of rows
+    'hist_gradient_boosting': (HistGradientBoostingRegressor, {
+        'max_iter': 200,
+        'learning_rate': 0.1,
+        'max_leaf_nodes': 31,
+        'early_stopping': False,
+        'random_state': 42
+    }),
+}
+
 
 class WastePredictor:
-    def __init__(self):
-        self.model = GradientBoostingRegressor(
-            n_estimators=200,
-            learning_rate=0.1,
-            max_depth=5,
-            random_state=42
-        )
+    def __init__(self, backend=None, params=None):
+        """
+        backend: key of MODEL_BACKENDS (default Config.WASTE_MODEL['backend'])
+        params: overrides of the backend's default parameters
+        """
+        settings = Config.WASTE_MODEL
+        self.backend = backend or settings['backend']
+        if self.backend not in MODEL_BACKENDS:
+            raise ValueError(f"unknown model backend: {self.backend}")
+
+        estimator, defaults = MODEL_BACKENDS[self.backend]
+        if params is None and backend is None:
+            params = settings.get('params')
+        self.model = estimator(**dict(defaults, **(params or {})))
         self.scaler = StandardScaler()
         self.is_trained = False
+        self.training_info = {}
 
     # -----------------------------------
     # Generate Synthetic Training Data
     # -----------------------------------
     def generate_training_data(self, n_bins=50, days=365):
-        np.random.seed(42)
-        data = []
-        start_date = datetime.now() - timedelta(days=days)
-
-        for bin_id in range(n_bins):
-            base_waste = np.random.uniform(50, 200)
-            weekend_factor = np.random.uniform(1.1, 1.4)
-
-            bin_type = np.random.choice(['residential', 'commercial', 'industrial'])
-            type_multiplier = {
-                'residential': 1.0,
-                'commercial': 1.5,
-                'industrial': 2.0
-            }[bin_type]
-
-            for day in range(days):
-                date = start_date + timedelta(days=day)
-                day_of_week = date.weekday()
-                is_weekend = 1 if day_of_week >= 5 else 0
-                month = date.month
-
-                seasonal = 1 + 0.3 * np.sin(2 * np.pi * month / 12)
-                weekly = weekend_factor if is_weekend else 1.0
-                noise = np.random.normal(1, 0.15)
-
-                waste = base_waste * type_multiplier * seasonal * weekly * noise
-                waste = max(0, waste)
-
-                data.append({
-                    'bin_id': bin_id,
-                    'date': date,
-                    'day_of_week': day_of_week,
-                    'is_weekend': is_weekend,
-                    'month': month,
-                    'bin_type': bin_type,
-                    'waste_kg': waste
-                })
-
-        return pd.DataFrame(data)
+        return SyntheticWasteGenerator(n_bins=n_bins, days=days, seed=42).frame()
 
     # -----------------------------------
     # Feature Engineering
@@ -71,39 +77,12 @@ class WastePredictor:
         features['bin_type_commercial'] = (features['bin_type'] == 'commercial').astype(int)
         features['bin_type_industrial'] = (features['bin_type'] == 'industrial').astype(int)
 
-        # Sort for lag features
+        # Lag / rolling features, defined exactly as the online FeatureStore
+        # serves them at prediction time
         features = features.sort_values(['bin_id', 'date'])
+        features[HISTORY_COLUMNS] = FeatureStore.materialize(features)
 
-        for lag in [1, 7, 14]:
-            features[f'waste_lag_{lag}'] = (
-                features.groupby('bin_id')['waste_kg'].shift(lag)
-            )
-
-        features['waste_rolling_7'] = (
-            features.groupby('bin_id')['waste_kg']
-            .rolling(7)
-            .mean()
-            .reset_index(0, drop=True)
-        )
-
-        features['waste_rolling_30'] = (
-            features.groupby('bin_id')['waste_kg']
-            .rolling(30)
-            .mean()
-            .reset_index(0, drop=True)
-        )
-
-        # ✅ FIXED (no FutureWarning)
-        features = features.bfill().fillna(0)
-
-        feature_cols = [
-            'day_of_week', 'is_weekend', 'month',
-            'bin_type_residential', 'bin_type_commercial', 'bin_type_industrial',
-            'waste_lag_1', 'waste_lag_7', 'waste_lag_14',
-            'waste_rolling_7', 'waste_rolling_30'
-        ]
-
-        return features[feature_cols], features['waste_kg']
+        return features[FEATURE_COLUMNS], features['waste_kg']
 
     # -----------------------------------
     # Train Model
@@ -124,13 +103,50 @@ class WastePredictor:
         self.model.fit(X_train_scaled, y_train)
         self.is_trained = True
 
-        return {
+        results = {
             'train_r2': self.model.score(X_train_scaled, y_train),
             'test_r2': self.model.score(X_test_scaled, y_test),
+            # Not every backend exposes impurity-based importances
             'feature_importance': dict(
-                zip(X.columns, self.model.feature_importances_)
+                zip(X.columns, getattr(self.model, 'feature_importances_', []))
             )
         }
+        self.training_info = {
+            'data_hash': self.data_hash(df),
+            'rows': len(df),
+            'train_r2': float(results['train_r2']),
+            'test_r2': float(results['test_r2'])
+        }
+        return results
+
+    # -----------------------------------
+    # Artifact metadata
+    # -----------------------------------
+    @staticmethod
+    def data_hash(df):
+        """SHA1 of a training DataFrame's contents (index ignored)"""
+        rows = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        digest = hashlib.sha1(rows.tobytes())
+        digest.update(','.join(map(str, df.columns)).encode())
+        return digest.hexdigest()
+
+    def training_spec(self):
+        """
+        Everything a saved model depends on besides the data: a stored
+        artifact whose spec differs from this one is stale.
+        """
+        spec = {
+            'estimator': type(self.model).__name__,
+            'params': {k: v for k, v in self.model.get_params().items()
+                       if isinstance(v, (int, float, str, bool, type(None)))},
+            'feature_columns': FEATURE_COLUMNS,
+            'data_generator': GENERATOR_VERSION,
+            'history_features': FEATURE_VERSION,
+            'sklearn_version': sklearn.__version__
+        }
+        spec['fingerprint'] = hashlib.sha1(
+            json.dumps(spec, sort_keys=True).encode()).hexdigest()
+        return spec
 
     # -----------------------------------
     # Predict
@@ -145,22 +161,63 @@ class WastePredictor:
 
         return self.model.predict(X_scaled)
 
-    def predict_for_bins(self, bins_info, target_date=None):
+    def inference_features(self, bin_types, target_dates, history=None):
+        """
+        Feature matrix for every (date, bin) pair, date-major, built with
+        array operations instead of the per-row prepare_features pipeline.
+
+        history: optional (n_bins, 5) HISTORY_COLUMNS array, e.g. from a
+        FeatureStore; without it the lag / rolling features are 0, as for
+        a bin with no recorded history.
+        """
+        bin_types = np.asarray(bin_types, dtype=object)
+        n_bins = len(bin_types)
+        dates = pd.DatetimeIndex(pd.to_datetime(list(target_dates)))
+
+        day_of_week = np.repeat(dates.dayofweek.to_numpy(), n_bins)
+        features = pd.DataFrame({
+            'day_of_week': day_of_week,
+            'is_weekend': (day_of_week >= 5).astype(int),
+            'month': np.repeat(dates.month.to_numpy(), n_bins),
+            'bin_type_residential': np.tile(bin_types == 'residential', len(dates)).astype(int),
+            'bin_type_commercial': np.tile(bin_types == 'commercial', len(dates)).astype(int),
+            'bin_type_industrial': np.tile(bin_types == 'industrial', len(dates)).astype(int),
+        })
+        if history is None:
+            history = np.zeros((n_bins, len(HISTORY_COLUMNS)))
+        features[HISTORY_COLUMNS] = np.tile(history, (len(dates), 1))
+
+        return features[FEATURE_COLUMNS]
+
+    def predict_batch(self, bins_info, target_dates, feature_store=None):
+        """
+        Predictions for all bins on all target dates with one
+        scaler.transform + model.predict call.
+        Returns a (len(target_dates), len(bins_info)) array in
+        bins_info order, clipped at 0.
+
+        With a FeatureStore, each bin's lag / rolling features come from
+        its recorded history (looked up by info['bin_id'], else the key).
+        """
+        if not self.is_trained:
+            self.train()
+
+        bin_types = [info['type'] for info in bins_info.values()]
+        history = None
+        if feature_store is not None:
+            history = feature_store.features(
+                [info.get('bin_id', key) for key, info in bins_info.items()])
+
+        X = self.inference_features(bin_types, target_dates, history)
+        predictions = self.model.predict(self.scaler.transform(X))
+        return np.maximum(predictions, 0).reshape(len(target_dates), len(bin_types))
+
+    def predict_for_bins(self, bins_info, target_date=None, feature_store=None):
         if target_date is None:
             target_date = datetime.now()
 
-        predictions = {}
-        for bin_id, info in bins_info.items():
-            features = {
-                'bin_id': bin_id,
-                'date': target_date,
-                'day_of_week': target_date.weekday(),
-                'is_weekend': 1 if target_date.weekday() >= 5 else 0,
-                'month': target_date.month,
-                'bin_type': info['type'],
-                'waste_kg': info.get('historical_avg', 100)
-            }
-
-            predictions[bin_id] = max(0, self.predict([features])[0])
-
-        return predictions
+        predictions = self.predict_batch(bins_info, [target_date], feature_store)[0]
+        return {
+            bin_id: float(value)
+            for bin_id, value in zip(bins_info, predictions)
+        }
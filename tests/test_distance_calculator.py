@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from utils.distance_calculator import DistanceCalculator
+
+
+@pytest.fixture
+def coords():
+    rng = np.random.default_rng(0)
+    return rng.uniform([20.1, 85.7], [20.5, 86.0], (57, 2))
+
+
+def scalar_matrix(calc, coords):
+    n = len(coords)
+    return np.array([[calc.haversine(*coords[i], *coords[j]) for j in range(n)]
+                     for i in range(n)])
+
+
+def test_float32_matrix_matches_scalar_haversine(coords):
+    calc = DistanceCalculator()
+    matrix = calc.haversine_matrix(coords)
+
+    assert matrix.dtype == np.float32
+    np.testing.assert_allclose(matrix, scalar_matrix(calc, coords), rtol=1e-5, atol=1e-4)
+    assert np.all(np.diag(matrix) == 0)
+
+
+def test_blocked_matrix_independent_of_block_size(coords):
+    calc = DistanceCalculator()
+    full = calc.haversine_matrix(coords, dtype=np.float64)
+
+    for block_size in (1, 7, 1000):
+        blocked = calc.haversine_matrix(coords, dtype=np.float64, block_size=block_size)
+        # BLAS may sum the dot products differently per block shape
+        np.testing.assert_allclose(blocked, full, rtol=0, atol=1e-6)
+
+
+@pytest.mark.parametrize("block_size", [None, 1, 5])
+def test_condensed_matches_square(coords, block_size):
+    calc = DistanceCalculator()
+    n = len(coords)
+    square = calc.haversine_matrix(coords)
+    condensed = calc.condensed_haversine(coords, block_size=block_size)
+
+    assert condensed.shape == (n * (n - 1) // 2,)
+    np.testing.assert_allclose(calc.condensed_to_square(condensed, n), square,
+                               rtol=1e-6, atol=1e-5)
+    i, j = 11, 3
+    assert condensed[calc.condensed_index(n, i, j)] == pytest.approx(square[i, j], rel=1e-6)
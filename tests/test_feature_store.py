@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.data_generator import SyntheticWasteGenerator
+from models.feature_store import HISTORY_COLUMNS, FeatureStore
+from models.waste_predictor import WastePredictor
+
+
+@pytest.fixture
+def history():
+    return SyntheticWasteGenerator(n_bins=6, days=50, seed=7,
+                                   start_date='2026-01-01').frame()
+
+
+def expected_features(history, day):
+    """prepare_features' history columns for every bin on `day`"""
+    X, _ = WastePredictor().prepare_features(history)
+    rows = history.index[history['date'] == day]
+    return X.loc[rows, HISTORY_COLUMNS].to_numpy(), history.loc[rows, 'bin_id'].tolist()
+
+
+@pytest.mark.parametrize("day_index", [1, 5, 20, 49])
+def test_online_updates_match_prepare_features(history, day_index):
+    day = pd.Timestamp('2026-01-01') + pd.Timedelta(days=day_index)
+    expected, bin_ids = expected_features(history, day)
+
+    store = FeatureStore(capacity=2)            # exercises growing too
+    for row in history[history['date'] < day].itertuples():
+        store.add_daily_total(row.bin_id, row.date, row.waste_kg)
+
+    np.testing.assert_allclose(store.features(bin_ids), expected, rtol=1e-9, atol=1e-9)
+
+
+def test_from_history_matches_prepare_features(history):
+    day = history['date'].max()
+    expected, bin_ids = expected_features(history, day)
+
+    store = FeatureStore.from_history(history[history['date'] < day])
+
+    np.testing.assert_allclose(store.features(bin_ids), expected, rtol=1e-9, atol=1e-9)
+
+
+def test_readings_accumulate_daily_totals():
+    store = FeatureStore()
+    store.add_reading('BIN_001', '2026-03-01T08:00:00', 10.0)
+    store.add_reading('BIN_001', '2026-03-01T12:00:00', 25.0)    # +15
+    store.add_reading('BIN_001', '2026-03-01T18:00:00', 5.0)     # collected
+    store.add_reading('BIN_001', '2026-03-01T20:00:00', 12.0)    # +7
+    store.add_reading('BIN_001', '2026-03-02T08:00:00', 20.0)    # closes day 1
+
+    lag_1, _, _, rolling_7, _ = store.features(['BIN_001'])[0]
+    assert lag_1 == pytest.approx(22.0)
+    assert rolling_7 == pytest.approx(22.0)
+    assert store.features(['unknown']).tolist() == [[0.0] * len(HISTORY_COLUMNS)]
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from algorithms.genetic_algorithm import GeneticAlgorithm
+
+
+@pytest.mark.parametrize("operator", ["ox", "pmx"])
+def test_crossover_children_are_permutations(operator):
+    ga = GeneticAlgorithm(lambda route: 0.0, 25, crossover_operator=operator, seed=3)
+    rng = np.random.default_rng(3)
+
+    for _ in range(200):
+        p1, p2 = rng.permutation(25), rng.permutation(25)
+        for child in ga.crossover(p1, p2):
+            assert sorted(child.tolist()) == list(range(25))
+
+
+@pytest.mark.parametrize("operator", ["ox", "pmx"])
+def test_crossover_keeps_first_parent_segment(operator):
+    ga = GeneticAlgorithm(lambda route: 0.0, 10, crossover_operator=operator)
+    p1, p2 = np.arange(10), np.arange(10)[::-1].copy()
+
+    child = getattr(ga, f"_{operator}")(p1, p2, 3, 7)
+
+    assert child[3:7].tolist() == [3, 4, 5, 6]
+    assert sorted(child.tolist()) == list(range(10))
+
+
+def test_mutation_keeps_permutations():
+    ga = GeneticAlgorithm(lambda route: 0.0, 12, mutation_rate=1.0, seed=0)
+    population = np.array([np.random.default_rng(i).permutation(12) for i in range(50)])
+
+    mutated = ga.mutate(population.copy())
+
+    assert all(sorted(row.tolist()) == list(range(12)) for row in mutated)
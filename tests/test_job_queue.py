@@ -0,0 +1,120 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from utils.job_queue import (CANCELLED, DONE, INTERRUPTED, QUEUED, RUNNING,
+                             JobQueue)
+
+
+def blocking_task(started, release):
+    def task(progress_callback):
+        started.set()
+        release.wait(5)
+        return 'finished'
+    return task
+
+
+def cancellable_task(started):
+    def task(progress_callback):
+        started.set()
+        step = 0
+        while not progress_callback({'step': step}):
+            step += 1
+        return {'steps': step}
+    return task
+
+
+def wait_finished(queue, job_id):
+    version = -1
+    for _ in range(100):
+        version, state = queue.wait(job_id, version, timeout=0.1)
+        if state['status'] not in (QUEUED, RUNNING):
+            return state
+    raise AssertionError('job did not finish')
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(max_workers=1, db_path=str(tmp_path / 'jobs.db'))
+    yield queue
+    queue.shutdown(wait=True)
+
+
+def test_job_runs_to_done(queue):
+    job = queue.submit('test', lambda progress_callback, x: x * 2, x=21)
+
+    state = wait_finished(queue, job.id)
+
+    assert state['status'] == DONE
+    assert state['result'] == 42
+
+
+def test_cancel_queued_job_never_starts(queue):
+    started, release = threading.Event(), threading.Event()
+    running = queue.submit('test', blocking_task(started, release))
+    started.wait(5)
+    waiting = queue.submit('test', lambda progress_callback: 'ran')
+
+    assert queue.get(waiting.id)['status'] == QUEUED
+    assert queue.cancel(waiting.id)
+    release.set()
+
+    assert wait_finished(queue, waiting.id)['status'] == CANCELLED
+    assert wait_finished(queue, running.id)['status'] == DONE
+    assert queue.get(waiting.id)['result'] is None
+
+
+def test_cancel_running_job_stops_at_next_progress(queue):
+    started = threading.Event()
+    job = queue.submit('test', cancellable_task(started))
+    started.wait(5)
+
+    assert queue.cancel(job.id)
+    state = wait_finished(queue, job.id)
+
+    assert state['status'] == CANCELLED
+    assert state['progress'] is not None
+    assert not queue.cancel(job.id)            # already finished
+
+
+def test_finished_jobs_are_readable_from_sqlite(queue, tmp_path):
+    job = queue.submit('test', lambda progress_callback: [1, 2])
+    wait_finished(queue, job.id)
+
+    other = JobQueue(db_path=str(tmp_path / 'jobs.db'))
+    try:
+        # The mirror is written right after waiters are woken
+        for _ in range(100):
+            if other.get(job.id)['status'] == DONE:
+                break
+            time.sleep(0.01)
+        assert other.get(job.id)['result'] == [1, 2]
+    finally:
+        other.shutdown()
+
+
+def test_only_jobs_of_a_gone_owner_are_interrupted(queue, tmp_path):
+    db_path = str(tmp_path / 'jobs.db')
+    started, release = threading.Event(), threading.Event()
+    live = queue.submit('test', blocking_task(started, release))
+    started.wait(5)
+
+    # A second process's queue dies with one job still running
+    dead = JobQueue(max_workers=1, db_path=db_path)
+    orphan_started = threading.Event()
+    orphan = dead.submit('test', blocking_task(orphan_started, release))
+    orphan_started.wait(5)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('DELETE FROM job_owners WHERE owner = ?', (dead.owner,))
+
+    restarted = JobQueue(db_path=db_path)
+    try:
+        assert restarted.get(orphan.id)['status'] == INTERRUPTED
+        assert restarted.get(live.id)['status'] == RUNNING
+    finally:
+        release.set()
+        restarted.shutdown()
+        dead.shutdown(wait=True)
+    assert wait_finished(queue, live.id)['status'] == DONE
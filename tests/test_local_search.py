@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from algorithms.local_search import LocalSearch
+from utils.distance_calculator import symmetric_matrix
+
+
+def tour_length(matrix, route):
+    nodes = [0] + [i + 1 for i in route] + [0]
+    return float(sum(matrix[a, b] for a, b in zip(nodes, nodes[1:])))
+
+
+@pytest.fixture
+def matrix():
+    rng = np.random.default_rng(1)
+    points = rng.uniform(0, 10, (41, 2))
+    return np.sqrt(((points[:, None] - points[None]) ** 2).sum(-1))
+
+
+def test_local_search_delta_cost_matches_recomputation(matrix):
+    n = len(matrix) - 1
+    search = LocalSearch(lambda r: tour_length(matrix, r), n, matrix)
+
+    route, cost, history = search.optimize(list(np.random.default_rng(2).permutation(n)))
+
+    assert sorted(route) == list(range(n))
+    assert cost == pytest.approx(tour_length(matrix, route))
+    # The last history entry is the cost accumulated from move deltas
+    assert history[-1] == pytest.approx(cost, rel=1e-9)
+
+
+def test_one_way_matrix_is_scored_symmetrized(matrix):
+    n = len(matrix) - 1
+    rng = np.random.default_rng(5)
+    directed = matrix * rng.uniform(1.0, 1.5, matrix.shape)
+    search = LocalSearch(lambda r: tour_length(directed, r), n, directed)
+
+    route, cost, history = search.optimize()
+
+    assert cost == pytest.approx(tour_length(directed, route))
+    assert history[-1] == pytest.approx(tour_length(symmetric_matrix(directed), route), rel=1e-9)
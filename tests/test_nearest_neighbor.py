@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from algorithms.nearest_neighbor import NearestNeighbor
+from algorithms.solvers import run_solver
+
+
+def tour_length(matrix, route):
+    nodes = [0] + [i + 1 for i in route] + [0]
+    return float(sum(matrix[a, b] for a, b in zip(nodes, nodes[1:])))
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_multi_start_is_never_worse_than_plain_nearest_neighbor(seed):
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0, 10, (int(rng.integers(3, 60)), 2))
+    matrix = np.sqrt(((points[:, None] - points[None]) ** 2).sum(-1))
+    n = len(matrix) - 1
+
+    def distance(route):
+        return tour_length(matrix, route)
+
+    _, plain, _ = NearestNeighbor(distance, n, matrix).optimize()
+    route, algo = run_solver('nearest_neighbor_multi', distance, n, matrix,
+                             starts=6, seed=seed)
+
+    assert sorted(route) == list(range(n))
+    assert distance(route) <= plain + 1e-9
+    assert algo.evaluations > 0
@@ -0,0 +1,69 @@
+import pytest
+
+from utils import route_cache
+from utils.route_cache import RouteCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(route_cache, "time", clock)
+    return clock
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = RouteCache(max_entries=4, ttl=10)
+    cache.put("a", {"distance": 1})
+
+    clock.now += 9.9
+    assert cache.get("a") == {"distance": 1}
+    clock.now += 0.1
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = RouteCache(max_entries=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")              # b is now the least recently used
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_values_are_copied(clock):
+    cache = RouteCache()
+    value = {"routes": [[1, 2]]}
+    cache.put("k", value)
+    value["routes"].append([3])
+
+    cached = cache.get("k")
+    cached["routes"].clear()
+    assert cache.get("k") == {"routes": [[1, 2]]}
+
+
+def test_invalidate_drops_everything(clock):
+    cache = RouteCache()
+    cache.put("a", 1)
+    cache.invalidate()
+
+    assert cache.get("a") is None
+    assert cache.invalidations == 1
+
+
+def test_key_ignores_argument_order():
+    assert RouteCache.key(a=1, b=[2, 3]) == RouteCache.key(b=[2, 3], a=1)
+    assert RouteCache.key(a=1) != RouteCache.key(a=2)
@@ -0,0 +1,70 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from models.route_optimizer import RouteOptimizer
+from utils.road_network import RoadNetwork
+
+
+def brute_force_split(optimizer, sequence):
+    """Cheapest cut of the giant tour into capacity-feasible trips"""
+    D = np.asarray(optimizer.distance_matrix, dtype=np.float64)
+    loads = optimizer._bin_loads()
+    n = len(sequence)
+    best = np.inf
+    for cuts in itertools.product((False, True), repeat=n - 1):
+        trips, start = [], 0
+        for k, cut in enumerate(cuts, start=1):
+            if cut:
+                trips.append(sequence[start:k])
+                start = k
+        trips.append(sequence[start:])
+
+        if any(len(t) > 1 and loads[t].sum() > optimizer.truck_capacity for t in trips):
+            continue
+        cost = 0.0
+        for trip in trips:
+            nodes = [0] + [b + 1 for b in trip] + [0]
+            cost += sum(D[a, b] for a, b in zip(nodes, nodes[1:]))
+        best = min(best, cost)
+    return best
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_split_is_optimal_on_small_instances(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(2, 9))
+    bins = [{'location': tuple(rng.uniform([20.2, 85.8], [20.4, 86.0])),
+             'predicted_waste': float(rng.uniform(100, 900))} for _ in range(n)]
+    optimizer = RouteOptimizer(bins, (20.3, 85.9), truck_capacity=1500,
+                               matrix_dtype=np.float64)
+    sequence = [int(i) for i in rng.permutation(n)]
+
+    routes, total = optimizer.split_routes(sequence)
+
+    assert total == pytest.approx(brute_force_split(optimizer, sequence), rel=1e-9)
+    assert [b for trip in routes for b in trip] == sequence
+    loads = optimizer._bin_loads()
+    assert all(len(t) == 1 or loads[t].sum() <= 1500 for t in routes)
+
+
+def test_clustered_routes_in_workers_match_in_process():
+    rng = np.random.default_rng(3)
+    grid = np.array([(20.25 + 0.01 * i, 85.78 + 0.01 * j) for i in range(12) for j in range(12)])
+    right = [(i * 12 + j, i * 12 + j + 1) for i in range(12) for j in range(11)]
+    down = [(i * 12 + j, (i + 1) * 12 + j) for i in range(11) for j in range(12)]
+    u, v = np.array(right + down).T
+    network = RoadNetwork(grid, u, v)
+    bins = [{'location': tuple(rng.uniform([20.25, 85.78], [20.36, 85.89])),
+             'predicted_waste': float(rng.uniform(100, 900))} for _ in range(40)]
+    optimizer = RouteOptimizer(bins, (20.3, 85.83), truck_capacity=3000,
+                               road_network=network)
+
+    inline, clusters = optimizer.clustered_routes(max_cluster_bins=10, max_workers=1)
+    pooled, _ = optimizer.clustered_routes(max_cluster_bins=10, max_workers=2)
+
+    assert len(clusters) >= 4
+    assert pooled == inline
+    assert sorted(b for trip in pooled for b in trip) == list(range(40))
+    assert network.max_workers is None
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from algorithms.simulated_annealing import MultiStartSimulatedAnnealing, SimulatedAnnealing
+from algorithms.solvers import run_solver
+from config import Config
+
+
+def tour_length(matrix, route):
+    nodes = [0] + [i + 1 for i in route] + [0]
+    return float(sum(matrix[a, b] for a, b in zip(nodes, nodes[1:])))
+
+
+@pytest.fixture
+def matrix():
+    rng = np.random.default_rng(1)
+    points = rng.uniform(0, 10, (41, 2))
+    return np.sqrt(((points[:, None] - points[None]) ** 2).sum(-1))
+
+
+@pytest.mark.parametrize("moves", [("swap",), ("2opt",), ("insert",), ("swap", "2opt", "insert")])
+def test_annealing_delta_cost_matches_recomputation(matrix, moves):
+    n = len(matrix) - 1
+    annealer = SimulatedAnnealing(lambda r: tour_length(matrix, r), n,
+                                  distance_matrix=matrix, max_iterations=5000,
+                                  moves=moves, history_interval=1, seed=4)
+
+    route, cost, history = annealer.optimize()
+
+    assert sorted(route) == list(range(n))
+    assert history[-1]['best_cost'] == pytest.approx(cost, rel=1e-9)
+
+
+def test_multi_start_defaults_come_from_config(matrix):
+    n = len(matrix) - 1
+    multi = MultiStartSimulatedAnnealing(lambda r: tour_length(matrix, r), n, matrix)
+
+    assert multi.chains == Config.SA_PORTFOLIO['chains']
+    assert tuple(multi.temp_factors) == tuple(Config.SA_PORTFOLIO['temp_factors'])
+
+
+def test_multi_start_solver_key_runs_chains_in_process(matrix):
+    n = len(matrix) - 1
+    entries = []
+    route, algo = run_solver('annealing_multi', lambda r: tour_length(matrix, r), n, matrix,
+                             progress_callback=lambda entry: entries.append(entry),
+                             chains=3, max_iterations=2000, seed=7)
+
+    assert sorted(route) == list(range(n))
+    assert {entry['chain'] for entry in entries} == {0, 1, 2}
+    assert algo.evaluations > 0
@@ -0,0 +1,141 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from utils.distance_calculator import DistanceCalculator
+
+
+class DistanceMatrixCache:
+    """
+    On-disk cache of depot+bin distance matrices
+
+    Each matrix is stored as a plain `.npy` file named after a hash of the
+    coordinate set and returned as a read-only memory map, so every worker
+    process shares the same pages instead of holding its own copy.
+    Files are written to a temporary name and renamed into place, which
+    keeps readers that already mapped an older file unaffected.
+
+    By default distances are haversine; pass a `metric` such as a
+    RoadNetwork (anything with matrix(), distances_from(), `fingerprint`
+    and `symmetric`) to cache driving distances instead.
+    """
+
+    def __init__(self, cache_dir, dtype=np.float32, max_entries=32, metric=None):
+        self.cache_dir = cache_dir
+        self.dtype = np.dtype(dtype)
+        self.max_entries = max_entries
+        self.metric = metric
+        self.distance_calc = DistanceCalculator()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # --------------------------------------------------
+    # Keys
+    # --------------------------------------------------
+    def key(self, coords) -> str:
+        """Stable hash of the coordinate set (order matters: it fixes the indices)"""
+        coords = np.ascontiguousarray(coords, dtype=np.float64).reshape(-1, 2)
+        digest = hashlib.sha1(coords.tobytes())
+        digest.update(self.dtype.str.encode())
+        if self.metric is not None:
+            digest.update(self.metric.fingerprint.encode())
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    # --------------------------------------------------
+    # Lookup
+    # --------------------------------------------------
+    def load(self, coords):
+        """Memory-mapped matrix for `coords`, or None when not cached"""
+        path = self.path(self.key(coords))
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode="r")
+
+    def get(self, coords):
+        """Memory-mapped matrix for `coords`, building and storing it on a miss"""
+        matrix = self.load(coords)
+        if matrix is not None:
+            return matrix
+
+        if self.metric is not None:
+            matrix = self.metric.matrix(coords, dtype=self.dtype)
+        else:
+            matrix = self.distance_calc.haversine_matrix(coords, dtype=self.dtype)
+        return self._store(self.key(coords), matrix)
+
+    # --------------------------------------------------
+    # Incremental update
+    # --------------------------------------------------
+    def move_point(self, coords, index: int, new_point):
+        """
+        Cache the matrix for `coords` with row `index` moved to `new_point`
+
+        Only that row and column are recomputed: the previous matrix is
+        copied and patched in place. Returns (new_coords, matrix).
+        """
+        new_coords = np.array(coords, dtype=np.float64).reshape(-1, 2)
+        new_coords[index] = new_point
+
+        matrix = self.load(new_coords)
+        if matrix is not None:
+            return new_coords, matrix
+
+        old_path = self.path(self.key(coords))
+        one_way = self.metric is not None and not self.metric.symmetric
+        if one_way or not os.path.exists(old_path):
+            return new_coords, self.get(new_coords)
+
+        tmp_path = self._tmp_path()
+        shutil.copyfile(old_path, tmp_path)
+
+        patched = np.lib.format.open_memmap(tmp_path, mode="r+")
+        metric = self.metric or self.distance_calc
+        row = metric.distances_from(new_point, new_coords, dtype=self.dtype)
+        row[index] = 0
+        patched[index, :] = row
+        patched[:, index] = row
+        patched.flush()
+        del patched
+
+        return new_coords, self._publish(tmp_path, self.key(new_coords))
+
+    # --------------------------------------------------
+    # Storage helpers
+    # --------------------------------------------------
+    def _tmp_path(self) -> str:
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".npy.tmp")
+        os.close(fd)
+        return tmp_path
+
+    def _store(self, key: str, matrix):
+        tmp_path = self._tmp_path()
+        with open(tmp_path, "wb") as f:
+            np.save(f, matrix)
+        return self._publish(tmp_path, key)
+
+    def _publish(self, tmp_path: str, key: str):
+        os.replace(tmp_path, self.path(key))
+        self._prune()
+        return np.load(self.path(key), mmap_mode="r")
+
+    def _prune(self):
+        """Drop the least recently written matrices beyond `max_entries`"""
+        entries = [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if name.endswith(".npy")
+        ]
+        if len(entries) <= self.max_entries:
+            return
+
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -1,9 +1,15 @@
 import math
+import numpy as np
+
+# Keep each block of the pairwise computation around this many cells
+# (~32 MB of float64 temporaries) regardless of how many points there are
+DEFAULT_BLOCK_CELLS = 4_000_000
+
 
 class DistanceCalculator:
     def __init__(self):
         self.EARTH_RADIUS_KM = 6371.0
-        
+
     def haversine(self, lat1, lon1, lat2, lon2):
         """
         Calculate the great circle distance between two points
@@ -12,15 +18,152 @@ class DistanceCalculator:
         """
         # Convert decimal degrees to radians
         lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-        
+
         # Haversine formula
         dlat = lat2 - lat1
         dlon = lon2 - lon1
         a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
         c = 2 * math.asin(math.sqrt(a))
-        
+
         return self.EARTH_RADIUS_KM * c
-    
+
+    def haversine_vector(self, lat1, lon1, lat2, lon2):
+        """
+        Element-wise haversine for NumPy arrays (decimal degrees)
+        Inputs broadcast against each other; returns kilometers
+        """
+        lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+
+        a = (np.sin((lat2 - lat1) / 2) ** 2
+             + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+
+        return 2 * self.EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    def haversine_matrix(self, coords, dtype=np.float32, block_size=None):
+        """
+        Full (n, n) distance matrix for an (n, 2) array of (lat, lon)
+
+        Rows are filled in blocks of `block_size` so the float64
+        temporaries stay bounded; the result is stored as `dtype`
+        (float32 by default, half the memory of float64).
+        """
+        points = self._unit_vectors(coords)
+        n = len(points)
+        matrix = np.empty((n, n), dtype=dtype)
+        block_size = block_size or self._block_size(n)
+
+        for start in range(0, n, block_size):
+            end = min(start + block_size, n)
+            matrix[start:end] = self._block(points[start:end], points)
+
+        np.fill_diagonal(matrix, 0)
+        return matrix
+
+    def distances_from(self, point, coords, dtype=np.float32):
+        """Distances from one (lat, lon) point to every row of `coords`"""
+        return self._block(self._unit_vectors(point), self._unit_vectors(coords))[0].astype(dtype)
+
+    def condensed_haversine(self, coords, dtype=np.float32, block_size=None):
+        """
+        Condensed upper triangle (i < j) of the distance matrix, in the
+        same order as scipy's `pdist`: n * (n - 1) / 2 values instead of n²
+        Use `condensed_index` to look up a pair.
+        """
+        points = self._unit_vectors(coords)
+        n = len(points)
+        condensed = np.empty(n * (n - 1) // 2, dtype=dtype)
+        block_size = block_size or self._block_size(n)
+
+        for start in range(0, n - 1, block_size):
+            end = min(start + block_size, n - 1)
+            # Only columns right of the block's first row are ever needed
+            block = self._block(points[start:end], points[start:])
+            for i in range(start, end):
+                offset = self.condensed_index(n, i, i + 1)
+                condensed[offset:offset + n - i - 1] = block[i - start, i - start + 1:]
+
+        return condensed
+
+    @staticmethod
+    def condensed_index(n, i, j):
+        """Position of pair (i, j), i != j, inside a condensed matrix of n points"""
+        if i > j:
+            i, j = j, i
+        return n * i - i * (i + 1) // 2 + (j - i - 1)
+
+    @staticmethod
+    def condensed_to_square(condensed, n):
+        """Expand a condensed matrix back to a symmetric (n, n) array"""
+        matrix = np.zeros((n, n), dtype=condensed.dtype)
+        rows, cols = np.triu_indices(n, k=1)
+        matrix[rows, cols] = condensed
+        matrix[cols, rows] = condensed
+        return matrix
+
+    @staticmethod
+    def _unit_vectors(coords):
+        """(lat, lon) degrees -> points on the unit sphere, shape (n, 3)"""
+        coords = np.radians(np.asarray(coords, dtype=np.float64).reshape(-1, 2))
+        cos_lat = np.cos(coords[:, 0])
+        return np.column_stack((
+            cos_lat * np.cos(coords[:, 1]),
+            cos_lat * np.sin(coords[:, 1]),
+            np.sin(coords[:, 0]),
+        ))
+
+    @staticmethod
+    def _block_size(n):
+        return max(1, DEFAULT_BLOCK_CELLS // max(n, 1))
+
+    def _block(self, rows, cols):
+        """
+        Haversine between two sets of unit vectors
+
+        For unit vectors the haversine term sin²(θ/2) equals (1 - p·q) / 2,
+        so a whole block is one matrix product plus an arcsin.
+        """
+        a = rows @ cols.T
+        np.subtract(1.0, a, out=a)
+        np.multiply(a, 0.5, out=a)
+        np.clip(a, 0.0, 1.0, out=a)
+        np.sqrt(a, out=a)
+        np.arcsin(a, out=a)
+        np.multiply(a, 2 * self.EARTH_RADIUS_KM, out=a)
+        return a
+
     def manhattan_distance(self, lat1, lon1, lat2, lon2):
         """Calculate Manhattan distance (approximation)"""
-        return abs(lat2 - lat1) + abs(lon2 - lon1)
\ No newline at end of file
+        return abs(lat2 - lat1) + abs(lon2 - lon1)
+
+
+def flat_matrix_view(matrix):
+    """
+    Zero-copy flat view of a square distance matrix for scalar lookups
+
+    Indexing a memoryview returns a plain Python float several times
+    faster than indexing the NumPy array; use `view[i * n + j]`.
+    Returns (view, n).
+    """
+    matrix = np.ascontiguousarray(matrix)
+    if matrix.dtype not in (np.float32, np.float64):
+        matrix = matrix.astype(np.float64)
+    return memoryview(matrix).cast("B").cast(matrix.dtype.char), matrix.shape[0]
+
+
+
+def symmetric_matrix(matrix):
+    """
+    The matrix itself when symmetric, else np.maximum(D, D.T)
+
+    2-opt and reversed Or-opt moves cost a reversed segment with its
+    forward edges, which only holds when d(a, b) == d(b, a). Directed
+    (one-way road) matrices are symmetrized to the longer direction for
+    those moves; solvers still report the directed tour length.
+    """
+    matrix = np.asarray(matrix)
+    block = max(1, (1 << 20) // max(len(matrix), 1))   # compare ~1M cells at a time
+    for start in range(0, len(matrix), block):
+        if not np.array_equal(matrix[start:start + block],
+                              matrix[:, start:start + block].T):
+            return np.maximum(matrix, matrix.T)
+    return matrix
@@ -0,0 +1,318 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+INTERRUPTED = 'interrupted'
+
+FINISHED = (DONE, FAILED, CANCELLED, INTERRUPTED)
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when max_pending jobs are already waiting"""
+
+
+class Job:
+    """One background task and its latest progress / result"""
+
+    def __init__(self, kind, params):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = QUEUED
+        self.progress = None
+        self.result = None
+        self.error = None
+        self.version = 0           # bumped on every change, for streaming
+        self.created_at = _now()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'type': self.kind,
+            'params': self.params,
+            'status': self.status,
+            'progress': self.progress,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobQueue:
+    """
+    Bounded background worker pool for long optimizations
+
+    submit() returns a job id at once; the work runs on one of
+    `max_workers` threads and at most `max_pending` jobs may wait behind
+    them. Task functions are called as func(progress_callback, **params):
+    the callback records the newest progress entry and returns True once
+    the job was cancelled, which is exactly the solvers' progress_callback
+    contract, so a cancel stops a running solve at its next generation.
+
+    Job state is kept in memory and mirrored to a small SQLite table
+    (when db_path is given) so finished results can still be polled from
+    another process or after a restart. Every row records the queue that
+    owns it, and live queues register in a `job_owners` table with their
+    boot id, pid and process start time. A new queue marks a queued or
+    running job 'interrupted' only when its owner is gone, so several
+    worker processes can share one database.
+    """
+
+    def __init__(self, max_workers=2, max_pending=32, db_path=None, keep_finished=200):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.db_path = db_path
+        self.keep_finished = keep_finished
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='job')
+        self.owner = uuid.uuid4().hex
+        if db_path:
+            self._init_db()
+
+    # --------------------------------------------------
+    # Public API
+    # --------------------------------------------------
+    def submit(self, kind, func, **params):
+        """Queue func(progress_callback, **params); returns the Job"""
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job.status == QUEUED)
+            if pending >= self.max_pending:
+                raise QueueFull(f'{pending} jobs already waiting')
+
+            job = Job(kind, params)
+            self._jobs[job.id] = job
+            self._prune()
+        self._save(job)
+
+        job.future = self._executor.submit(self._run, job, func)
+        return job
+
+    def get(self, job_id):
+        """Job state as a dict (memory first, then SQLite), or None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job.to_dict()
+        return self._load(job_id)
+
+    def cancel(self, job_id):
+        """
+        Cancel a job: a queued job never starts, a running one is stopped
+        at its next progress report. Returns False for unknown or
+        already finished jobs.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return False
+            job.cancel_event.set()
+            if job.future is not None and job.future.cancel():
+                self._finish(job, CANCELLED)
+                saved = True
+            else:
+                saved = False
+        if saved:
+            self._save(job)
+        return True
+
+    def wait(self, job_id, seen_version=-1, timeout=15.0):
+        """
+        Block until the job changes past `seen_version` (or timeout).
+        Returns (version, state dict) or None for an unknown job.
+        """
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None:
+                state = self._load(job_id)
+                return None if state is None else (0, state)
+            self._changed.wait_for(lambda: job.version > seen_version, timeout)
+            return job.version, job.to_dict()
+
+    def shutdown(self, wait=False):
+        with self._lock:
+            for job in self._jobs.values():
+                job.cancel_event.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute('DELETE FROM job_owners WHERE owner = ?', (self.owner,))
+
+    # --------------------------------------------------
+    # Worker side
+    # --------------------------------------------------
+    def _run(self, job, func):
+        with self._lock:
+            if job.cancel_event.is_set():
+                self._finish(job, CANCELLED)
+                cancelled = True
+            else:
+                job.status = RUNNING
+                job.started_at = _now()
+                self._touch(job)
+                cancelled = False
+        self._save(job)
+        if cancelled:
+            return
+
+        def progress_callback(entry):
+            with self._lock:
+                job.progress = entry
+                self._touch(job)
+            return job.cancel_event.is_set()
+
+        try:
+            result = func(progress_callback, **job.params)
+        except Exception as e:
+            with self._lock:
+                job.error = str(e)
+                self._finish(job, FAILED)
+        else:
+            with self._lock:
+                job.result = result
+                self._finish(job, CANCELLED if job.cancel_event.is_set() else DONE)
+        self._save(job)
+
+    def _touch(self, job):
+        """Record a change (caller holds the lock) and wake waiters"""
+        job.version += 1
+        self._changed.notify_all()
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished_at = _now()
+        self._touch(job)
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond keep_finished (lock held)"""
+        finished = [job for job in self._jobs.values() if job.status in FINISHED]
+        for job in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job.id]
+
+    # --------------------------------------------------
+    # SQLite mirror
+    # --------------------------------------------------
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                ' job_id TEXT PRIMARY KEY, state TEXT NOT NULL,'
+                ' status TEXT NOT NULL, created_at TEXT NOT NULL, owner TEXT)'
+            )
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(jobs)')]
+            if 'owner' not in columns:
+                conn.execute('ALTER TABLE jobs ADD COLUMN owner TEXT')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS job_owners ('
+                ' owner TEXT PRIMARY KEY, boot_id TEXT,'
+                ' pid INTEGER NOT NULL, started INTEGER)'
+            )
+
+            # Forget queues whose process is gone, then register this one
+            for owner, boot_id, pid, started in conn.execute(
+                    'SELECT owner, boot_id, pid, started FROM job_owners').fetchall():
+                if not _process_alive(boot_id, pid, started):
+                    conn.execute('DELETE FROM job_owners WHERE owner = ?', (owner,))
+            pid = os.getpid()
+            conn.execute(
+                'INSERT INTO job_owners (owner, boot_id, pid, started) VALUES (?, ?, ?, ?)',
+                (self.owner, _boot_id(), pid, _process_start(pid))
+            )
+
+            # Unfinished jobs of a dead owner will never complete
+            rows = conn.execute(
+                'SELECT job_id, state FROM jobs WHERE status IN (?, ?) AND '
+                '(owner IS NULL OR owner NOT IN (SELECT owner FROM job_owners))',
+                (QUEUED, RUNNING)
+            ).fetchall()
+            for job_id, state in rows:
+                state = json.loads(state)
+                state['status'] = INTERRUPTED
+                conn.execute('UPDATE jobs SET state = ?, status = ? WHERE job_id = ?',
+                             (json.dumps(state), INTERRUPTED, job_id))
+
+    def _save(self, job):
+        if not self.db_path:
+            return
+        with self._lock:
+            state = job.to_dict()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO jobs (job_id, state, status, created_at, owner) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (job.id, json.dumps(state, default=_json_default),
+                 job.status, job.created_at, self.owner)
+            )
+
+    def _load(self, job_id):
+        if not self.db_path:
+            return None
+        with self._connect() as conn:
+            row = conn.execute('SELECT state FROM jobs WHERE job_id = ?',
+                               (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _boot_id():
+    """Kernel boot id (Linux), so pids from before a reboot never match"""
+    try:
+        with open('/proc/sys/kernel/random/boot_id') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _process_start(pid):
+    """Start time of pid in clock ticks since boot (Linux), or None"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # Field 22; the command name (field 2) may contain spaces
+    return int(stat[stat.rindex(')') + 2:].split()[19])
+
+
+def _process_alive(boot_id, pid, started):
+    """Whether a registered queue's process still runs"""
+    if boot_id != _boot_id():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass                        # exists, owned by another user
+    # A recycled pid (e.g. a restarted container) has a new start time
+    return started is None or _process_start(pid) in (None, started)
+
+
+def _json_default(value):
+    """NumPy scalars / arrays in results"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
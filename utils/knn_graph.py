@@ -0,0 +1,141 @@
+import math
+
+import numpy as np
+from sklearn.neighbors import BallTree
+
+from utils.distance_calculator import DistanceCalculator
+
+
+class KNNGraph:
+    """
+    Sparse k-nearest-neighbour distance graph over depot + bin locations
+
+    Used instead of the dense distance matrix for city-scale problems:
+    only the k nearest neighbours of every node are stored (O(n·k) memory),
+    any other distance is computed on demand with the haversine formula.
+    Node 0 is the depot and nodes 1+ are bins, the same indexing as
+    RouteOptimizer.distance_matrix.
+    """
+
+    def __init__(self, coords, k: int = 16, dtype=np.float32):
+        self.distance_calc = DistanceCalculator()
+        self.coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        self.n = len(self.coords)
+        self.k = max(0, min(k, self.n - 1))
+
+        self._radians = np.radians(self.coords)
+        self._lat = self._radians[:, 0].tolist()
+        self._lon = self._radians[:, 1].tolist()
+        self._cos_lat = np.cos(self._radians[:, 0]).tolist()
+
+        self.tree = BallTree(self._radians, metric="haversine")
+        self.neighbors, self.neighbor_dist = self._build(dtype)
+
+    def _build(self, dtype):
+        if self.k == 0:
+            return (np.empty((self.n, 0), dtype=np.int32),
+                    np.empty((self.n, 0), dtype=dtype))
+
+        dist, idx = self.tree.query(self._radians, k=self.k + 1)
+
+        # Drop each node itself (normally column 0, but duplicate
+        # coordinates can put it anywhere among the ties)
+        is_self = idx == np.arange(self.n)[:, None]
+        has_self = is_self.any(axis=1)
+        is_self[~has_self, -1] = True
+        keep = ~is_self
+
+        neighbors = idx[keep].reshape(self.n, self.k).astype(np.int32)
+        neighbor_dist = (dist[keep].reshape(self.n, self.k)
+                         * self.distance_calc.EARTH_RADIUS_KM).astype(dtype)
+        return neighbors, neighbor_dist
+
+    def __len__(self):
+        return self.n
+
+    # --------------------------------------------------
+    # On-demand distances
+    # --------------------------------------------------
+    def distance(self, i: int, j: int) -> float:
+        """Haversine distance between nodes i and j (km)"""
+        lat1, lat2 = self._lat[i], self._lat[j]
+        a = (math.sin((lat2 - lat1) * 0.5) ** 2
+             + self._cos_lat[i] * self._cos_lat[j]
+             * math.sin((self._lon[j] - self._lon[i]) * 0.5) ** 2)
+        return 2 * self.distance_calc.EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+    def distances(self, a, b) -> np.ndarray:
+        """Element-wise distances between node arrays a and b (broadcasting)"""
+        a, b = np.asarray(a), np.asarray(b)
+        return self.distance_calc.haversine_vector(
+            self.coords[a, 0], self.coords[a, 1],
+            self.coords[b, 0], self.coords[b, 1]
+        )
+
+    def path_length(self, nodes) -> float:
+        """Length of a path visiting `nodes` in order"""
+        nodes = np.asarray(nodes)
+        if len(nodes) < 2:
+            return 0.0
+        return float(self.distances(nodes[:-1], nodes[1:]).sum())
+
+    # --------------------------------------------------
+    # Nearest queries
+    # --------------------------------------------------
+    def query(self, i: int, k: int):
+        """k nearest nodes of node i (including itself) as (indices, km)"""
+        k = min(k, self.n)
+        dist, idx = self.tree.query(self._radians[i:i + 1], k=k)
+        return idx[0], dist[0] * self.distance_calc.EARTH_RADIUS_KM
+
+
+class UnvisitedIndex:
+    """
+    Nearest-unvisited lookups over a KNNGraph for greedy construction
+
+    Visited nodes are removed lazily: queries skip them and widen k when
+    every candidate was already visited, and the ball tree is rebuilt over
+    the remaining nodes once more than half of its points are stale.
+    """
+
+    def __init__(self, graph: KNNGraph, nodes, query_k: int = 32):
+        self.graph = graph
+        self.query_k = query_k
+        self.unvisited = np.zeros(graph.n, dtype=bool)
+        self.unvisited[np.asarray(nodes, dtype=np.int64)] = True
+        self.remaining = int(self.unvisited.sum())
+        self._rebuild()
+
+    def _rebuild(self):
+        self._nodes = np.flatnonzero(self.unvisited)
+        self._tree = BallTree(self.graph._radians[self._nodes], metric="haversine")
+
+    def visit(self, node: int):
+        if self.unvisited[node]:
+            self.unvisited[node] = False
+            self.remaining -= 1
+
+    def nearest(self, node: int):
+        """Closest unvisited node to `node`, or None when all are visited"""
+        if self.remaining == 0:
+            return None
+
+        # Cheap path: the precomputed neighbour list
+        for candidate in self.graph.neighbors[node]:
+            if self.unvisited[candidate]:
+                return int(candidate)
+
+        point = self.graph._radians[node:node + 1]
+        k = self.query_k
+        while True:
+            k = min(k, len(self._nodes))
+            _, idx = self._tree.query(point, k=k)
+            for candidate in self._nodes[idx[0]]:
+                if self.unvisited[candidate]:
+                    return int(candidate)
+
+            if k == len(self._nodes) or self.remaining * 2 < len(self._nodes):
+                self._rebuild()
+                k = self.query_k
+            else:
+                k *= 4
@@ -0,0 +1,183 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from sklearn.neighbors import BallTree
+
+from utils.distance_calculator import DistanceCalculator
+
+# Graph held by each Dijkstra worker process (set once by the pool initializer)
+_WORKER_GRAPH = None
+
+# Dijkstra returns a dense (sources, n_nodes) float64 block per batch;
+# batches are shrunk so one block stays under this many cells (128 MB)
+BATCH_CELLS = 1 << 24
+
+
+class RoadNetwork:
+    """
+    Driving distances over a local road graph
+
+    The graph is an edge list (e.g. exported from OpenStreetMap) held as
+    a scipy compressed sparse-row matrix. Bins and the depot are snapped
+    to their nearest graph node with a haversine BallTree, and a distance
+    is snap(a) + shortest road path + snap(b). Matrices are computed with
+    multi-source Dijkstra in batches of sources spread over worker
+    processes. Everything is local: no routing service is called.
+
+    Pairs the graph cannot connect (disconnected components) fall back to
+    the haversine distance times `detour_factor`.
+    """
+
+    def __init__(self, node_coords, u, v, length_km=None, oneway=None,
+                 detour_factor=1.4, max_workers=None):
+        """
+        node_coords: (N, 2) array of (lat, lon) per graph node
+        u, v: edge endpoints (node indices)
+        length_km: edge lengths; haversine between the endpoints if omitted
+        oneway: optional bool per edge; other edges are usable both ways
+        max_workers: default Dijkstra pool size of matrix(); 1 keeps it
+                     in-process (e.g. when already inside a worker)
+        """
+        self.distance_calc = DistanceCalculator()
+        self.node_coords = np.asarray(node_coords, dtype=np.float64).reshape(-1, 2)
+        self.n_nodes = len(self.node_coords)
+        self.detour_factor = detour_factor
+        self.max_workers = max_workers
+
+        u = np.asarray(u, dtype=np.int64)
+        v = np.asarray(v, dtype=np.int64)
+        if length_km is None:
+            length_km = self.distance_calc.haversine_vector(
+                self.node_coords[u, 0], self.node_coords[u, 1],
+                self.node_coords[v, 0], self.node_coords[v, 1]
+            )
+        length_km = np.asarray(length_km, dtype=np.float64)
+
+        both_ways = np.ones(len(u), dtype=bool) if oneway is None else ~np.asarray(oneway, dtype=bool)
+        self.symmetric = bool(both_ways.all())
+        src = np.concatenate([u, v[both_ways]])
+        dst = np.concatenate([v, u[both_ways]])
+        lengths = np.concatenate([length_km, length_km[both_ways]])
+
+        self.graph = self._csr(src, dst, lengths)
+        self.tree = BallTree(np.radians(self.node_coords), metric="haversine")
+        self.fingerprint = self._fingerprint()
+
+    @classmethod
+    def from_edge_list(cls, path, **kwargs):
+        """
+        Load a CSV edge list with columns
+            u_lat, u_lon, v_lat, v_lon[, length_m | length_km][, oneway]
+        Nodes are identified by their coordinates (OSM-style exports
+        repeat the exact node coordinates on every edge).
+        """
+        edges = pd.read_csv(path)
+        ends = np.concatenate([edges[["u_lat", "u_lon"]].to_numpy(),
+                               edges[["v_lat", "v_lon"]].to_numpy()])
+        node_coords, inverse = np.unique(ends, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        u, v = inverse[:len(edges)], inverse[len(edges):]
+
+        length_km = None
+        if "length_km" in edges:
+            length_km = edges["length_km"].to_numpy(dtype=np.float64)
+        elif "length_m" in edges:
+            length_km = edges["length_m"].to_numpy(dtype=np.float64) / 1000.0
+
+        oneway = edges["oneway"].astype(bool).to_numpy() if "oneway" in edges else None
+        return cls(node_coords, u, v, length_km, oneway, **kwargs)
+
+    def _csr(self, src, dst, lengths):
+        """CSR adjacency keeping the shortest of any parallel edges"""
+        pair = src * self.n_nodes + dst
+        order = np.lexsort((lengths, pair))
+        pair, lengths = pair[order], lengths[order]
+        first = np.ones(len(pair), dtype=bool)
+        first[1:] = pair[1:] != pair[:-1]
+        pair, lengths = pair[first], lengths[first]
+        return csr_matrix((lengths, (pair // self.n_nodes, pair % self.n_nodes)),
+                          shape=(self.n_nodes, self.n_nodes))
+
+    def _fingerprint(self):
+        digest = hashlib.sha1(b"road")
+        for array in (self.graph.indptr, self.graph.indices, self.graph.data,
+                      np.float64(self.detour_factor)):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.hexdigest()
+
+    # --------------------------------------------------
+    # Snapping
+    # --------------------------------------------------
+    def snap(self, coords):
+        """Nearest graph node and its distance (km) for each (lat, lon)"""
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        dist, idx = self.tree.query(np.radians(coords), k=1)
+        return idx[:, 0], dist[:, 0] * self.distance_calc.EARTH_RADIUS_KM
+
+    # --------------------------------------------------
+    # Distances
+    # --------------------------------------------------
+    def matrix(self, coords, dtype=np.float32, batch_size=64, max_workers=None):
+        """
+        (n, n) driving-distance matrix between the points in `coords`
+
+        One Dijkstra per distinct snapped node, `batch_size` sources per
+        task (fewer on large graphs, see BATCH_CELLS); with several
+        batches they run in a process pool.
+        """
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        nodes, snap_km = self.snap(coords)
+        sources, source_of = np.unique(nodes, return_inverse=True)
+
+        batch_size = max(1, min(batch_size, BATCH_CELLS // max(self.n_nodes, 1)))
+        batches = [sources[i:i + batch_size] for i in range(0, len(sources), batch_size)]
+        workers = max_workers or self.max_workers or min(len(batches), os.cpu_count() or 1)
+        if workers <= 1:
+            road = [_dijkstra_batch(self.graph, batch, nodes) for batch in batches]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self.graph,)) as pool:
+                road = list(pool.map(_dijkstra_batch, [None] * len(batches),
+                                     batches, [nodes] * len(batches)))
+        road = np.concatenate(road)[source_of.ravel()]
+
+        matrix = road + snap_km[:, None] + snap_km[None, :]
+        self._fill_unreachable(matrix, coords)
+        np.fill_diagonal(matrix, 0.0)
+        return matrix.astype(dtype)
+
+    def distances_from(self, point, coords, dtype=np.float32):
+        """Driving distances from one (lat, lon) point to every row of `coords`"""
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        source, source_snap = self.snap(point)
+        nodes, snap_km = self.snap(coords)
+
+        row = _dijkstra_batch(self.graph, source, nodes)[0] + source_snap[0] + snap_km
+        unreachable = ~np.isfinite(row)
+        if unreachable.any():
+            point = np.asarray(point, dtype=np.float64).reshape(2)
+            row[unreachable] = self.detour_factor * self.distance_calc.distances_from(
+                point, coords[unreachable], dtype=np.float64)
+        return row.astype(dtype)
+
+    def _fill_unreachable(self, matrix, coords):
+        rows, cols = np.nonzero(~np.isfinite(matrix))
+        if len(rows):
+            matrix[rows, cols] = self.detour_factor * self.distance_calc.haversine_vector(
+                coords[rows, 0], coords[rows, 1], coords[cols, 0], coords[cols, 1])
+
+
+def _init_worker(graph):
+    global _WORKER_GRAPH
+    _WORKER_GRAPH = graph
+
+
+def _dijkstra_batch(graph, sources, targets):
+    """Shortest road distances from each source node to the target nodes"""
+    graph = _WORKER_GRAPH if graph is None else graph
+    return dijkstra(graph, directed=True, indices=np.atleast_1d(sources))[:, targets]
@@ -0,0 +1,84 @@
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class RouteCache:
+    """
+    LRU + TTL cache for optimization results
+
+    Entries are keyed by a fingerprint of everything the result depends
+    on (see `key`). Besides expiring after `ttl` seconds, the whole cache
+    is dropped by `invalidate()` whenever predictions or live fill levels
+    change. Thread-safe; hit / miss / eviction counters are kept for the
+    stats endpoint.
+    """
+
+    def __init__(self, max_entries=128, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(**parts):
+        """SHA1 fingerprint of JSON-serialisable parts (order-insensitive)"""
+        payload = json.dumps(parts, sort_keys=True, default=_json_default)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Cached value (a copy) or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Drop every entry (inputs such as predictions changed)"""
+        with self._lock:
+            if self._entries:
+                self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+
+def _json_default(value):
+    """NumPy scalars / arrays and tuples inside key parts"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
@@ -0,0 +1,134 @@
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from utils.distance_calculator import flat_matrix_view
+
+# Segment this process is attached to, so a pool worker maps it once per
+# job; attaching a different segment releases the previous ones
+_ATTACHED = {}
+# Released (shm, array) pairs whose array was still referenced; closed later
+_STALE = []
+
+
+class SharedDistanceMatrix:
+    """
+    Distance matrix placed in multiprocessing shared memory
+
+    Worker processes receive the small picklable `handle` and call
+    `attach_matrix(handle)` to get a NumPy view of the same pages, so the
+    matrix is never pickled or copied per task. Use as a context manager
+    (or call close()) in the creating process to free the segment.
+    """
+
+    def __init__(self, matrix):
+        matrix = np.ascontiguousarray(matrix)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(matrix.nbytes, 1))
+        self.array = np.ndarray(matrix.shape, dtype=matrix.dtype, buffer=self._shm.buf)
+        self.array[...] = matrix
+        self.handle = (self._shm.name, matrix.shape, matrix.dtype.str)
+
+    def close(self):
+        if self._shm is None:
+            return
+        self.array = None
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SharedFlag:
+    """
+    One-byte flag in shared memory, e.g. a cancel signal
+
+    The creating process sets it; pool workers open it by `name` (passed
+    as a plain task argument, unlike multiprocessing.Event) and poll
+    is_set(). Use as a context manager on both sides.
+    """
+
+    def __init__(self, name=None):
+        self._owner = name is None
+        self._shm = shared_memory.SharedMemory(name=name, create=self._owner, size=1)
+        if self._owner:
+            self._shm.buf[0] = 0
+        self.name = self._shm.name
+
+    def set(self):
+        self._shm.buf[0] = 1
+
+    def is_set(self):
+        return self._shm.buf[0] != 0
+
+    def close(self):
+        if self._shm is None:
+            return
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def route_distance_func(matrix):
+    """
+    distance_func(route) for pool tasks: closed tour depot -> route ->
+    depot over `matrix` (e.g. from attach_matrix), via scalar lookups
+    """
+    view, stride = flat_matrix_view(matrix)
+
+    def distance_func(route):
+        nodes = [0] + [i + 1 for i in route] + [0]
+        return sum(view[a * stride + b] for a, b in zip(nodes, nodes[1:]))
+
+    return distance_func
+
+
+def attach_matrix(handle):
+    """
+    Read-only NumPy view of a SharedDistanceMatrix from its handle
+
+    Long-lived pool workers serve many jobs, so mapping a new segment
+    closes the ones attached for earlier jobs instead of keeping them
+    mapped forever.
+    """
+    name, shape, dtype = handle
+    if name not in _ATTACHED:
+        release_matrices()
+        shm = shared_memory.SharedMemory(name=name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        array.flags.writeable = False
+        _ATTACHED[name] = (shm, array)
+    return _ATTACHED[name][1]
+
+
+def release_matrices():
+    """
+    Close the segments this process attached that nothing references any
+    more; ones still in use (a live view) are retried on the next call.
+    Closing unmaps the pages, so it must never happen under a live view.
+    """
+    while _ATTACHED:
+        _STALE.append(_ATTACHED.popitem()[1])
+
+    pending = []
+    while _STALE:
+        shm, array = _STALE.pop()
+        # local name + getrefcount's own argument: nobody else holds it
+        if sys.getrefcount(array) > 2:
+            pending.append((shm, array))
+            continue
+        del array
+        shm.close()
+    _STALE[:] = pending